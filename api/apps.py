@@ -11,6 +11,12 @@ class ApiConfig(AppConfig):
     def ready(self):
         from .signals.cache import (
             clean_five_top_rated_profiles,
+            clean_results,
             clean_ten_most_recent_posts,
+            clean_user_contests,
+        )
+        from .signals.main import (
+            collect_rated_profiles,
+            create_profile_for_user,
+            update_rated_profiles,
         )
-        from .signals.main import create_profile_for_user
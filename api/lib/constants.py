@@ -3,6 +3,27 @@ CACHE_KEY_FIVE_TOP_RATED_PROFILES = "api/lib/five_top_rated_profiles"
 CACHE_KEY_TEN_MOST_RECENT_POSTS = "api/lib/ten_most_recent_posts"
 CACHE_KEY_USER_CONTESTS = "api/lib/user_contests"
 CACHE_KEY_STANDING = "api/lib/standing"
+CACHE_VERSION_PREFIX = "version/"
+CACHE_LOCK_PREFIX = "lock/"
+
+# Single-flight recomputation of cached queries (seconds). The lock
+# timeout must be above the slowest recomputation, otherwise a second
+# caller takes the expired lock and recomputes the value again.
+CACHE_LOCK_TIMEOUT = 60
+CACHE_LOCK_WAIT = 5
+CACHE_LOCK_POLL = 0.05
 
 STANDING_TIMEOUT = 10
+STANDING_STORE_TIMEOUT = 300
+STANDING_STORES_LIMIT = 32
+# Seconds of submission changes read again by every standing refresh, and
+# kept in the log (longer than a store lives, see STANDING_STORE_TIMEOUT)
+STANDING_CHANGES_OVERLAP = 60
+SUBMISSION_CHANGES_RETENTION = 3600
 USER_CONTESTS_TIMEOUT = 300
+
+# PostgreSQL channel notified whenever a submission becomes pending
+PENDING_SUBMISSIONS_CHANNEL = "mog_pending_submissions"
+
+# Seconds before reloading the in-process registry of results
+RESULTS_TIMEOUT = 300
@@ -0,0 +1,68 @@
+"""
+Push-based dispatch of pending submissions to graders.
+
+The web application notifies a PostgreSQL channel every time a
+submission becomes pending (new submission or rejudge) and graders
+block on that channel instead of polling the submissions table. The
+notification carries no guarantees: graders still poll the table after
+waking up (or after a timeout), so a lost notification only delays the
+grading up to the grader's `--sleep` seconds.
+
+NOTIFY is transactional, if it is issued inside a transaction it will
+be delivered once the transaction commits, so graders never wake up
+before the pending submission is visible to them.
+"""
+
+import select
+
+from django.db import connection
+
+from api.lib import constants
+
+
+# Raw connection in which we issued the LISTEN command. Django might
+# replace the connection (e.g. after `close_old_connections`) and then
+# we need to LISTEN again.
+_listening_connection = None
+
+
+def notify_pending_submission(submission_id):
+    """Wake up graders waiting for pending submissions"""
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_notify(%s, %s)",
+            [constants.PENDING_SUBMISSIONS_CHANNEL, str(submission_id)],
+        )
+
+
+def listen_pending_submissions():
+    """Subscribe the current database connection to the channel"""
+    global _listening_connection
+    connection.ensure_connection()
+    if connection.connection is not _listening_connection:
+        with connection.cursor() as cursor:
+            cursor.execute('LISTEN "%s"' % constants.PENDING_SUBMISSIONS_CHANNEL)
+        _listening_connection = connection.connection
+    return _listening_connection
+
+
+def wait_for_pending_submission(timeout):
+    """
+    Block until some submission becomes pending or `timeout` seconds
+    pass. Return True when a notification was received. Databases
+    other than PostgreSQL are not supported and this function returns
+    False right away, callers should fall back to sleeping.
+    """
+    if connection.vendor != "postgresql":
+        return False
+    with connection.wrap_database_errors:
+        raw = listen_pending_submissions()
+        if not raw.notifies:
+            if select.select([raw], [], [], timeout) == ([], [], []):
+                return False
+            raw.poll()
+        notified = bool(raw.notifies)
+        del raw.notifies[:]
+    return notified
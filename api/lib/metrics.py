@@ -0,0 +1,158 @@
+"""
+Prometheus metrics of the web server and the grader.
+
+Web metrics are exported by the `metrics` view, grader metrics by the
+server the grader starts with `--metrics-port`. Gunicorn and the grader
+run several processes, so when `PROMETHEUS_MULTIPROC_DIR` is set (it
+must be set before starting them, pointing to an empty folder) every
+process writes its metrics there and they are aggregated on export.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+DB_QUERIES_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+REQUEST_DURATION = Histogram(
+    "judge_request_duration_seconds",
+    "Time spent processing a request",
+    ["view", "method", "status"],
+)
+REQUEST_DB_QUERIES = Histogram(
+    "judge_request_db_queries",
+    "Database queries executed by a request",
+    ["view"],
+    buckets=DB_QUERIES_BUCKETS,
+)
+REQUEST_DB_DURATION = Histogram(
+    "judge_request_db_duration_seconds",
+    "Time spent by a request waiting for database queries",
+    ["view"],
+)
+TEMPLATE_RENDER_DURATION = Histogram(
+    "judge_template_render_duration_seconds",
+    "Time spent rendering a template",
+    ["template"],
+)
+CACHE_REQUESTS = Counter(
+    "judge_cache_requests",
+    "Lookups of cached queries (see api/lib/queries.py) by result",
+    ["key", "result"],
+)
+CACHE_RECOMPUTE_DURATION = Histogram(
+    "judge_cache_recompute_duration_seconds",
+    "Time spent recomputing cached queries",
+    ["key"],
+)
+
+GRADER_WAIT_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, 4 * 3600)
+GRADER_PHASE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+GRADER_WAIT_DURATION = Histogram(
+    "judge_grader_wait_duration_seconds",
+    "Time since a submission was sent until a grader took it (first grading only)",
+    ["language"],
+    buckets=GRADER_WAIT_BUCKETS,
+)
+GRADER_PHASE_DURATION = Histogram(
+    "judge_grader_phase_duration_seconds",
+    "Time spent grading a submission by phase: compile, compile_checker, "
+    "run and check (once per test case execution) and grade (whole grading)",
+    ["phase", "language"],
+    buckets=GRADER_PHASE_BUCKETS,
+)
+GRADER_RETRIES = Counter(
+    "judge_grader_retries",
+    "Test case executions repeated after a time or idleness limit exceeded",
+    ["language"],
+)
+GRADER_VERDICTS = Counter(
+    "judge_grader_verdicts",
+    "Submissions graded by final verdict",
+    ["result", "language"],
+)
+GRADER_INTERNAL_ERRORS = Counter(
+    "judge_grader_internal_errors",
+    "Internal errors (and database errors) while grading by cause",
+    ["cause"],
+)
+
+# Stats recorded by `cache_result` mapped to the `result` label
+CACHE_RESULTS = {"hits": "hit", "stale_hits": "stale_hit", "misses": "miss"}
+
+
+class QueryTimer(object):
+    """
+    Database execute wrapper (see `connection.execute_wrapper`) counting
+    the queries executed and the time spent on them.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.seconds += time.monotonic() - start
+
+
+def get_view_name(request) -> str:
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match else "unresolved"
+
+
+def observe_request(request, status, seconds, query_timer):
+    view = get_view_name(request)
+    status = "%dxx" % (status // 100) if status else "exception"
+    REQUEST_DURATION.labels(view, request.method, status).observe(seconds)
+    REQUEST_DB_QUERIES.labels(view).observe(query_timer.queries)
+    REQUEST_DB_DURATION.labels(view).observe(query_timer.seconds)
+
+
+def observe_template_render(template_name, seconds):
+    TEMPLATE_RENDER_DURATION.labels(template_name or "<string>").observe(seconds)
+
+
+def observe_cache_stat(key, stat, amount):
+    if stat in CACHE_RESULTS:
+        CACHE_REQUESTS.labels(key, CACHE_RESULTS[stat]).inc(amount)
+    elif stat == "recompute_seconds":
+        CACHE_RECOMPUTE_DURATION.labels(key).observe(amount)
+
+
+@contextmanager
+def observe_phase(phase, language):
+    """Observe the duration of a grading phase"""
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        GRADER_PHASE_DURATION.labels(phase, language).observe(time.monotonic() - start)
+
+
+def get_registry():
+    """Registry with the metrics of every process"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def render_metrics() -> bytes:
+    """Metrics of every process in the Prometheus text format"""
+    return generate_latest(get_registry())
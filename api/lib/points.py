@@ -0,0 +1,229 @@
+"""
+Points ledger.
+
+The points of a problem depend on the number of users that solved it
+(at least one accepted, normal and visible submission) and the points of
+a user are the sum of the points of the problems they solved. This used
+to be maintained by the `check_update` trigger (see db_scripts/), which
+recomputed the points of a problem and of every user who ever submitted
+to it on each submission update.
+
+Now a trigger only records the (user, problem) pairs whose submissions
+changed in `PendingPointsUpdate`, and `apply_pending_points_updates`
+(run by the `update_points` command) applies them in batches to the
+ledger of solved problems (`SolvedProblem`):
+
++ Users that solved (or un-solved) a problem get the current points of
+  the problem added (or subtracted).
++ When the number of solvers of a problem changes its points, the
+  difference is added to all its solvers with a single UPDATE.
+
+The same batches refresh the submission statistics of the users and
+problems involved (`UserProfile.update_submission_stats` and
+`Problem.update_submission_stats`), which are therefore behind the
+submissions for as long as the updates are pending.
+
+Points change after the submission signals invalidated the cached top
+rated users, so batches that change points invalidate it again.
+
+`verify_points` compares the ledger and the stored points against the
+SQL functions `compute_problem_points` and `compute_user_points`.
+"""
+
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Count, F
+
+from api.lib import constants
+from api.lib.queries import invalidate_cache
+from api.lib.results import get_result
+from api.models import (
+    PendingPointsUpdate,
+    Problem,
+    SolvedProblem,
+    Submission,
+    UserProfile,
+)
+
+
+def get_problem_points(solvers):
+    """Same formula used by `compute_problem_points`"""
+    return 108 // (12 + solvers) + 1
+
+
+def get_solved_submissions():
+    return Submission.objects.filter(
+        result=get_result("accepted"), status="normal", hidden=False
+    )
+
+
+def add_user_points(deltas):
+    """Add deltas[user_id] points to every user, grouping users by delta"""
+    users_by_delta = defaultdict(list)
+    for user_id, delta in deltas.items():
+        if delta:
+            users_by_delta[delta].append(user_id)
+    for delta, user_ids in users_by_delta.items():
+        UserProfile.objects.filter(user_id__in=user_ids).update(
+            points=F("points") + delta
+        )
+
+
+@transaction.atomic
+def apply_pending_points_updates(batch_size):
+    """
+    Apply up to `batch_size` pending updates to the ledger, and update
+    problem and user points accordingly. Return the number of pending
+    updates processed.
+    """
+    pending = list(
+        PendingPointsUpdate.objects.select_for_update(skip_locked=True).order_by("id")[
+            :batch_size
+        ]
+    )
+    if not pending:
+        return 0
+    PendingPointsUpdate.objects.filter(id__in=[p.id for p in pending]).delete()
+
+    # Lock touched problems (always in the same order) so concurrent
+    # batches can't compute points from the same number of solvers.
+    problems = dict(
+        Problem.objects.select_for_update()
+        .filter(id__in={p.problem_id for p in pending})
+        .order_by("id")
+        .values_list("id", "points")
+    )
+    pairs = {(p.user_id, p.problem_id) for p in pending if p.problem_id in problems}
+    user_ids = {user_id for user_id, _ in pairs}
+
+    solved = pairs & set(
+        get_solved_submissions()
+        .filter(user_id__in=user_ids, problem_id__in=list(problems))
+        .values_list("user_id", "problem_id")
+        .distinct()
+    )
+    ledger = pairs & set(
+        SolvedProblem.objects.filter(
+            user_id__in=user_ids, problem_id__in=list(problems)
+        ).values_list("user_id", "problem_id")
+    )
+    added, removed = solved - ledger, ledger - solved
+
+    SolvedProblem.objects.bulk_create(
+        [SolvedProblem(user_id=user_id, problem_id=pid) for user_id, pid in added]
+    )
+    removed_by_problem = defaultdict(list)
+    for user_id, problem_id in removed:
+        removed_by_problem[problem_id].append(user_id)
+    for problem_id, removed_user_ids in removed_by_problem.items():
+        SolvedProblem.objects.filter(
+            problem_id=problem_id, user_id__in=removed_user_ids
+        ).delete()
+
+    # New (and lost) solved problems are worth the points of the problem
+    # before this batch, the difference is applied below to all solvers.
+    deltas = defaultdict(int)
+    for user_id, problem_id in added:
+        deltas[user_id] += problems[problem_id]
+    for user_id, problem_id in removed:
+        deltas[user_id] -= problems[problem_id]
+    add_user_points(deltas)
+
+    solvers = dict(
+        SolvedProblem.objects.filter(problem_id__in=list(problems))
+        .values_list("problem_id")
+        .annotate(Count("id"))
+    )
+    points_changed = bool(added or removed)
+    for problem_id, old_points in problems.items():
+        new_points = get_problem_points(solvers.get(problem_id, 0))
+        if new_points != old_points:
+            points_changed = True
+            Problem.objects.filter(id=problem_id).update(points=new_points)
+            UserProfile.objects.filter(
+                user__solved_problems__problem_id=problem_id
+            ).update(points=F("points") + (new_points - old_points))
+
+    UserProfile.update_submission_stats(
+        UserProfile.objects.filter(user_id__in={p.user_id for p in pending})
+    )
+    Problem.update_submission_stats(Problem.objects.filter(id__in=list(problems)))
+
+    # The submission signals invalidated the ranking before the points
+    # changed, so it is invalidated again once they are committed.
+    if points_changed:
+        transaction.on_commit(
+            lambda: invalidate_cache(constants.CACHE_KEY_FIVE_TOP_RATED_PROFILES)
+        )
+
+    return len(pending)
+
+
+@transaction.atomic
+def rebuild_points_ledger():
+    """
+    Rebuild the ledger from scratch and recompute the points of every
+    problem and user from it.
+    """
+    PendingPointsUpdate.objects.all().delete()
+    SolvedProblem.objects.all().delete()
+    SolvedProblem.objects.bulk_create(
+        [
+            SolvedProblem(user_id=user_id, problem_id=problem_id)
+            for user_id, problem_id in get_solved_submissions()
+            .values_list("user_id", "problem_id")
+            .distinct()
+        ]
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "UPDATE api_problem SET points = 108 / (12 + ("
+            "  SELECT COUNT(*) FROM api_solvedproblem"
+            "  WHERE api_solvedproblem.problem_id = api_problem.id"
+            ")) + 1"
+        )
+        cursor.execute(
+            "UPDATE api_userprofile SET points = COALESCE(("
+            "  SELECT SUM(api_problem.points) FROM api_solvedproblem"
+            "  JOIN api_problem ON (api_problem.id = api_solvedproblem.problem_id)"
+            "  WHERE api_solvedproblem.user_id = api_userprofile.user_id"
+            "), 0)"
+        )
+
+
+def get_points_differences():
+    """
+    Compare the ledger against the submissions, and the stored points
+    against the SQL functions. Return three lists:
+
+    - (user id, problem id, expected) for every wrong ledger entry.
+    - (problem id, stored, expected) for every problem with wrong points.
+    - (user id, stored, expected) for every user with wrong points.
+    """
+    expected = set(
+        get_solved_submissions().values_list("user_id", "problem_id").distinct()
+    )
+    ledger = set(SolvedProblem.objects.values_list("user_id", "problem_id"))
+    ledger_differences = sorted(
+        [(user_id, problem_id, True) for user_id, problem_id in expected - ledger]
+        + [(user_id, problem_id, False) for user_id, problem_id in ledger - expected]
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT id, points, expected FROM ("
+            "  SELECT id, points, compute_problem_points(id) AS expected"
+            "  FROM api_problem"
+            ") AS problems WHERE points <> expected ORDER BY id"
+        )
+        problem_differences = cursor.fetchall()
+        cursor.execute(
+            "SELECT user_id, points, expected FROM ("
+            "  SELECT user_id, points, compute_user_points(user_id) AS expected"
+            "  FROM api_userprofile"
+            ") AS profiles WHERE points <> expected ORDER BY user_id"
+        )
+        user_differences = cursor.fetchall()
+
+    return ledger_differences, problem_differences, user_differences
@@ -16,23 +16,141 @@ should describe the following sections:
                  be serious issue for the query.
 """
 
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict, defaultdict
+
 from django.core.cache import cache
 
-from api.lib import constants
+from api.lib import constants, metrics
 from api.models import Post, UserProfile, ContestPermission, Contest
 from mog.standing import calculate_standing_new
+from mog.standing_store import StandingStore
+
+
+def get_cache_version(key):
+    """
+    Current version of the results cached under `key`. Versions live in
+    the cache itself, so with a shared cache backend every process sees
+    the same version. A missing version (never set or evicted) is
+    initialized with the current time in milliseconds to never reuse a
+    version that might still have results stored.
+    """
+    version_key = constants.CACHE_VERSION_PREFIX + key
+    version = cache.get(version_key)
+    if version is None:
+        cache.add(version_key, int(time.time() * 1000), None)
+        version = cache.get(version_key, 0)
+    return version
+
+
+def invalidate_cache(key):
+    """
+    Invalidate every result cached under `key` (for all arguments) by
+    bumping its version. Old results are left to expire by themselves.
+    """
+    version_key = constants.CACHE_VERSION_PREFIX + key
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        cache.add(version_key, int(time.time() * 1000), None)
+
+
+# Hits, misses and recompute time of every cached query (per process)
+_cache_stats = defaultdict(Counter)
+_cache_stats_lock = threading.Lock()
+
+
+def record_cache_stat(key, stat, amount=1):
+    with _cache_stats_lock:
+        _cache_stats[key][stat] += amount
+    metrics.observe_cache_stat(key, stat, amount)
+
+
+def get_cache_stats():
+    """
+    Return {key: {stat: value}} where stats are:
+
+    - hits: fresh value found in the cache.
+    - stale_hits: expired value returned while another caller
+      recomputes it.
+    - misses: value not found (or expired) in the cache.
+    - recomputes / recompute_seconds: calls to the cached function and
+      total time spent on them.
+    """
+    with _cache_stats_lock:
+        return {key: dict(stats) for key, stats in _cache_stats.items()}
 
 
-def cache_result(key, timeout=3600):
+def cache_result(key, timeout=3600, stale_timeout=None):
+    """
+    Cache the result of a function for `timeout` seconds.
+
+    Values are stored along with their expiration time and are kept
+    `stale_timeout` seconds more (`timeout` by default) in the cache.
+    Only one caller (the one that takes the lock) recomputes an expired
+    value, while the others keep getting the stale value. On a cold miss
+    the callers without the lock wait up to CACHE_LOCK_WAIT seconds for
+    the value before computing it by themselves.
+
+    The lock holds a token of its owner, which only releases it when the
+    token is still there: once the lock expired (CACHE_LOCK_TIMEOUT) it
+    might have been taken by another caller.
+    """
+    if stale_timeout is None:
+        stale_timeout = timeout
+
     def outer(func):
-        def inner(*args, **kwargs):
-            custom_key = key + "-".join([str(x).replace(" ", "_") for x in args])
-            val = cache.get(custom_key)
-            if val is None:
+        def recompute(custom_key, args, kwargs):
+            record_cache_stat(key, "recomputes")
+            start = time.monotonic()
+            try:
                 val = func(*args, **kwargs)
-                cache.set(custom_key, val, timeout)
+                cache.set(
+                    custom_key, (val, time.time() + timeout), timeout + stale_timeout
+                )
+            finally:
+                record_cache_stat(key, "recompute_seconds", time.monotonic() - start)
             return val
 
+        def inner(*args, **kwargs):
+            custom_key = "%s@%d-%s" % (
+                key,
+                get_cache_version(key),
+                "-".join([str(x).replace(" ", "_") for x in args]),
+            )
+            lock_key = constants.CACHE_LOCK_PREFIX + custom_key
+            entry = cache.get(custom_key)
+            if entry is not None and time.time() < entry[1]:
+                record_cache_stat(key, "hits")
+                return entry[0]
+            record_cache_stat(key, "misses")
+            token = uuid.uuid4().hex
+            deadline = time.monotonic() + constants.CACHE_LOCK_WAIT
+            while not cache.add(lock_key, token, constants.CACHE_LOCK_TIMEOUT):
+                if entry is not None:
+                    record_cache_stat(key, "stale_hits")
+                    return entry[0]
+                if time.monotonic() > deadline:
+                    return recompute(custom_key, args, kwargs)
+                time.sleep(constants.CACHE_LOCK_POLL)
+                entry = cache.get(custom_key)
+                if entry is not None and time.time() < entry[1]:
+                    return entry[0]
+            try:
+                # Someone else might have finished right before the lock
+                # was taken.
+                entry = cache.get(custom_key)
+                if entry is not None and time.time() < entry[1]:
+                    return entry[0]
+                return recompute(custom_key, args, kwargs)
+            finally:
+                # Not atomic, but it only fails if the lock expires right
+                # between both calls.
+                if cache.get(lock_key) == token:
+                    cache.delete(lock_key)
+
         return inner
 
     return outer
@@ -54,21 +172,20 @@ def five_top_rated_profiles():
     Invalidation
     ------------
     This query depends on two factors: rating and points. Rating is
-    calculated adding up ratings from the RatingChange table. Points
-    changes whenever a problem is solved.
-
-    The tricky part is that the amount of points is calculated in the
-    database using a Stored Procedure. So we don't have a clear way to
-    detect that change.
+    the sum of the RatingChange table, stored in the profile when a
+    contest is rated/unrated. Points changes whenever a problem is
+    solved.
 
-    Our best effort as invalidation strategy is:
+    The amount of points is updated in the background by the
+    `update_points` command, after the submission changed. The
+    invalidation strategy is:
     - Invalidate when a contest is modified/removed, this is because
     once RatingChange are created/removed, the rated field of the
     corresponding contest changes. This way, we can detect that
     RatingChange objects were created/deleted.
 
-    - Invalidate when a submission is modified/removed to detect points
-    changes.
+    - Invalidate when a submission is modified/removed, and again when
+    `apply_pending_points_updates` changes points (see api/lib/points.py).
     """
     users = UserProfile.sorted_by_ratings().select_related("user")[:5]
     return list(users)
@@ -151,7 +268,50 @@ def calculate_standing(
         return get_normal_standing(contest.id, group)
 
 
+# In-process incremental standings, see mog/standing_store.py. Most
+# recently used stores are kept at the end of the dictionary.
+_standing_stores = OrderedDict()
+_standing_stores_lock = threading.Lock()
+
+
+class StandingStoreEntry(object):
+    """A store of `_standing_stores` with the lock serializing its updates"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.store = None
+        self.created_at = None
+
+
+def get_standing_store(contest, group):
+    """
+    Return an up to date StandingStore for (contest, group). Stores are
+    rebuilt from scratch every STANDING_STORE_TIMEOUT seconds to pick up
+    changes that are not submissions (problems, participants, names).
+    Stores stay in the map while they are refreshed, concurrent requests
+    wait for the refresh instead of building another store.
+    """
+    key = (contest.id, group)
+    with _standing_stores_lock:
+        entry = _standing_stores.get(key)
+        if entry is None:
+            entry = _standing_stores[key] = StandingStoreEntry()
+        _standing_stores.move_to_end(key)
+        while len(_standing_stores) > constants.STANDING_STORES_LIMIT:
+            _standing_stores.popitem(last=False)
+    with entry.lock:
+        if (
+            entry.store is not None
+            and time.monotonic() - entry.created_at <= constants.STANDING_STORE_TIMEOUT
+        ):
+            entry.store.refresh()
+            if not entry.store.stale:
+                return entry.store
+        entry.store, entry.created_at = StandingStore(contest, group), time.monotonic()
+        return entry.store
+
+
 @cache_result(key=constants.CACHE_KEY_STANDING, timeout=constants.STANDING_TIMEOUT)
 def get_normal_standing(contest_id, group):
     contest = Contest.objects.get(pk=contest_id)
-    return calculate_standing_new(contest, False, None, group, False)
+    return get_standing_store(contest, group).standing()
@@ -0,0 +1,81 @@
+"""
+In-process registry of `Result` rows.
+
+Results (Accepted, Wrong Answer, Pending, ...) are effectively static,
+but they are looked up by name on every state transition of every
+submission. This registry keeps them in memory, indexed by normalized
+name and by id, so those lookups don't hit the database.
+
+Invalidation
+------------
+The registry is cleared whenever a `Result` is saved or deleted (see
+api/signals/cache.py). Since those signals only reach the process that
+made the change, the registry is also reloaded every
+`constants.RESULTS_TIMEOUT` seconds and on any cache miss.
+"""
+
+import threading
+import time
+
+from api.lib import constants
+from api.models import Result
+
+
+_lock = threading.Lock()
+_results_by_name = {}
+_results_by_id = {}
+_loaded_at = None
+
+
+def normalize_name(name):
+    return name.strip().lower()
+
+
+def load_results():
+    """(Re)load every result from the database"""
+    global _results_by_name, _results_by_id, _loaded_at
+    with _lock:
+        results = list(Result.objects.all())
+        _results_by_name = {normalize_name(result.name): result for result in results}
+        _results_by_id = {result.id: result for result in results}
+        _loaded_at = time.monotonic()
+
+
+def clear_results():
+    global _loaded_at
+    with _lock:
+        _loaded_at = None
+
+
+def _ensure_loaded(force=False):
+    loaded_at = _loaded_at
+    if (
+        force
+        or loaded_at is None
+        or time.monotonic() - loaded_at > constants.RESULTS_TIMEOUT
+    ):
+        load_results()
+
+
+def _lookup(registry_getter, key):
+    _ensure_loaded()
+    result = registry_getter().get(key)
+    if result is None:
+        # Maybe it was created after we loaded the registry.
+        _ensure_loaded(force=True)
+        result = registry_getter().get(key)
+    if result is None:
+        raise Result.DoesNotExist("Result matching %r does not exist." % key)
+    return result
+
+
+def get_result(name):
+    """Same as Result.objects.get(name__iexact=name) but cached"""
+    return _lookup(lambda: _results_by_name, normalize_name(name))
+
+
+def get_result_by_id(pk):
+    """Same as Result.objects.get(pk=pk) but cached"""
+    if pk is None:
+        raise Result.DoesNotExist("Result matching None does not exist.")
+    return _lookup(lambda: _results_by_id, int(pk))
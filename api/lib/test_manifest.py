@@ -0,0 +1,142 @@
+"""
+Manifest of the test data of a problem.
+
+The inputs and outputs of a problem live in `PROBLEMS_FOLDER/<id>/`, a
+folder shared between the web server and the graders that might be
+slow to list and read. The manifest (`manifest.json` in the same
+folder) lists every test file with its size, SHA-256 and modification
+time, plus a digest of all of them, so graders don't need to list the
+folders on every submission and can tell when test data changed.
+
+Invalidation
+------------
+`mog.samples` removes the manifest whenever it adds, replaces or removes
+test files. Test files are written with a rename, so any change also
+updates the modification time of its folder, which is stored in the
+manifest: a manifest built from older folders is rebuilt on use.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+TEST_FOLDERS = ["inputs", "outputs"]
+
+_lock = threading.Lock()
+# problem id -> (stat key, manifest) of the manifests read by this process
+_manifests = {}
+
+
+def get_problem_folder(problem_id):
+    return os.path.join(settings.PROBLEMS_FOLDER, str(problem_id))
+
+
+def get_manifest_path(problem_id):
+    return os.path.join(get_problem_folder(problem_id), MANIFEST_NAME)
+
+
+def get_folder_mtimes(problem_id):
+    """Modification time of every test folder, None if some is missing"""
+    mtimes = {}
+    for folder in TEST_FOLDERS:
+        path = os.path.join(get_problem_folder(problem_id), folder)
+        if not os.path.isdir(path):
+            return None
+        mtimes[folder] = os.stat(path).st_mtime_ns
+    return mtimes
+
+
+def hash_file(path):
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def build_manifest(problem_id):
+    """
+    Build and store the manifest of a problem. Return None if the test
+    folders don't exist.
+    """
+    mtimes = get_folder_mtimes(problem_id)
+    if mtimes is None:
+        return None
+    manifest = {"version": MANIFEST_VERSION, "folders": mtimes}
+    digest = hashlib.sha256()
+    for folder in TEST_FOLDERS:
+        path = os.path.join(get_problem_folder(problem_id), folder)
+        files = []
+        # Dot files are temporary files of uploads in progress
+        for name in sorted(n for n in os.listdir(path) if not n.startswith(".")):
+            stat = os.stat(os.path.join(path, name))
+            files.append(
+                {
+                    "name": name,
+                    "size": stat.st_size,
+                    "sha256": hash_file(os.path.join(path, name)),
+                    "mtime": stat.st_mtime,
+                }
+            )
+            digest.update(("%s/%s:%s\n" % (folder, name, files[-1]["sha256"])).encode())
+        manifest[folder] = files
+    manifest["digest"] = digest.hexdigest()
+
+    # Don't store a manifest of folders that changed while reading them
+    if get_folder_mtimes(problem_id) == mtimes:
+        fd, tmp = tempfile.mkstemp(
+            prefix=".manifest-", dir=get_problem_folder(problem_id)
+        )
+        with os.fdopen(fd, "w") as f:
+            json.dump(manifest, f)
+        os.rename(tmp, get_manifest_path(problem_id))
+    return manifest
+
+
+def read_manifest(problem_id):
+    try:
+        with open(get_manifest_path(problem_id)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def get_manifest(problem_id):
+    """
+    Return the manifest of a problem, building it when missing or stale,
+    or None if the test folders don't exist.
+    """
+    mtimes = get_folder_mtimes(problem_id)
+    if mtimes is None:
+        return None
+    try:
+        stat = os.stat(get_manifest_path(problem_id))
+        key = (stat.st_ino, stat.st_mtime_ns, tuple(sorted(mtimes.items())))
+    except OSError:
+        key = None
+    with _lock:
+        cached = _manifests.get(problem_id)
+    if key is not None and cached is not None and cached[0] == key:
+        return cached[1]
+    manifest = read_manifest(problem_id) if key is not None else None
+    if manifest is None or manifest["folders"] != mtimes:
+        return build_manifest(problem_id)
+    with _lock:
+        _manifests[problem_id] = (key, manifest)
+    return manifest
+
+
+def invalidate_manifest(problem_id):
+    try:
+        os.remove(get_manifest_path(problem_id))
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,152 @@
+"""
+Per-test results of submissions.
+
+The grader stores the outcome of every test case it ran as a
+`SubmissionTestResult` (besides the human readable `judgement_details`),
+so per-test analysis doesn't need to parse the details of submissions:
+
++ `get_test_stats`: runs, failures and times per test of a problem,
+  useful to calibrate time limits and to spot slow tests.
++ `get_failing_tests`: where (and with which verdict) submissions fail,
+  tests no submission fails on might be weak.
+
+Submissions graded before the table existed can be loaded from their
+details with `backfill_test_results` (see the command of the same name).
+"""
+
+import re
+
+from django.db.models import Avg, Count, Max, Q
+
+from api.lib.results import get_result, get_result_by_id
+from api.models import Submission, SubmissionTestResult
+
+# Line written by the grader for every test case in `judgement_details`
+JUDGEMENT_DETAILS_RE = re.compile(
+    r"^Case#(\d+) \[(\d+) bytes\]\[(\d+) ms\]: ", re.MULTILINE
+)
+
+# Verdicts given to a submission by a test case (the last one it ran)
+TEST_VERDICTS = [
+    "wrong answer",
+    "time limit exceeded",
+    "memory limit exceeded",
+    "runtime error",
+    "idleness limit exceeded",
+    "internal error",
+]
+
+
+def get_test_results(problem, language=None):
+    queryset = SubmissionTestResult.objects.filter(submission__problem=problem)
+    if language:
+        queryset = queryset.filter(submission__compiler__language__iexact=language)
+    return queryset
+
+
+def get_test_stats(problem, language=None):
+    """
+    Return, for every test of `problem` (ordered by test number), a dict
+    with the number of runs and failures, the average and maximum
+    execution time (ms), the maximum execution time among accepted
+    submissions and the maximum memory used (bytes). Only submissions
+    using compilers of `language` are considered if given.
+    """
+    accepted = get_result("accepted")
+    return list(
+        get_test_results(problem, language)
+        .values("test_number")
+        .annotate(
+            runs=Count("id"),
+            failures=Count("id", filter=~Q(result=accepted)),
+            avg_time=Avg("execution_time"),
+            max_time=Max("execution_time"),
+            max_accepted_time=Max(
+                "execution_time", filter=Q(submission__result=accepted)
+            ),
+            max_memory=Max("memory_used"),
+        )
+        .order_by("test_number")
+    )
+
+
+def get_failing_tests(problem, language=None):
+    """
+    Return {test number: {result name: submissions}} with the number of
+    gradings that failed on every test (grading stops at the first
+    failed test) by verdict.
+    """
+    failing = {}
+    for test_number, result_id, submissions in (
+        get_test_results(problem, language)
+        .exclude(result=get_result("accepted"))
+        .values_list("test_number", "result")
+        .annotate(Count("id"))
+        .order_by("test_number")
+    ):
+        result_name = get_result_by_id(result_id).name
+        failing.setdefault(test_number, {})[result_name] = submissions
+    return failing
+
+
+def parse_judgement_details(details):
+    """Return the (test number, memory, time) of every test in the details"""
+    return [
+        (int(test_number), int(memory), int(time))
+        for test_number, memory, time in JUDGEMENT_DETAILS_RE.findall(details or "")
+    ]
+
+
+def build_test_results_from_details(submission_id, result_id, details):
+    """
+    Test results of a submission graded before test results were stored.
+    Every test is accepted but the last one, which gets the verdict of
+    the submission when it comes from a test case.
+    """
+    tests = parse_judgement_details(details)
+    accepted = get_result("accepted")
+    result = get_result_by_id(result_id)
+    last_result = accepted
+    if result.name.lower() in TEST_VERDICTS:
+        last_result = result
+    return [
+        SubmissionTestResult(
+            submission_id=submission_id,
+            test_number=test_number,
+            result=last_result if k == len(tests) - 1 else accepted,
+            execution_time=time,
+            memory_used=memory,
+        )
+        for k, (test_number, memory, time) in enumerate(tests)
+    ]
+
+
+def backfill_test_results(last_id, batch_size):
+    """
+    Store the test results of the next `batch_size` submissions with id
+    greater than `last_id` that have none. Return the id of the last
+    submission seen (None when there are no more submissions) and the
+    number of test results created.
+    """
+    submissions = list(
+        Submission.objects.filter(id__gt=last_id)
+        .order_by("id")
+        .values_list("id", "result_id", "judgement_details")[:batch_size]
+    )
+    if not submissions:
+        return None, 0
+    with_results = set(
+        SubmissionTestResult.objects.filter(
+            submission_id__in=[submission_id for submission_id, _, _ in submissions]
+        )
+        .values_list("submission_id", flat=True)
+        .distinct()
+    )
+    test_results = []
+    for submission_id, result_id, details in submissions:
+        if submission_id not in with_results:
+            test_results.extend(
+                build_test_results_from_details(submission_id, result_id, details)
+            )
+    SubmissionTestResult.objects.bulk_create(test_results)
+    return submissions[-1][0], len(test_results)
@@ -1,9 +1,36 @@
+import functools
+import hashlib
+import logging as log
 import os
 import shutil
 from django.conf import settings
 
+from . import __comparators as comparators
+from . import __disk_cache as disk_cache
 from .__utils import get_exitcode_stdout_stderr
 
+TESTLIB_H_COMPILE_COMMAND = "g++ checker.cpp -o checker.exe"
+TESTLIB4J_JAR_COMPILE_COMMAND = "javac -classpath testlib4j.jar Check.java"
+# Compiler -> command printing its version
+COMPILER_VERSION_COMMANDS = {"g++": "g++ --version", "javac": "javac -version"}
+
+
+def get_testlib_h_command(cwd):
+    return '"{0}" "%s" "%s" "%s"'.format(os.path.join(cwd, "checker.exe"))
+
+
+def get_testlib4j_jar_command(cwd):
+    return 'java -cp "{0}";"{1}" ru.ifmo.testlib.CheckerFramework Check "%s" "%s" "%s"'.format(
+        cwd, os.path.join(cwd, "testlib4j.jar")
+    )
+
+
+def copy_testlib4j_jar(cwd):
+    shutil.copyfile(
+        os.path.join(settings.RESOURCES_FOLDER, "testlib4j.jar"),
+        os.path.join(cwd, "testlib4j.jar"),
+    )
+
 
 def compile_checker_testlib_h(checker, cwd):
     shutil.copyfile(
@@ -13,40 +40,136 @@ def compile_checker_testlib_h(checker, cwd):
     with open(os.path.join(cwd, "checker.cpp"), "wb") as f:
         f.write(checker.source.encode("utf8"))
     try:
-        _, _, _ = get_exitcode_stdout_stderr("g++ checker.cpp -o checker.exe", cwd=cwd)
+        _, _, _ = get_exitcode_stdout_stderr(TESTLIB_H_COMPILE_COMMAND, cwd=cwd)
         if os.path.exists(os.path.join(cwd, "checker.exe")):
-            cmd = '"{0}" "%s" "%s" "%s"'.format(os.path.join(cwd, "checker.exe"))
-            return cmd
+            return get_testlib_h_command(cwd)
     except:
         pass
 
 
 def compile_checker_testlib4j_jar(checker, cwd):
-    shutil.copyfile(
-        os.path.join(settings.RESOURCES_FOLDER, "testlib4j.jar"),
-        os.path.join(cwd, "testlib4j.jar"),
-    )
+    copy_testlib4j_jar(cwd)
     with open(os.path.join(cwd, "Check.java"), "wb") as f:
         f.write(checker.source.encode("utf8"))
     try:
-        _, _, _ = get_exitcode_stdout_stderr(
-            "javac -classpath testlib4j.jar Check.java", cwd=cwd
-        )
+        _, _, _ = get_exitcode_stdout_stderr(TESTLIB4J_JAR_COMPILE_COMMAND, cwd=cwd)
         if os.path.exists(os.path.join(cwd, "Check.class")):
-            cmd = 'java -cp "{0}";"{1}" ru.ifmo.testlib.CheckerFramework Check "%s" "%s" "%s"'.format(
-                cwd, os.path.join(cwd, "testlib4j.jar")
-            )
-            return cmd
+            return get_testlib4j_jar_command(cwd)
     except:
         pass
 
 
+def get_compile_command(checker):
+    if checker.backend == "testlib4j.jar":
+        return TESTLIB4J_JAR_COMPILE_COMMAND
+    return TESTLIB_H_COMPILE_COMMAND
+
+
+@functools.lru_cache()
+def get_compiler_version(compiler):
+    """Version of a compiler (empty if it can't be run), read once"""
+    try:
+        _, stdout, stderr = get_exitcode_stdout_stderr(
+            COMPILER_VERSION_COMMANDS[compiler], cwd=None
+        )
+    except OSError:
+        return ""
+    return stdout + stderr
+
+
+@functools.lru_cache()
+def hash_resource(path, mtime, size):
+    """SHA-256 of a resource file, read again when it changes"""
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def get_checker_cache_key(checker):
+    """
+    Compiled checkers are cached by (checker id, source hash, backend).
+    The hash also covers the testlib resource of the backend and the
+    compiler command and version, so editing the source, changing the
+    backend or upgrading testlib or the compiler never hits a stale
+    binary.
+    """
+    command = get_compile_command(checker)
+    resource = os.path.join(settings.RESOURCES_FOLDER, checker.backend)
+    try:
+        stat = os.stat(resource)
+        resource_hash = hash_resource(resource, stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        resource_hash = ""
+    sha256 = hashlib.sha256(checker.source.encode("utf8"))
+    for part in [resource_hash, command, get_compiler_version(command.split()[0])]:
+        sha256.update(b"\0" + part.encode("utf8"))
+    backend = "".join(c if c.isalnum() else "_" for c in checker.backend)
+    return "%d-%s-%s" % (checker.id, sha256.hexdigest(), backend)
+
+
+def get_checker_artifacts(checker, cwd):
+    """Name of the files produced by compiling the checker"""
+    if checker.backend == "testlib4j.jar":
+        return [
+            name
+            for name in os.listdir(cwd)
+            if name == "Check.class"
+            or (name.startswith("Check$") and name.endswith(".class"))
+        ]
+    return ["checker.exe"]
+
+
+def restore_cached_checker(checker, cwd):
+    """
+    Copy a previously compiled checker into `cwd` and return the command
+    to run it, or None if the checker is not cached.
+    """
+    key = get_checker_cache_key(checker)
+    try:
+        if not disk_cache.restore(settings.CHECKERS_CACHE_FOLDER, key, cwd):
+            return None
+        if checker.backend == "testlib4j.jar":
+            copy_testlib4j_jar(cwd)
+            return get_testlib4j_jar_command(cwd)
+        return get_testlib_h_command(cwd)
+    except OSError as e:
+        log.warning("Could not restore checker %s from cache: %s", key, str(e))
+        return None
+
+
+def cache_compiled_checker(checker, cwd):
+    key = get_checker_cache_key(checker)
+    try:
+        artifacts = get_checker_artifacts(checker, cwd)
+        if disk_cache.store(settings.CHECKERS_CACHE_FOLDER, key, cwd, artifacts):
+            disk_cache.evict(
+                settings.CHECKERS_CACHE_FOLDER,
+                settings.CHECKERS_CACHE_SIZE * 1024 * 1024,
+            )
+    except OSError as e:
+        log.warning("Could not store checker %s in cache: %s", key, str(e))
+
+
 def compile_checker(checker, cwd):
     """
     Compiles the corresponding checker and return the command to
-    test input/output/answer for every test case.
+    test input/output/answer for every test case. Compiled checkers
+    are taken from (and stored in) the checkers cache. Built-in
+    checkers need no compilation, a function `(output file, answer
+    file) -> (ok, comment)` is returned instead of the command.
     """
+    if checker.backend in comparators.COMPARATORS:
+        return functools.partial(comparators.check, checker.backend)
+    cmd = restore_cached_checker(checker, cwd)
+    if cmd:
+        log.debug("Checker %s restored from cache", str(checker))
+        return cmd
     if checker.backend == "testlib4j.jar":
-        return compile_checker_testlib4j_jar(checker, cwd)
+        cmd = compile_checker_testlib4j_jar(checker, cwd)
     else:
-        return compile_checker_testlib_h(checker, cwd)
+        cmd = compile_checker_testlib_h(checker, cwd)
+    if cmd:
+        cache_compiled_checker(checker, cwd)
+    return cmd
@@ -0,0 +1,260 @@
+"""
+Built-in checkers, comparing the output of a submission with the answer
+inside the grader instead of running a compiled checker (one process per
+test case). They behave like the testlib checkers of the same name:
+
++ fcmp: lines must be equal.
++ lcmp: lines must have the same tokens.
++ wcmp: outputs must have the same tokens.
++ rcmp4, rcmp6, rcmp9: outputs must have the same numbers, with absolute
+  or relative error at most 1e-4, 1e-6 and 1e-9 respectively.
+
+Files are read in chunks, so big outputs are never loaded at once.
+"""
+
+import math
+import os
+import re
+
+CHUNK_SIZE = 1 << 16
+
+BLANKS = b" \t\r\n"
+TOKEN_RE = re.compile(rb"[^ \t\r\n]+|\n")
+BLANK_RE = re.compile(rb"[ \t\r\n]")
+NEWLINE = b"\n"
+
+
+def english_ending(n):
+    if n % 100 // 10 == 1:
+        return "th"
+    return {1: "st", 2: "nd", 3: "rd"}.get(n % 10, "th")
+
+
+def compress(token):
+    """Shorten long tokens for comments, like testlib does"""
+    s = token.decode("utf8", errors="replace")
+    if len(s) <= 64:
+        return s
+    return s[:30] + "..." + s[-31:]
+
+
+def read_chunks(f):
+    """Chunks of `f` without carriage returns nor line breaks at the end"""
+    newlines = 0
+    for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+        chunk = chunk.replace(b"\r", b"")
+        stripped = chunk.rstrip(NEWLINE)
+        if stripped:
+            yield NEWLINE * newlines + stripped
+            newlines = 0
+        newlines += len(chunk) - len(stripped)
+
+
+def read_tokens(f, lines=False):
+    """
+    Tokens of `f` (separated by blanks). With `lines`, every line break
+    followed by a token is yielded as `NEWLINE`.
+    """
+    # Pieces of the last token, which might continue in the next chunks.
+    # Every chunk is scanned once, so long tokens take linear time.
+    partial, newlines = [], 0
+    for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+        if partial:
+            match = BLANK_RE.search(chunk)
+            if match is None:
+                partial.append(chunk)
+                continue
+            partial.append(chunk[: match.start()])
+            chunk = chunk[match.start() :]
+            if lines:
+                yield from [NEWLINE] * newlines
+            newlines = 0
+            yield b"".join(partial)
+            partial = []
+        tokens = TOKEN_RE.findall(chunk)
+        if tokens and chunk[-1] not in BLANKS:
+            partial.append(tokens.pop())
+        for token in tokens:
+            if token == NEWLINE:
+                newlines += 1
+                continue
+            if lines:
+                yield from [NEWLINE] * newlines
+            newlines = 0
+            yield token
+    if partial:
+        if lines:
+            yield from [NEWLINE] * newlines
+        yield b"".join(partial)
+
+
+def fcmp(output, answer):
+    outputs, answers = read_chunks(output), read_chunks(answer)
+    found = expected = b""
+    line = 1
+    while True:
+        found = found or next(outputs, b"")
+        expected = expected or next(answers, b"")
+        if not found or not expected:
+            break
+        n = min(len(found), len(expected))
+        if found[:n] != expected[:n]:
+            n = len(os.path.commonprefix([found[:n], expected[:n]]))
+            line += found[:n].count(NEWLINE)
+            return False, "%d%s lines differ" % (line, english_ending(line))
+        line += found[:n].count(NEWLINE)
+        found, expected = found[n:], expected[n:]
+    if found:
+        return False, "Participant output contains extra data"
+    if expected:
+        return False, "Unexpected EOF in the participant output"
+    return True, "%d lines" % line
+
+
+def compare_tokens(output, answer, compare, lines=False):
+    """
+    Compare the tokens of the output and the answer one by one with
+    `compare(n, expected, found)`, which returns the comment when they
+    differ.
+    """
+    outputs, answers = read_tokens(output, lines), read_tokens(answer, lines)
+    n = 0
+    for expected in answers:
+        found = next(outputs, None)
+        if found is None:
+            length = n + 1 + sum(1 for _ in answers)
+            return False, (
+                "Answer contains longer sequence [length = %d], "
+                "but output contains %d elements" % (length, n)
+            )
+        n += 1
+        comment = compare(n, expected, found)
+        if comment:
+            return False, comment
+    extra = sum(1 for _ in outputs)
+    if extra:
+        return False, (
+            "Output contains longer sequence [length = %d], "
+            "but answer contains %d elements" % (n + extra, n)
+        )
+    return True, "%d tokens" % n
+
+
+def wcmp(output, answer):
+    def compare(n, expected, found):
+        if expected != found:
+            return "%d%s words differ - expected: '%s', found: '%s'" % (
+                n,
+                english_ending(n),
+                compress(expected),
+                compress(found),
+            )
+
+    return compare_tokens(output, answer, compare)
+
+
+def lcmp(output, answer):
+    line = 1
+
+    def compare(n, expected, found):
+        nonlocal line
+        if expected != found:
+            return "%d%s lines differ - expected: '%s', found: '%s'" % (
+                line,
+                english_ending(line),
+                "end of line" if expected == NEWLINE else compress(expected),
+                "end of line" if found == NEWLINE else compress(found),
+            )
+        if expected == NEWLINE:
+            line += 1
+
+    ok, comment = compare_tokens(output, answer, compare, lines=True)
+    return ok, "%d lines" % line if ok else comment
+
+
+def parse_double(token):
+    if b"_" in token:
+        return None
+    try:
+        return float(token)
+    except ValueError:
+        return None
+
+
+def double_compare(expected, result, eps):
+    """Same as `doubleCompare` of testlib"""
+    if math.isnan(expected):
+        return math.isnan(result)
+    if math.isinf(expected):
+        return result == expected
+    if math.isnan(result) or math.isinf(result):
+        return False
+    if abs(result - expected) <= eps + 1e-15:
+        return True
+    low = min(expected * (1.0 - eps), expected * (1.0 + eps))
+    high = max(expected * (1.0 - eps), expected * (1.0 + eps))
+    return low <= result + 1e-15 and result <= high + 1e-15
+
+
+def double_delta(expected, result):
+    absolute = abs(result - expected)
+    if abs(expected) > 1e-9:
+        return min(absolute, abs(absolute / expected))
+    return absolute
+
+
+def get_rcmp(digits):
+    eps = 10.0**-digits
+
+    def rcmp(output, answer):
+        def compare(n, expected, found):
+            expected_value, found_value = parse_double(expected), parse_double(found)
+            if expected_value is None:
+                return 'expected double in the answer, but "%s" found' % compress(
+                    expected
+                )
+            if found_value is None:
+                return 'expected double, but "%s" found' % compress(found)
+            if not double_compare(expected_value, found_value, eps):
+                return (
+                    "%d%s numbers differ - expected: '%.*f', found: '%.*f', error = '%.*f'"
+                    % (
+                        n,
+                        english_ending(n),
+                        digits,
+                        expected_value,
+                        digits,
+                        found_value,
+                        digits,
+                        double_delta(expected_value, found_value),
+                    )
+                )
+
+        ok, comment = compare_tokens(output, answer, compare)
+        return ok, comment.replace("tokens", "numbers") if ok else comment
+
+    return rcmp
+
+
+# Checker backend -> comparator
+COMPARATORS = {
+    "builtin-fcmp": fcmp,
+    "builtin-lcmp": lcmp,
+    "builtin-wcmp": wcmp,
+    "builtin-rcmp4": get_rcmp(4),
+    "builtin-rcmp6": get_rcmp(6),
+    "builtin-rcmp9": get_rcmp(9),
+}
+
+
+def check(backend, output_file, answer_file):
+    """
+    Compare the output of a submission with the answer using the built-in
+    checker `backend`. Returns whether they match and a comment.
+    """
+    try:
+        output = open(output_file, "rb")
+    except FileNotFoundError:
+        return False, "Output file not found"
+    with output, open(answer_file, "rb") as answer:
+        return COMPARATORS[backend](output, answer)
@@ -0,0 +1,118 @@
+"""
+Tiny on-disk cache shared by every grader running in the same host.
+
+Each entry is a folder named after its key inside `root`. Entries are
+populated in a temporary folder and then renamed into place, so readers
+never see half-written entries and concurrent graders racing to store
+the same key are harmless (the loser simply discards its copy). The
+modification time of an entry is bumped on every hit and used to evict
+the least recently used entries once the cache grows above its limit.
+"""
+
+import logging as log
+import os
+import shutil
+import tempfile
+import time
+
+
+def get_entry_folder(root, key):
+    return os.path.join(root, key)
+
+
+def restore(root, key, dst):
+    """
+    Copy every file of the entry `key` into the folder `dst`. Returns
+    False when the entry is not in the cache.
+    """
+    entry = get_entry_folder(root, key)
+    try:
+        names = os.listdir(entry)
+        for name in names:
+            shutil.copy2(os.path.join(entry, name), os.path.join(dst, name))
+        os.utime(entry)
+    except FileNotFoundError:
+        # Missing or evicted by another grader while we were copying.
+        return False
+    return True
+
+
+def lookup(root, key):
+    """
+    Return the folder of the entry `key` (marking it as recently used)
+    or None when it is not in the cache.
+    """
+    entry = get_entry_folder(root, key)
+    try:
+        os.utime(entry)
+    except FileNotFoundError:
+        return None
+    return entry
+
+
+def store(root, key, src, names):
+    """
+    Store the files `names` from the folder `src` as the entry `key`.
+    Returns True if this call populated the entry.
+    """
+    return store_files(root, key, [(os.path.join(src, name), name) for name in names])
+
+
+def store_files(root, key, files):
+    """
+    Store the files given as (source path, path inside the entry) as the
+    entry `key`. Returns True if this call populated the entry.
+    """
+    os.makedirs(root, exist_ok=True)
+    entry = get_entry_folder(root, key)
+    if os.path.exists(entry):
+        return False
+    tmp = tempfile.mkdtemp(prefix=".tmp-", dir=root)
+    try:
+        for src, name in files:
+            dst = os.path.join(tmp, name)
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            shutil.copy2(src, dst)
+        os.rename(tmp, entry)
+    except OSError:
+        # Another grader stored the same entry first (or we ran out of
+        # space).
+        shutil.rmtree(tmp, ignore_errors=True)
+        return False
+    return True
+
+
+def get_folder_size(folder):
+    size = 0
+    for dirpath, _, filenames in os.walk(folder):
+        for name in filenames:
+            try:
+                size += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+    return size
+
+
+def evict(root, max_bytes, min_age=0):
+    """
+    Remove least recently used entries until `root` fits in `max_bytes`.
+    Entries used in the last `min_age` seconds (that might be in use by
+    another grader) are kept even if the cache doesn't fit.
+    """
+    entries = []
+    for name in os.listdir(root):
+        if name.startswith(".tmp-"):
+            continue
+        folder = os.path.join(root, name)
+        try:
+            entries.append((os.path.getmtime(folder), get_folder_size(folder), folder))
+        except OSError:
+            pass
+    total = sum(size for _, size, _ in entries)
+    now = time.time()
+    for mtime, size, folder in sorted(entries):
+        if total <= max_bytes or mtime > now - min_age:
+            break
+        log.debug("Evicting cache entry %s (%d bytes)", folder, size)
+        shutil.rmtree(folder, ignore_errors=True)
+        total -= size
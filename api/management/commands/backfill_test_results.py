@@ -0,0 +1,38 @@
+"""
+Store the per-test results of submissions graded before they were
+stored, parsing their judgement details (see api/lib/test_results.py).
+It can be interrupted and resumed with `--from-id`.
+"""
+
+from django.core.management import BaseCommand
+
+from api.lib.results import load_results
+from api.lib.test_results import backfill_test_results
+
+
+class Command(BaseCommand):
+    help = "Load test results from the judgement details of old submissions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--from-id",
+            type=int,
+            default=0,
+            help="Only submissions with a greater id are processed",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of submissions processed at once",
+        )
+
+    def handle(self, *args, **options):
+        load_results()
+        last_id, total = options["from_id"], 0
+        while True:
+            last_id, created = backfill_test_results(last_id, options["batch_size"])
+            if last_id is None:
+                break
+            total += created
+            print("Submissions up to #{}: {} test results".format(last_id, total))
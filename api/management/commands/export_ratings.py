@@ -12,7 +12,7 @@ class Command(BaseCommand):
         parser.add_argument("--dry_run", type=str, default="yes")
 
     def handle(self, *args, **options):
-        users = [user for user in UserProfile.sorted_by_ratings() if user.has_rating]
+        users = UserProfile.sorted_by_ratings().filter(rated_contests__gt=0)
 
         file = open("ratings.csv", "w", encoding="utf-8")
         file.write("sep=,\r\n")
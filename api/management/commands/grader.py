@@ -3,36 +3,80 @@
 import json
 import logging as log
 from math import ceil
+import multiprocessing
 import os
 import re
 import shutil
+import signal
 import stat
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 
 from django.conf import settings
 from django.core.management import BaseCommand, CommandError
-from django.db import DatabaseError, transaction, close_old_connections
-
-from api.models import Submission, Result, Compiler
+from django.db.models import Count
+from django.utils import timezone
+from prometheus_client import start_http_server
+from prometheus_client.core import GaugeMetricFamily
+from django.db import (
+    DatabaseError,
+    connection,
+    connections,
+    transaction,
+    close_old_connections,
+)
+
+from api.lib import metrics
+from api.lib.dispatch import notify_pending_submission, wait_for_pending_submission
+from api.lib.results import get_result, load_results
+from api.lib.test_manifest import TEST_FOLDERS, get_manifest, get_problem_folder
+from api.models import Submission, SubmissionTestResult, Compiler
+from . import __disk_cache as disk_cache
 from .__utils import compress_output_lines, get_exitcode_stdout_stderr
 
 
+# Results of the submissions waiting for or being graded
+GRADING_RESULTS = ["Pending", "Compiling", "Running"]
+
+# Staged tests used in the last seconds are never evicted, other graders
+# might be running them.
+TESTS_CACHE_MIN_AGE = 600
+
 # https://github.com/MatcomOnlineGrader/safeexec/blob/22cd436f2d384d2a933428c5f5f8240c406f08db/safeexec.c#L38C20-L38C27
 LARGECONST = 4194304  # 4GiB
 
 
+def get_language(submission):
+    return submission.compiler.language.lower()
+
+
 def update_submission(
-    submission, execution_time, memory_used, result_name, judgement_details
+    submission,
+    execution_time,
+    memory_used,
+    result_name,
+    judgement_details,
+    test_results=(),
 ):
+    """
+    Store the final verdict of a submission, replacing the results of its
+    previous grading (if any) with `test_results`.
+    """
     submission.execution_time = execution_time
     submission.memory_used = memory_used
-    submission.result = Result.objects.get(name__iexact=result_name)
+    submission.result = get_result(result_name)
     submission.judgement_details = judgement_details
-    submission.save()
+    with transaction.atomic():
+        submission.save()
+        SubmissionTestResult.objects.filter(submission=submission).delete()
+        SubmissionTestResult.objects.bulk_create(test_results)
+    metrics.GRADER_VERDICTS.labels(result_name, get_language(submission)).inc()
 
 
-def set_internal_error(submission, judgement_details=None):
+def set_internal_error(submission, judgement_details=None, cause="unknown"):
+    metrics.GRADER_INTERNAL_ERRORS.labels(cause).inc()
     update_submission(submission, 0, 0, "internal error", judgement_details)
 
 
@@ -61,16 +105,68 @@ def create_submission_folder(submission):
     return submission_folder
 
 
-def check_problem_folder(problem):
-    i_folder = os.path.join(settings.PROBLEMS_FOLDER, str(problem.id), "inputs")
-    o_folder = os.path.join(settings.PROBLEMS_FOLDER, str(problem.id), "outputs")
-    if not os.path.exists(i_folder) or not os.path.isdir(i_folder):
-        return False
-    if not os.path.exists(o_folder) or not os.path.isdir(o_folder):
-        return False
-    if len(os.listdir(i_folder)) != len(os.listdir(o_folder)):
-        return False
-    return True
+def stage_tests(problem_id, manifest):
+    """
+    Copy the test data of a problem to the tests cache (unless it's there
+    already) and return its folder there, or None if the cache is
+    disabled or the tests don't fit in it.
+    """
+    if settings.TESTS_CACHE_SIZE <= 0:
+        return None
+    root = settings.TESTS_CACHE_FOLDER
+    key = "%d-%s" % (problem_id, manifest["digest"][:16])
+    entry = disk_cache.lookup(root, key)
+    if entry:
+        return entry
+    size = sum(f["size"] for folder in TEST_FOLDERS for f in manifest[folder])
+    max_bytes = settings.TESTS_CACHE_SIZE * 1024 * 1024
+    if size > max_bytes:
+        return None
+    # Submissions must not be able to read the tests
+    os.makedirs(root, exist_ok=True)
+    os.chmod(root, 0o700)
+    disk_cache.evict(root, max_bytes - size, TESTS_CACHE_MIN_AGE)
+    problem_folder = get_problem_folder(problem_id)
+    disk_cache.store_files(
+        root,
+        key,
+        [
+            (
+                os.path.join(problem_folder, folder, f["name"]),
+                os.path.join(folder, f["name"]),
+            )
+            for folder in TEST_FOLDERS
+            for f in manifest[folder]
+        ],
+    )
+    return disk_cache.lookup(root, key)
+
+
+def get_problem_tests(problem):
+    """
+    Return the (test number, input file, answer file) of every test of a
+    problem (staged in the tests cache when possible), or None if its
+    test folders are missing or have different number of files.
+    """
+    manifest = get_manifest(problem.id)
+    if manifest is None or len(manifest["inputs"]) != len(manifest["outputs"]):
+        return None
+    try:
+        folder = stage_tests(problem.id, manifest)
+    except OSError as e:
+        log.warning("Could not stage tests of problem %d: %s", problem.id, str(e))
+        folder = None
+    folder = folder or get_problem_folder(problem.id)
+    return [
+        (
+            test_number,
+            os.path.join(folder, "inputs", input_file["name"]),
+            os.path.join(folder, "outputs", answer_file["name"]),
+        )
+        for test_number, (input_file, answer_file) in enumerate(
+            zip(manifest["inputs"], manifest["outputs"]), start=1
+        )
+    ]
 
 
 def compile_checker(checker, cwd):
@@ -83,7 +179,7 @@ def compile_submission(submission):
     log.debug("Compiling submission #%d", submission.id)
     compiler = submission.compiler
 
-    submission.result = Result.objects.get(name__iexact="compiling")
+    submission.result = get_result("compiling")
     submission.save()
 
     submission_folder = os.path.join(settings.SANDBOX_FOLDER, str(submission.id))
@@ -105,12 +201,13 @@ def compile_submission(submission):
 
     try:
         env = json.loads(compiler.env) if compiler.env else None
-        code, out, err = get_exitcode_stdout_stderr(
-            cmd='"%s" %s'
-            % (compiler.path, compiler.arguments.format(src_file, exe_file)),
-            cwd=submission_folder,
-            env=env,
-        )
+        with metrics.observe_phase("compile", get_language(submission)):
+            code, out, err = get_exitcode_stdout_stderr(
+                cmd='"%s" %s'
+                % (compiler.path, compiler.arguments.format(src_file, exe_file)),
+                cwd=submission_folder,
+                env=env,
+            )
 
         if code != 0:
             # Some error ocurred
@@ -134,13 +231,15 @@ def compile_submission(submission):
             submission.id,
             str(e),
         )
-        set_internal_error(submission, "internal error during compilation phase")
+        set_internal_error(
+            submission, "internal error during compilation phase", "compilation"
+        )
     return False
 
 
 def mark_as_running(submission: Submission):
     """Marks a submission as running"""
-    submission.result = Result.objects.get(name__iexact="running")
+    submission.result = get_result("running")
     submission.save()
 
 
@@ -285,7 +384,194 @@ def run_grader(
     return result, ret, out or "", err or ""
 
 
-def grade_submission(submission, number_of_executions):
+def run_checker(checker_command, input_file, answer_file, folder):
+    """
+    Check the output of a test case (`output.txt` inside `folder`) with
+    the command returned by `compile_checker`. Returns a tuple with
+    (exit code, stdout, stderr) of the checker.
+    """
+    if callable(checker_command):
+        # Built-in checker, see __comparators.py
+        ok, comment = checker_command(os.path.join(folder, "output.txt"), answer_file)
+        return (0 if ok else 1), comment, ""
+    return get_exitcode_stdout_stderr(
+        cmd=checker_command % (input_file, "output.txt", answer_file),
+        cwd=folder,
+    )
+
+
+def run_test_case(
+    submission,
+    cmd,
+    checker_command,
+    input_file,
+    answer_file,
+    folder,
+    time_limit,
+    number_of_executions,
+):
+    """
+    Run a single test case (retrying on TLE/ILE up to `number_of_executions`
+    times) inside `folder` and check its output. Returns a tuple with
+    (result, comment, execution_time, consumed_memory).
+    """
+    language = get_language(submission)
+    for execution in range(number_of_executions):
+        if execution > 0:
+            metrics.GRADER_RETRIES.labels(language).inc()
+        # NOTE: Setting result to accepted here is needed in
+        # case we retry after a TLE/ILE judgment. As a follow
+        # up, we need to revisit the logic of this section and
+        # refactor to make it more readable.
+        result = "accepted"
+        with metrics.observe_phase("run", language):
+            data, _, out, err = run_grader(cmd, input_file, folder)
+        invocation_verdict = data["invocation_verdict"]
+        exit_code = data["exit_code"]
+        consumed_memory = data["consumed_memory"]
+        execution_time = data["execution_time"]
+
+        if invocation_verdict in [
+            "TIME_LIMIT_EXCEEDED",
+            "IDLENESS_LIMIT_EXCEEDED",
+        ]:
+            execution_time = time_limit * 1000
+
+        if invocation_verdict != "SUCCESS":
+            comment = result = {
+                "SECURITY_VIOLATION": "runtime error",
+                "MEMORY_LIMIT_EXCEEDED": "memory limit exceeded",
+                "TIME_LIMIT_EXCEEDED": "time limit exceeded",
+                "IDLENESS_LIMIT_EXCEEDED": "idleness limit exceeded",
+                "CRASH": "internal error",
+                "FAIL": "internal error",
+                "RUNTIME_ERROR": "runtime error",
+                "INTERNAL_ERROR": "internal error",
+            }[invocation_verdict]
+            if invocation_verdict in ["CRASH", "FAIL"]:
+                comment = "internal error, executing submission"
+        elif exit_code != 0:
+            result = "runtime error"
+            compressed_error = compress_output_lines(err)
+            comment = ("runtime error\n\n" + compressed_error).strip()
+        else:
+            with metrics.observe_phase("check", language):
+                rc, out, err = run_checker(
+                    checker_command, input_file, answer_file, folder
+                )
+            out = out.strip()
+            err = err.strip()
+            comment = out or err
+            if rc != 0:
+                result = "wrong answer"
+        if result == "internal error":
+            metrics.GRADER_INTERNAL_ERRORS.labels("execution").inc()
+            # Log the raw safeexec stderr (`err`). When safeexec can't
+            # run the submission (e.g. it isn't setuid-root so it fails
+            # to setgid/setuid into the `judge` user) its output isn't
+            # the expected 4-line format, parse_safeexec_output falls
+            # back to FAIL, and we land here. Without `err` this is
+            # silent and impossible to diagnose from the grader output.
+            log.error(
+                "Internal error grading submission #%d on input %s: "
+                "parsed=%s, safeexec stderr=%r",
+                submission.id,
+                input_file,
+                json.dumps(data),
+                err,
+            )
+        if result not in ["time limit exceeded", "idleness limit exceeded"]:
+            break  # abort retry of the test if is not time related
+    return result, comment, execution_time, consumed_memory
+
+
+def create_test_folder(submission_folder, test_number):
+    """
+    Create an isolated folder for a single test case holding a copy of
+    every file in the submission folder (executable, checker, etc).
+    """
+    test_folder = os.path.join(submission_folder, "test-%d" % test_number)
+    if os.path.exists(test_folder):
+        shutil.rmtree(test_folder, onerror=on_remove_error)
+    os.makedirs(test_folder)
+    for name in os.listdir(submission_folder):
+        path = os.path.join(submission_folder, name)
+        if os.path.isfile(path):
+            shutil.copy2(path, os.path.join(test_folder, name))
+    return test_folder
+
+
+def run_tests_serially(tests, run_test):
+    """
+    Run test cases one by one, stopping at the first non-accepted one.
+    Returns a list of (test_number, outcome) where `outcome` is the
+    tuple returned by `run_test_case` or None if it raised.
+    """
+    outcomes = []
+    for test_number, input_file, answer_file in tests:
+        log.debug("Running test cases: in=%s, out=%s", input_file, answer_file)
+        try:
+            outcome = run_test(test_number, input_file, answer_file, False)
+        except Exception as e:
+            log.error("Unexpected error running test case: %s", str(e))
+            outcome = None
+        outcomes.append((test_number, outcome))
+        if outcome is None or outcome[0] != "accepted":
+            break
+    return outcomes
+
+
+def run_tests_in_parallel(tests, run_test, parallel_tests):
+    """
+    Run test cases concurrently using `parallel_tests` workers, each test
+    inside its own sandbox subfolder. Once a non-accepted verdict is known
+    for some test, every outstanding test with a higher number is skipped.
+    Returns the same list as `run_tests_serially` (sorted by test number)
+    so the final verdict matches the serial first-failure semantics.
+    """
+    lock = threading.Lock()
+    first_failure = [float("inf")]
+
+    def worker(test_number, input_file, answer_file):
+        with lock:
+            if test_number > first_failure[0]:
+                return test_number, None, True
+        log.debug("Running test cases: in=%s, out=%s", input_file, answer_file)
+        try:
+            outcome = run_test(test_number, input_file, answer_file, True)
+        except Exception as e:
+            log.error("Unexpected error running test case: %s", str(e))
+            outcome = None
+        if outcome is None or outcome[0] != "accepted":
+            with lock:
+                first_failure[0] = min(first_failure[0], test_number)
+        return test_number, outcome, False
+
+    outcomes = []
+    with ThreadPoolExecutor(max_workers=parallel_tests) as executor:
+        futures = [executor.submit(worker, *test) for test in tests]
+        for future in as_completed(futures):
+            if future.cancelled():
+                continue
+            test_number, outcome, skipped = future.result()
+            if not skipped:
+                outcomes.append((test_number, outcome))
+            if outcome is None or outcome[0] != "accepted":
+                for other in futures:
+                    other.cancel()
+
+    outcomes.sort(key=lambda item: item[0])
+    serial_outcomes = []
+    for test_number, outcome in outcomes:
+        if test_number != len(serial_outcomes) + 1:
+            break
+        serial_outcomes.append((test_number, outcome))
+        if outcome is None or outcome[0] != "accepted":
+            break
+    return serial_outcomes
+
+
+def grade_submission(submission, tests, number_of_executions, parallel_tests=1):
     log.info(f"Grading submission: %d", submission.id)
     mark_as_running(submission)
 
@@ -297,7 +583,8 @@ def grade_submission(submission, number_of_executions):
     submission_folder = get_submission_folder(submission)
 
     # The checker
-    checker_command = compile_checker(checker, submission_folder)
+    with metrics.observe_phase("compile_checker", language):
+        checker_command = compile_checker(checker, submission_folder)
     if not checker_command:
         log.error(
             "Could not compile checker (checker=%s, folder=%s, submission id=%d)",
@@ -305,7 +592,7 @@ def grade_submission(submission, number_of_executions):
             submission_folder,
             submission.id,
         )
-        set_internal_error(submission, "internal error compiling checker")
+        set_internal_error(submission, "internal error compiling checker", "checker")
         return
 
     # The memory limits
@@ -318,98 +605,67 @@ def grade_submission(submission, number_of_executions):
     )
     log.debug("Run cmd: %s", cmd)
 
-    # Input & output folders
-    i_folder = os.path.join(settings.PROBLEMS_FOLDER, str(problem.id), "inputs")
-    o_folder = os.path.join(settings.PROBLEMS_FOLDER, str(problem.id), "outputs")
+    def run_test(test_number, input_file, answer_file, isolated):
+        folder = submission_folder
+        if isolated:
+            folder = create_test_folder(submission_folder, test_number)
+        try:
+            return run_test_case(
+                submission,
+                cmd,
+                checker_command,
+                input_file,
+                answer_file,
+                folder,
+                time_limit,
+                number_of_executions,
+            )
+        finally:
+            if isolated and not settings.DEBUG:
+                shutil.rmtree(folder, onerror=on_remove_error)
 
-    # ... and the files
-    i_files = sorted(os.path.join(i_folder, name) for name in os.listdir(i_folder))
-    o_files = sorted(os.path.join(o_folder, name) for name in os.listdir(o_folder))
+    if parallel_tests > 1 and len(tests) > 1:
+        outcomes = run_tests_in_parallel(tests, run_test, parallel_tests)
+    else:
+        outcomes = run_tests_serially(tests, run_test)
 
-    current_test, number_of_tests = 0, len(i_files)
     maximum_execution_time, maximum_consumed_memory = 0, 0
     judgement_details = ""
     result = "accepted"
+    test_results = []
 
-    for input_file, answer_file in zip(i_files, o_files):
-        log.debug("Running test cases: in=%s, out=%s", input_file, answer_file)
-        try:
-            current_test += 1
-
-            for _ in range(number_of_executions):
-                # NOTE: Setting result to accepted here is needed in
-                # case we retry after a TLE/ILE judgment. As a follow
-                # up, we need to revisit the logic of this section and
-                # refactor to make it more readable.
-                result = "accepted"
-                data, _, out, err = run_grader(cmd, input_file, submission_folder)
-                invocation_verdict = data["invocation_verdict"]
-                exit_code = data["exit_code"]
-                consumed_memory = data["consumed_memory"]
-                execution_time = data["execution_time"]
-
-                if invocation_verdict in [
-                    "TIME_LIMIT_EXCEEDED",
-                    "IDLENESS_LIMIT_EXCEEDED",
-                ]:
-                    execution_time = time_limit * 1000
-
-                if invocation_verdict != "SUCCESS":
-                    comment = result = {
-                        "SECURITY_VIOLATION": "runtime error",
-                        "MEMORY_LIMIT_EXCEEDED": "memory limit exceeded",
-                        "TIME_LIMIT_EXCEEDED": "time limit exceeded",
-                        "IDLENESS_LIMIT_EXCEEDED": "idleness limit exceeded",
-                        "CRASH": "internal error",
-                        "FAIL": "internal error",
-                        "RUNTIME_ERROR": "runtime error",
-                        "INTERNAL_ERROR": "internal error",
-                    }[invocation_verdict]
-                    if invocation_verdict in ["CRASH", "FAIL"]:
-                        comment = "internal error, executing submission"
-                elif exit_code != 0:
-                    result = "runtime error"
-                    compressed_error = compress_output_lines(err)
-                    comment = ("runtime error\n\n" + compressed_error).strip()
-                else:
-                    rc, out, err = get_exitcode_stdout_stderr(
-                        cmd=checker_command % (input_file, "output.txt", answer_file),
-                        cwd=submission_folder,
-                    )
-                    out = out.strip()
-                    err = err.strip()
-                    comment = out or err
-                    if rc != 0:
-                        result = "wrong answer"
-                if result == "internal error":
-                    # Log the raw safeexec stderr (`err`). When safeexec can't
-                    # run the submission (e.g. it isn't setuid-root so it fails
-                    # to setgid/setuid into the `judge` user) its output isn't
-                    # the expected 4-line format, parse_safeexec_output falls
-                    # back to FAIL, and we land here. Without `err` this is
-                    # silent and impossible to diagnose from the grader output.
-                    log.error(
-                        "Internal error grading submission #%d on input %s: "
-                        "parsed=%s, safeexec stderr=%r",
-                        submission.id,
-                        input_file,
-                        json.dumps(data),
-                        err,
-                    )
-                if result not in ["time limit exceeded", "idleness limit exceeded"]:
-                    break  # abort retry of the test if is not time related
-
-            maximum_execution_time = max(maximum_execution_time, execution_time)
-            maximum_consumed_memory = max(maximum_consumed_memory, consumed_memory)
-            judgement_details += "Case#%d [%d bytes][%d ms]: %s\n" % (
-                current_test,
-                consumed_memory,
-                execution_time,
-                comment,
-            )
-        except Exception as e:
-            log.error("Unexpected error running test case: %s", str(e))
+    for test_number, outcome in outcomes:
+        if outcome is None:
+            metrics.GRADER_INTERNAL_ERRORS.labels("test_case_exception").inc()
             result = "internal error"
+            test_results.append(
+                SubmissionTestResult(
+                    submission=submission,
+                    test_number=test_number,
+                    result=get_result(result),
+                    execution_time=0,
+                    memory_used=0,
+                )
+            )
+            break
+        result, comment, execution_time, consumed_memory = outcome
+        test_results.append(
+            SubmissionTestResult(
+                submission=submission,
+                test_number=test_number,
+                result=get_result(result),
+                execution_time=execution_time,
+                memory_used=consumed_memory,
+            )
+        )
+        maximum_execution_time = max(maximum_execution_time, execution_time)
+        maximum_consumed_memory = max(maximum_consumed_memory, consumed_memory)
+        judgement_details += "Case#%d [%d bytes][%d ms]: %s\n" % (
+            test_number,
+            consumed_memory,
+            execution_time,
+            comment,
+        )
         if result != "accepted":
             break
     update_submission(
@@ -418,6 +674,7 @@ def grade_submission(submission, number_of_executions):
         memory_used=maximum_consumed_memory,
         result_name=result,
         judgement_details=judgement_details,
+        test_results=test_results,
     )
 
 
@@ -428,8 +685,9 @@ def set_pending(submission_id, sleep=5, trials=100):
         try:
             with transaction.atomic():
                 submission = Submission.objects.get(pk=submission_id)
-                submission.result = Result.objects.get(name__iexact="pending")
+                submission.result = get_result("pending")
                 submission.save()
+                notify_pending_submission(submission.id)
             success = True
         except DatabaseError as e:
             log.error("Unexpected database error: %s", str(e))
@@ -438,6 +696,226 @@ def set_pending(submission_id, sleep=5, trials=100):
             time.sleep(sleep)
 
 
+SHUTDOWN = threading.Event()
+
+# Workers that crash soon after starting (e.g. the database is down) are
+# restarted after a delay that doubles on every crash, up to the maximum.
+# Workers that ran for the stable time start again from the first delay.
+WORKER_RESTART_DELAY = 1
+WORKER_MAX_RESTART_DELAY = 300
+WORKER_STABLE_TIME = 60
+
+
+def request_shutdown(signum, frame):
+    """Signal handler: finish the in-flight submission and stop grading"""
+    log.info("Received signal %d, shutting down after current submission", signum)
+    SHUTDOWN.set()
+
+
+def wait_for_submissions(sleep):
+    """
+    Block until the web application notifies a new pending submission,
+    `sleep` seconds pass (fallback to polling) or we are asked to stop.
+    """
+    if connection.vendor != "postgresql":
+        SHUTDOWN.wait(sleep)
+        return
+    deadline = time.monotonic() + sleep
+    while not SHUTDOWN.is_set():
+        remaining = deadline - time.monotonic()
+        # Wait in short slices to react quickly to SIGTERM.
+        if remaining <= 0 or wait_for_pending_submission(min(remaining, 1)):
+            return
+
+
+def grade_pending_submissions(sleep, number_of_executions, parallel_tests):
+    while not SHUTDOWN.is_set():
+        submission = None
+        try:
+            # this block takes the first available pending submission and change its status to Compiling
+            # this will be an atomic transaction and the select_for_update method will block the submission for
+            # other graders
+            with transaction.atomic():
+                # if the next line returns a submission no other process can modify it until this block is finished
+                # skip_locked=True means that pending submissions locked by other workers (all of them are woken
+                # up by the same notification) are skipped, so every worker takes a different one without errors.
+                # Only the submission row is locked (of=("self",)), not its problem, compiler and result.
+                submission = (
+                    Submission.objects.select_for_update(skip_locked=True, of=("self",))
+                    .select_related("compiler", "problem")
+                    .filter(result__name__iexact="pending")
+                    .order_by("id")
+                    .first()
+                )
+                if submission:
+                    log.debug(
+                        "Received submission #%d, marking as 'compiling' and proceed",
+                        submission.id,
+                    )
+                    submission.result = get_result("compiling")
+                    submission.save()
+
+            if submission:
+                language = get_language(submission)
+                if not submission.judgement_details:
+                    # Rejudged submissions keep their original date
+                    metrics.GRADER_WAIT_DURATION.labels(language).observe(
+                        (timezone.now() - submission.date).total_seconds()
+                    )
+                # ready to grade the new submission
+                with metrics.observe_phase("grade", language):
+                    create_submission_folder(submission)
+                    tests = get_problem_tests(submission.problem)
+                    if tests is not None:
+                        if compile_submission(submission):
+                            grade_submission(
+                                submission, tests, number_of_executions, parallel_tests
+                            )
+                    else:
+                        log.error(
+                            "There was a problem with the problem folder %s for submission #%d",
+                            get_submission_folder(submission),
+                            submission.id,
+                        )
+                        set_internal_error(
+                            submission,
+                            "internal error, problem not ready",
+                            "problem_not_ready",
+                        )
+                if not settings.DEBUG:
+                    # If we're in DEBUG mode, leave the submission folder
+                    # to make debugging easier.
+                    remove_submission_folder(submission)
+            else:
+                # we only wait if there was no submission to grade
+                wait_for_submissions(sleep)
+        except DatabaseError as e:
+            # Grading failed, database error caught here
+            # Possible reasons:
+            # 1) The connection to the database was interrupted or could not be established
+            # 2) Raise condition in a trigger in the database (TODO: Fix this raise condition)
+            # TODO: Add more logs!
+            log.error("Unexpected database error: %s", str(e))
+            metrics.GRADER_INTERNAL_ERRORS.labels("database").inc()
+            close_old_connections()
+            if submission:
+                set_pending(submission.id)
+
+
+def run_worker(sleep, number_of_executions, parallel_tests):
+    """Entry point of a grading worker forked by `run_supervisor`"""
+    # Ctrl+C reaches the whole process group, let the supervisor decide.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, request_shutdown)
+    log.info("Grading worker started (pid=%d)", os.getpid())
+    grade_pending_submissions(sleep, number_of_executions, parallel_tests)
+    log.info("Grading worker stopped (pid=%d)", os.getpid())
+
+
+def get_restart_delay(crashes):
+    """Seconds to wait before restarting a worker after `crashes` crashes"""
+    return min(WORKER_RESTART_DELAY * 2 ** min(crashes, 16), WORKER_MAX_RESTART_DELAY)
+
+
+def run_supervisor(workers, sleep, number_of_executions, parallel_tests):
+    """
+    Fork `workers` grading processes and keep them alive. Every worker
+    claims submissions through the same `select_for_update(skip_locked=True)`
+    query, so they never grade the same submission twice. On SIGTERM or
+    SIGINT workers are asked to stop and are waited for, which lets them
+    finish their in-flight submissions.
+    """
+    context = multiprocessing.get_context("fork")
+    processes = {}
+    # slot -> start time of its worker, consecutive crashes and the time
+    # it has to be restarted at (only while waiting for it)
+    started, crashes, restarts = {}, {}, {}
+
+    def spawn(slot):
+        # Database connections must not be shared between processes.
+        connections.close_all()
+        process = context.Process(
+            target=run_worker,
+            args=(sleep, number_of_executions, parallel_tests),
+            name="grader-worker-%d" % slot,
+        )
+        process.start()
+        processes[slot] = process
+        started[slot] = time.monotonic()
+        log.info("Started %s (pid=%d)", process.name, process.pid)
+
+    signal.signal(signal.SIGTERM, request_shutdown)
+    signal.signal(signal.SIGINT, request_shutdown)
+
+    for slot in range(workers):
+        crashes[slot] = 0
+        spawn(slot)
+
+    while not SHUTDOWN.wait(1):
+        now = time.monotonic()
+        for slot, restart_at in list(restarts.items()):
+            if now >= restart_at:
+                del restarts[slot]
+                spawn(slot)
+        for slot, process in list(processes.items()):
+            if slot in restarts or process.is_alive():
+                continue
+            if now - started[slot] >= WORKER_STABLE_TIME:
+                crashes[slot] = 0
+            delay = get_restart_delay(crashes[slot])
+            crashes[slot] += 1
+            log.error(
+                "%s (pid=%d) exited with code %s, restarting in %d seconds",
+                process.name,
+                process.pid,
+                process.exitcode,
+                delay,
+            )
+            restarts[slot] = now + delay
+
+    for process in processes.values():
+        if process.is_alive():
+            process.terminate()
+    for process in processes.values():
+        process.join()
+        log.info("%s exited with code %s", process.name, process.exitcode)
+
+
+class QueueDepthCollector(object):
+    """Number of submissions waiting for or being graded (on every scrape)"""
+
+    def collect(self):
+        gauge = GaugeMetricFamily(
+            "judge_grader_queue_depth",
+            "Submissions waiting for or being graded by result",
+            labels=["result"],
+        )
+        try:
+            counts = dict(
+                Submission.objects.filter(result__name__in=GRADING_RESULTS)
+                .values_list("result__name")
+                .annotate(Count("id"))
+            )
+        except DatabaseError as e:
+            log.error("Could not count pending submissions: %s", str(e))
+            return
+        finally:
+            # Don't keep a connection open in the metrics thread, graders
+            # might be forked from this process.
+            connection.close()
+        for name in GRADING_RESULTS:
+            gauge.add_metric([name.lower()], counts.get(name, 0))
+        yield gauge
+
+
+def start_metrics_server(port):
+    """Serve the metrics of every grading process at `port`"""
+    registry = metrics.get_registry()
+    registry.register(QueueDepthCollector())
+    start_http_server(port, registry=registry)
+    log.info("Serving metrics at port %d", port)
+
+
 class Command(BaseCommand):
     def __init__(self, *args, **kwargs):
         super(Command, self).__init__(*args, **kwargs)
@@ -455,6 +933,24 @@ class Command(BaseCommand):
             default="2",
             help="Number of executions to prevent TLE",
         )
+        parser.add_argument(
+            "--parallel-tests",
+            type=int,
+            default="1",
+            help="Number of test cases to run concurrently per submission.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default="1",
+            help="Number of grading processes to run under a supervisor.",
+        )
+        parser.add_argument(
+            "--metrics-port",
+            type=int,
+            default="0",
+            help="Port to serve Prometheus metrics on (disabled by default).",
+        )
 
     def handle(self, *args, **options):
         verbosity = {0: log.WARN, 1: log.INFO, 2: log.DEBUG, 3: log.DEBUG}
@@ -464,69 +960,29 @@ class Command(BaseCommand):
         )
         sleep = options.get("sleep")
         number_of_executions = options.get("number_of_executions")
+        parallel_tests = options.get("parallel_tests")
+        workers = options.get("workers")
+        metrics_port = options.get("metrics_port")
         # validate input
         if sleep <= 0:
             raise CommandError("sleep argument must to be positive")
         if number_of_executions < 1:
             raise CommandError("number_of_executions must to be a positive integer")
-        # store compilers
-        while True:
-            submission = None
-            try:
-                # this block takes the first available pending submission and change its status to Compiling
-                # this will be an atomic transaction and the select_for_update method will block the submission for
-                # other graders
-                with transaction.atomic():
-                    # if the next line returns a submission no other process can modify it until this block is finished
-                    # nowait=True means that if we try to get a pending submission that is blocked by another process
-                    # we don't want to wait for it, because this submission wont be pending anymore
-                    # if the submission is blocked the no_wait=True will make the method to raise an exception
-                    # this exception will be captured bellow... if the submission is null nothing will happen and
-                    # we will continue to the next pending submission
-                    submission = (
-                        Submission.objects.select_for_update(nowait=True)
-                        .select_related("compiler", "problem")
-                        .filter(result__name__iexact="pending")
-                        .order_by("id")
-                        .first()
-                    )
-                    if submission:
-                        log.debug(
-                            "Received submission #%d, marking as 'compiling' and proceed",
-                            submission.id,
-                        )
-                        submission.result = Result.objects.get(name__iexact="compiling")
-                        submission.save()
-
-                if submission:
-                    # ready to grade the new submission
-                    create_submission_folder(submission)
-                    if check_problem_folder(submission.problem):
-                        if compile_submission(submission):
-                            grade_submission(submission, number_of_executions)
-                    else:
-                        log.error(
-                            "There was a problem with the problem folder %s for submission #%d",
-                            get_submission_folder(submission),
-                            submission.id,
-                        )
-                        set_internal_error(
-                            submission, "internal error, problem not ready"
-                        )
-                    if not settings.DEBUG:
-                        # If we're in DEBUG mode, leave the submission folder
-                        # to make debugging easier.
-                        remove_submission_folder(submission)
-                else:
-                    # we only wait if there was no submission to grade
-                    time.sleep(sleep)
-            except DatabaseError as e:
-                # Grading failed, database error caught here
-                # Possible reasons:
-                # 1) The connection to the database was interrupted or could not be established
-                # 2) Raise condition in a trigger in the database (TODO: Fix this raise condition)
-                # TODO: Add more logs!
-                log.error("Unexpected database error: %s", str(e))
-                close_old_connections()
-                if submission:
-                    set_pending(submission.id)
+        if parallel_tests < 1:
+            raise CommandError("parallel-tests must to be a positive integer")
+        if workers < 1:
+            raise CommandError("workers must to be a positive integer")
+        # warm up the results registry (inherited by forked workers)
+        load_results()
+        if metrics_port:
+            if workers > 1 and not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+                log.warning(
+                    "PROMETHEUS_MULTIPROC_DIR is not set, "
+                    "metrics of grading workers won't be exported"
+                )
+            start_metrics_server(metrics_port)
+        if workers > 1:
+            run_supervisor(workers, sleep, number_of_executions, parallel_tests)
+        else:
+            signal.signal(signal.SIGTERM, request_shutdown)
+            grade_pending_submissions(sleep, number_of_executions, parallel_tests)
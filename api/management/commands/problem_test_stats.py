@@ -0,0 +1,50 @@
+"""
+Print per-test statistics of a problem (see api/lib/test_results.py) to
+calibrate its time limit and spot weak or slow tests.
+"""
+
+from django.core.management import BaseCommand, CommandError
+
+from api.lib.test_results import get_failing_tests, get_test_stats
+from api.models import Problem
+
+
+class Command(BaseCommand):
+    help = "Print runs, failures and times per test of a problem"
+
+    def add_arguments(self, parser):
+        parser.add_argument("problem_id", type=int)
+        parser.add_argument(
+            "--language",
+            type=str,
+            default=None,
+            help="Only consider submissions in this language",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            problem = Problem.objects.get(pk=options["problem_id"])
+        except Problem.DoesNotExist:
+            raise CommandError(
+                "Problem {} does not exist".format(options["problem_id"])
+            )
+        failing = get_failing_tests(problem, options["language"])
+        print("test\truns\tfailures\tavg ms\tmax ms\tmax AC ms\tmax KiB\tfailed with")
+        for stats in get_test_stats(problem, options["language"]):
+            print(
+                "{}\t{}\t{}\t{:.0f}\t{}\t{}\t{}\t{}".format(
+                    stats["test_number"],
+                    stats["runs"],
+                    stats["failures"],
+                    stats["avg_time"],
+                    stats["max_time"],
+                    stats["max_accepted_time"] or "-",
+                    stats["max_memory"] // 1024,
+                    ", ".join(
+                        "{} {}".format(submissions, name)
+                        for name, submissions in failing.get(
+                            stats["test_number"], {}
+                        ).items()
+                    ),
+                )
+            )
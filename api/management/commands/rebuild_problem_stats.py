@@ -0,0 +1,38 @@
+"""
+Recompute the submission statistics of every problem (see
+`Problem.update_submission_stats`), which are otherwise refreshed by
+`update_points` as submissions change. Useful after loading submissions
+without the database triggers.
+"""
+
+from django.core.management import BaseCommand
+
+from api.models import Problem
+
+
+class Command(BaseCommand):
+    help = "Recompute the submission statistics of every problem"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of problems updated at once",
+        )
+
+    def handle(self, *args, **options):
+        last_id, total = 0, 0
+        while True:
+            problem_ids = list(
+                Problem.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[: options["batch_size"]]
+            )
+            if not problem_ids:
+                break
+            total += Problem.update_submission_stats(
+                Problem.objects.filter(id__in=problem_ids)
+            )
+            last_id = problem_ids[-1]
+            print("Problems up to #{}: {} updated".format(last_id, total))
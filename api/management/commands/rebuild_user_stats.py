@@ -0,0 +1,38 @@
+"""
+Recompute the submission statistics of every user (see
+`UserProfile.update_submission_stats`), which are otherwise refreshed by
+`update_points` as submissions change. Useful after loading submissions
+without the database triggers.
+"""
+
+from django.core.management import BaseCommand
+
+from api.models import UserProfile
+
+
+class Command(BaseCommand):
+    help = "Recompute the submission statistics of every user"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of users updated at once",
+        )
+
+    def handle(self, *args, **options):
+        last_id, total = 0, 0
+        while True:
+            user_ids = list(
+                UserProfile.objects.filter(user_id__gt=last_id)
+                .order_by("user_id")
+                .values_list("user_id", flat=True)[: options["batch_size"]]
+            )
+            if not user_ids:
+                break
+            total += UserProfile.update_submission_stats(
+                UserProfile.objects.filter(user_id__in=user_ids)
+            )
+            last_id = user_ids[-1]
+            print("Users up to #{}: {} updated".format(last_id, total))
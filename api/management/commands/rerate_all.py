@@ -1,6 +1,7 @@
 from django.core.management import BaseCommand
+from django.db import transaction
 
-from api.models import Contest, RatingChange
+from api.models import Contest, RatingChange, UserProfile
 from mog.ratings import set_ratings
 
 
@@ -12,7 +13,11 @@ class Command(BaseCommand):
         parser.add_argument("--dry_run", type=str, default="yes")
 
     def handle(self, *args, **options):
-        RatingChange.objects.all().delete()
+        with transaction.atomic():
+            RatingChange.objects.all().delete()
+            UserProfile.update_ratings(
+                UserProfile.objects.exclude(rated_contests=0, current_rating=0)
+            )
         contests = list(Contest.objects.filter(rated="True").order_by("end_date"))
         for contest in contests:
             print("Rating %s..." % contest.name)
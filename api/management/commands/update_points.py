@@ -0,0 +1,68 @@
+"""
+Apply the submission changes recorded by the database (see
+api/lib/points.py) to the points ledger, problem points and user points.
+Old entries of the submission changes log read by standings (see
+`SubmissionChange`) are removed while there is nothing to apply.
+Run a single instance of this command next to the web server.
+"""
+
+import datetime
+import logging as log
+import time
+
+from django.core.management import BaseCommand
+from django.db import DatabaseError
+from django.utils import timezone
+
+from api.lib import constants
+from api.lib.points import apply_pending_points_updates
+from api.lib.results import load_results
+from api.models import SubmissionChange
+
+
+def prune_submission_changes():
+    retention = datetime.timedelta(seconds=constants.SUBMISSION_CHANGES_RETENTION)
+    try:
+        SubmissionChange.prune(timezone.now() - retention)
+    except DatabaseError as e:
+        log.error("Could not prune submission changes: %s", str(e))
+
+
+class Command(BaseCommand):
+    help = "Apply pending submission changes to problem and user points"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sleep",
+            type=int,
+            default=5,
+            help="Seconds to wait when there is nothing to apply",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Maximum number of pending updates applied at once",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Apply all pending updates and exit",
+        )
+
+    def handle(self, *args, **options):
+        load_results()
+        batch_size = options["batch_size"]
+        while True:
+            try:
+                processed = apply_pending_points_updates(batch_size)
+            except DatabaseError as e:
+                log.error("Could not apply points updates: %s", str(e))
+                processed = 0
+            if processed:
+                log.info("%d points updates applied", processed)
+            if processed < batch_size:
+                prune_submission_changes()
+                if options["once"]:
+                    break
+                time.sleep(options["sleep"])
@@ -0,0 +1,53 @@
+"""
+Compare the points ledger with the submissions, and problem and user
+points with the `compute_problem_points` and `compute_user_points` SQL
+functions. Use `--fix yes` to rebuild the ledger and all points.
+"""
+
+from django.core.management import BaseCommand, CommandError
+
+from api.lib.points import get_points_differences, rebuild_points_ledger
+from api.models import PendingPointsUpdate
+
+
+class Command(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", type=str, default="no")
+
+    def handle(self, *args, **options):
+        pending = PendingPointsUpdate.objects.count()
+        if pending:
+            print("{} points updates are still pending".format(pending))
+
+        ledger, problems, users = get_points_differences()
+        for user_id, problem_id, solved in ledger:
+            print(
+                "Ledger: user {} {} problem {}".format(
+                    user_id, "solved" if solved else "did not solve", problem_id
+                )
+            )
+        for problem_id, points, expected in problems:
+            print(
+                "Problem {}: {} points, expected {}".format(
+                    problem_id, points, expected
+                )
+            )
+        for user_id, points, expected in users:
+            print("User {}: {} points, expected {}".format(user_id, points, expected))
+
+        if not (ledger or problems or users):
+            print("Points are consistent")
+            return
+
+        if options.get("fix") == "yes":
+            rebuild_points_ledger()
+            print("Ledger and points rebuilt")
+        else:
+            raise CommandError(
+                "{} ledger, {} problem and {} user differences found, run:\n{}".format(
+                    len(ledger),
+                    len(problems),
+                    len(users),
+                    "python manage.py verify_points --fix yes",
+                )
+            )
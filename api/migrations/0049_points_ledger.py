@@ -0,0 +1,136 @@
+# Generated by Django 2.0 on 2026-10-18 03:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Replace the `check_update` trigger (see db_scripts/) that recomputed the
+# points of a problem and of all its solvers on every submission update,
+# with triggers that only record the (user, problem) pairs to be applied to
+# the points ledger by the `update_points` command.
+ENQUEUE_POINTS_UPDATES = """
+DROP TRIGGER IF EXISTS check_update ON PUBLIC.api_submission;
+
+CREATE OR REPLACE FUNCTION PUBLIC.enqueue_points_update()
+  RETURNS TRIGGER
+  LANGUAGE 'plpgsql'
+  VOLATILE NOT LEAKPROOF
+AS $BODY$
+BEGIN
+  IF (TG_OP = 'DELETE' OR TG_OP = 'UPDATE') THEN
+    INSERT INTO api_pendingpointsupdate (user_id, problem_id)
+    VALUES (OLD.user_id, OLD.problem_id);
+  END IF;
+  IF (TG_OP = 'INSERT' OR TG_OP = 'UPDATE') THEN
+    INSERT INTO api_pendingpointsupdate (user_id, problem_id)
+    VALUES (NEW.user_id, NEW.problem_id);
+  END IF;
+  RETURN NULL;
+END;
+$BODY$;
+
+CREATE TRIGGER enqueue_points_update_on_change
+  AFTER UPDATE OF result_id, status, hidden, user_id, problem_id
+  ON PUBLIC.api_submission
+  FOR EACH ROW
+  WHEN ((OLD.result_id IS DISTINCT FROM NEW.result_id) OR
+        (OLD.status IS DISTINCT FROM NEW.status) OR
+        (OLD.hidden IS DISTINCT FROM NEW.hidden) OR
+        (OLD.user_id IS DISTINCT FROM NEW.user_id) OR
+        (OLD.problem_id IS DISTINCT FROM NEW.problem_id))
+  EXECUTE PROCEDURE PUBLIC.enqueue_points_update();
+
+CREATE TRIGGER enqueue_points_update_on_insert_or_delete
+  AFTER INSERT OR DELETE
+  ON PUBLIC.api_submission
+  FOR EACH ROW
+  EXECUTE PROCEDURE PUBLIC.enqueue_points_update();
+"""
+
+DROP_POINTS_UPDATES = """
+DROP TRIGGER IF EXISTS enqueue_points_update_on_change ON PUBLIC.api_submission;
+DROP TRIGGER IF EXISTS enqueue_points_update_on_insert_or_delete ON PUBLIC.api_submission;
+DROP FUNCTION IF EXISTS PUBLIC.enqueue_points_update();
+
+CREATE TRIGGER check_update
+  AFTER UPDATE OF result_id, status, hidden
+  ON PUBLIC.api_submission
+  FOR EACH ROW
+  WHEN ((OLD.result_id IS DISTINCT FROM NEW.result_id) OR
+        (OLD.status IS DISTINCT FROM NEW.status) OR
+        (OLD.hidden IS DISTINCT FROM NEW.hidden))
+  EXECUTE PROCEDURE PUBLIC.update_submission();
+"""
+
+# Case-insensitive, like `get_result("accepted")`
+POPULATE_LEDGER = """
+INSERT INTO api_solvedproblem (user_id, problem_id)
+SELECT DISTINCT api_submission.user_id, api_submission.problem_id
+FROM api_submission JOIN api_result ON (api_result.id = api_submission.result_id)
+WHERE (UPPER(api_result.name) = 'ACCEPTED') AND
+      (api_submission.status = 'normal') AND
+      (api_submission.hidden = FALSE);
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("api", "0048_auto_20250923_0316"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PendingPointsUpdate",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("user_id", models.IntegerField()),
+                ("problem_id", models.IntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name="SolvedProblem",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "problem",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="solvers",
+                        to="api.Problem",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="solved_problems",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name="solvedproblem",
+            unique_together={("user", "problem")},
+        ),
+        migrations.RunSQL(POPULATE_LEDGER, migrations.RunSQL.noop),
+        migrations.RunSQL(ENQUEUE_POINTS_UPDATES, DROP_POINTS_UPDATES),
+    ]
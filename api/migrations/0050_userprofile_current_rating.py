@@ -0,0 +1,46 @@
+# Generated by Django 2.0 on 2026-10-18 03:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+POPULATE_RATINGS = """
+UPDATE api_userprofile SET
+  current_rating = COALESCE((
+    SELECT SUM(api_ratingchange.rating) FROM api_ratingchange
+    WHERE api_ratingchange.profile_id = api_userprofile.user_id
+  ) + %d, 0),
+  rated_contests = (
+    SELECT COUNT(*) FROM api_ratingchange
+    WHERE api_ratingchange.profile_id = api_userprofile.user_id
+  );
+""" % (
+    settings.BASE_RATING,
+)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0049_points_ledger"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userprofile",
+            name="current_rating",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="rated_contests",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="userprofile",
+            index=models.Index(
+                fields=["-current_rating", "-points", "user"],
+                name="api_userprofile_rating_idx",
+            ),
+        ),
+        migrations.RunSQL(POPULATE_RATINGS, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 2.0 on 2026-10-18 03:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0050_userprofile_current_rating"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SubmissionTestResult",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("test_number", models.PositiveSmallIntegerField()),
+                ("execution_time", models.IntegerField()),
+                ("memory_used", models.BigIntegerField()),
+                (
+                    "result",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="api.Result"
+                    ),
+                ),
+                (
+                    "submission",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="test_results",
+                        to="api.Submission",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name="submissiontestresult",
+            unique_together={("submission", "test_number")},
+        ),
+    ]
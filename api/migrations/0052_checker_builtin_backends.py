@@ -0,0 +1,31 @@
+# Generated by Django 2.0 on 2026-10-18 03:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0051_submissiontestresult"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="checker",
+            name="backend",
+            field=models.CharField(
+                choices=[
+                    ("testlib.h", "testlib.h (0.9.10-SNAPSHOT)"),
+                    ("testlib-0.9.42-SNAPSHOT.h", "testlib.h (0.9.42-SNAPSHOT)"),
+                    ("testlib4j.jar", "testlib4j.jar"),
+                    ("builtin-fcmp", "built-in fcmp (equal lines)"),
+                    ("builtin-lcmp", "built-in lcmp (equal tokens per line)"),
+                    ("builtin-wcmp", "built-in wcmp (equal tokens)"),
+                    ("builtin-rcmp4", "built-in rcmp4 (numbers, error 1e-4)"),
+                    ("builtin-rcmp6", "built-in rcmp6 (numbers, error 1e-6)"),
+                    ("builtin-rcmp9", "built-in rcmp9 (numbers, error 1e-9)"),
+                ],
+                default="testlib.h",
+                max_length=32,
+            ),
+        ),
+    ]
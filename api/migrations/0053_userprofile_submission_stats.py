@@ -0,0 +1,55 @@
+# Generated by Django 2.0 on 2026-10-18 03:46
+
+from django.db import migrations, models
+
+
+POPULATE_SUBMISSION_STATS = """
+UPDATE api_userprofile SET
+  solved_count = stats.solved,
+  accepted_count = stats.accepted,
+  submissions_count = stats.total,
+  last_submission_date = stats.last
+FROM (
+  SELECT
+    s.user_id,
+    COUNT(DISTINCT s.problem_id) FILTER (WHERE s.status = 'normal' AND UPPER(r.name) = 'ACCEPTED') AS solved,
+    COUNT(*) FILTER (WHERE s.status = 'normal' AND UPPER(r.name) = 'ACCEPTED') AS accepted,
+    COUNT(*) AS total,
+    MAX(s.date) AS last
+  FROM api_submission s
+  JOIN api_result r ON r.id = s.result_id
+  WHERE NOT s.hidden
+  GROUP BY s.user_id
+) AS stats
+WHERE stats.user_id = api_userprofile.user_id;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0052_checker_builtin_backends"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userprofile",
+            name="accepted_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="last_submission_date",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="solved_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="submissions_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunSQL(POPULATE_SUBMISSION_STATS, migrations.RunSQL.noop),
+    ]
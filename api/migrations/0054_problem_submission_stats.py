@@ -0,0 +1,57 @@
+# Generated by Django 2.0 on 2026-10-18 03:49
+
+from django.db import migrations, models
+
+
+POPULATE_SUBMISSION_STATS = """
+UPDATE api_problem SET
+  solved_count = stats.solved,
+  accepted_count = stats.accepted,
+  submissions_count = stats.total,
+  users_count = stats.users
+FROM (
+  SELECT
+    s.problem_id,
+    COUNT(DISTINCT s.user_id) FILTER (WHERE s.status = 'normal' AND UPPER(r.name) = 'ACCEPTED') AS solved,
+    COUNT(*) FILTER (WHERE s.status = 'normal' AND UPPER(r.name) = 'ACCEPTED') AS accepted,
+    COUNT(*) AS total,
+    COUNT(DISTINCT s.user_id) AS users
+  FROM api_submission s
+  JOIN api_result r ON r.id = s.result_id
+  LEFT JOIN api_contestinstance i ON i.id = s.instance_id
+  LEFT JOIN api_contest c ON c.id = i.contest_id
+  WHERE NOT s.hidden AND (s.instance_id IS NULL OR c.visible)
+  GROUP BY s.problem_id
+) AS stats
+WHERE stats.problem_id = api_problem.id;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0053_userprofile_submission_stats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="problem",
+            name="accepted_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="problem",
+            name="solved_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="problem",
+            name="submissions_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="problem",
+            name="users_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunSQL(POPULATE_SUBMISSION_STATS, migrations.RunSQL.noop),
+    ]
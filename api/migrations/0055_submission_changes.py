@@ -0,0 +1,87 @@
+# Generated by Django 2.0 on 2026-10-18 04:23
+
+from django.db import migrations, models
+
+
+# Log the contest submissions created, removed or changed in a field shown
+# by standings (see `SubmissionChange`).
+LOG_SUBMISSION_CHANGES = """
+CREATE OR REPLACE FUNCTION PUBLIC.log_submission_change()
+  RETURNS TRIGGER
+  LANGUAGE 'plpgsql'
+  VOLATILE NOT LEAKPROOF
+AS $BODY$
+BEGIN
+  IF (TG_OP = 'DELETE' OR TG_OP = 'UPDATE') AND OLD.instance_id IS NOT NULL THEN
+    INSERT INTO api_submissionchange (submission_id, contest_id, date)
+    SELECT OLD.id, contest_id, now() FROM api_contestinstance
+    WHERE id = OLD.instance_id;
+  END IF;
+  IF (TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND
+      OLD.instance_id IS DISTINCT FROM NEW.instance_id)) AND
+     NEW.instance_id IS NOT NULL THEN
+    INSERT INTO api_submissionchange (submission_id, contest_id, date)
+    SELECT NEW.id, contest_id, now() FROM api_contestinstance
+    WHERE id = NEW.instance_id;
+  END IF;
+  RETURN NULL;
+END;
+$BODY$;
+
+CREATE TRIGGER log_submission_change_on_update
+  AFTER UPDATE OF date, problem_id, instance_id, result_id, status, hidden
+  ON PUBLIC.api_submission
+  FOR EACH ROW
+  WHEN ((OLD.date IS DISTINCT FROM NEW.date) OR
+        (OLD.problem_id IS DISTINCT FROM NEW.problem_id) OR
+        (OLD.instance_id IS DISTINCT FROM NEW.instance_id) OR
+        (OLD.result_id IS DISTINCT FROM NEW.result_id) OR
+        (OLD.status IS DISTINCT FROM NEW.status) OR
+        (OLD.hidden IS DISTINCT FROM NEW.hidden))
+  EXECUTE PROCEDURE PUBLIC.log_submission_change();
+
+CREATE TRIGGER log_submission_change_on_insert_or_delete
+  AFTER INSERT OR DELETE
+  ON PUBLIC.api_submission
+  FOR EACH ROW
+  EXECUTE PROCEDURE PUBLIC.log_submission_change();
+"""
+
+DROP_SUBMISSION_CHANGES_LOG = """
+DROP TRIGGER IF EXISTS log_submission_change_on_update ON PUBLIC.api_submission;
+DROP TRIGGER IF EXISTS log_submission_change_on_insert_or_delete ON PUBLIC.api_submission;
+DROP FUNCTION IF EXISTS PUBLIC.log_submission_change();
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0054_problem_submission_stats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SubmissionChange",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("submission_id", models.IntegerField()),
+                ("contest_id", models.IntegerField()),
+                ("date", models.DateTimeField(db_index=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="submissionchange",
+            index=models.Index(
+                fields=["contest_id", "date"], name="api_submiss_contest_69015a_idx"
+            ),
+        ),
+        migrations.RunSQL(LOG_SUBMISSION_CHANGES, DROP_SUBMISSION_CHANGES_LOG),
+    ]
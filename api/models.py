@@ -6,7 +6,7 @@ import json
 
 from django.core.mail import send_mail
 from django.db.models import F
-from django.db.models import Sum, Value
+from django.db.models import Count, Max, OuterRef, Subquery, Sum
 from django.db.models.functions import Coalesce, Lower
 
 from django.template.loader import render_to_string
@@ -31,6 +31,20 @@ from mog.gating import (
 )
 
 
+def count_subquery(queryset, *args, **kwargs):
+    """
+    Count(*args, **kwargs) of `queryset` (a subquery grouped by its outer
+    reference), 0 when it has no rows.
+    """
+    return Coalesce(
+        Subquery(
+            queryset.annotate(count=Count(*args, **kwargs)).values("count"),
+            output_field=models.IntegerField(),
+        ),
+        0,
+    )
+
+
 @deconstructible
 class UUIDImageName(object):
     def __init__(self, upload_to):
@@ -97,6 +111,14 @@ class Checker(models.Model):
         ("testlib.h", "testlib.h (0.9.10-SNAPSHOT)"),
         ("testlib-0.9.42-SNAPSHOT.h", "testlib.h (0.9.42-SNAPSHOT)"),
         ("testlib4j.jar", "testlib4j.jar"),
+        # Compared by the grader itself (see __comparators.py), much
+        # faster than compiled checkers on problems with many tests.
+        ("builtin-fcmp", "built-in fcmp (equal lines)"),
+        ("builtin-lcmp", "built-in lcmp (equal tokens per line)"),
+        ("builtin-wcmp", "built-in wcmp (equal tokens)"),
+        ("builtin-rcmp4", "built-in rcmp4 (numbers, error 1e-4)"),
+        ("builtin-rcmp6", "built-in rcmp6 (numbers, error 1e-6)"),
+        ("builtin-rcmp9", "built-in rcmp9 (numbers, error 1e-9)"),
     ]
 
     name = models.CharField(max_length=100, unique=True)
@@ -109,6 +131,11 @@ class Checker(models.Model):
     def __str__(self):
         return self.name
 
+    @property
+    def is_builtin(self):
+        """Built-in checkers have no source"""
+        return self.backend.startswith("builtin-")
+
 
 class Contest(models.Model):
     name = models.CharField(max_length=100, unique=False)
@@ -281,6 +308,56 @@ class Contest(models.Model):
     def get_problems(self):
         return self.problems.order_by("position")
 
+    def get_problems_status(self, instance):
+        """
+        Return {problem id: status} for every problem of the contest in a
+        single query, where the status is a dict with `solved`/`failed`
+        (same as `instance.has_solved_problem` / `has_failed_problem`)
+        and `solved_count` (same as
+        `problem.total_solved_relevant_for_instance(instance)`).
+        """
+        accepted = Q(
+            submissions__result__name__iexact="accepted", submissions__status="normal"
+        )
+        visible = Q(
+            submissions__hidden=False, submissions__instance__contest__visible=True
+        )
+        if instance and not instance.real and instance.is_running:
+            relative_time = instance.relative_time
+            relevant = Q(
+                submissions__instance__real=True,
+                submissions__date__lte=self.start_date + relative_time,
+            ) | Q(
+                submissions__instance__real=False,
+                submissions__date__lte=F("submissions__instance__start_date")
+                + relative_time,
+            )
+        else:
+            relevant = Q(submissions__instance__real=True)
+        annotations = {
+            "solved_count": Count(
+                "submissions__instance",
+                distinct=True,
+                filter=accepted & visible & relevant,
+            )
+        }
+        if instance:
+            own = Q(submissions__instance=instance)
+            annotations["solved"] = Count("submissions", filter=own & accepted)
+            annotations["failed"] = Count(
+                "submissions",
+                filter=own
+                & Q(submissions__result__penalty=True, submissions__status="normal"),
+            )
+        return {
+            problem["id"]: {
+                "solved": problem.get("solved", 0) > 0,
+                "failed": problem.get("failed", 0) > 0,
+                "solved_count": problem["solved_count"],
+            }
+            for problem in self.problems.values("id").annotate(**annotations)
+        }
+
     def death_time_from_date(self, date):
         return (
             self.end_date - timezone.timedelta(minutes=self.death_time)
@@ -394,6 +471,12 @@ class Problem(models.Model):
             "If true, the problem source is written in Text Rich Editor, else with Simple Markdown Editor."
         ),
     )
+    # Denormalized from the visible submissions of the problem, see
+    # `update_submission_stats`.
+    solved_count = models.PositiveIntegerField(default=0)
+    accepted_count = models.PositiveIntegerField(default=0)
+    submissions_count = models.PositiveIntegerField(default=0)
+    users_count = models.PositiveIntegerField(default=0)
 
     def save(self, *args, **kwargs):
         self.slug = slugify(self.title)
@@ -436,11 +519,15 @@ class Problem(models.Model):
             Problem.objects if admin else Problem.objects.filter(contest__visible=True)
         )
 
+    @staticmethod
+    def get_letter(position):
+        if position < 1 or position > 26:
+            return "?"
+        return chr(ord("A") + position - 1)
+
     @property
     def letter(self):
-        if self.position < 1 or self.position > 26:
-            return "?"
-        return chr(ord("A") + self.position - 1)
+        return Problem.get_letter(self.position)
 
     @property
     def code(self):
@@ -450,25 +537,51 @@ class Problem(models.Model):
     def full_title(self):
         return self.letter + " - " + self.title
 
+    @staticmethod
+    def update_submission_stats(problems):
+        """
+        Recompute the submission statistics of `problems` (a Problem
+        queryset) from their visible submissions. Kept up to date by
+        `apply_pending_points_updates` (see api/lib/points.py) and when
+        the visibility of a contest changes.
+        """
+        submissions = (
+            Submission.objects.filter(
+                Q(problem=OuterRef("pk"))
+                & Q(hidden=False)
+                & (Q(instance=None) | Q(instance__contest__visible=True))
+            )
+            .order_by()
+            .values("problem")
+        )
+        accepted = submissions.filter(result__name__iexact="accepted", status="normal")
+
+        return problems.update(
+            solved_count=count_subquery(accepted, "user", distinct=True),
+            accepted_count=count_subquery(accepted, "id"),
+            submissions_count=count_subquery(submissions, "id"),
+            users_count=count_subquery(submissions, "user", distinct=True),
+        )
+
     @property
     def user_submitted(self):
         """Number of users that have at least one submission to this problem"""
-        return self._visible_submissions().distinct("user_id").count()
+        return self.users_count
 
     @property
     def accepted_submissions(self):
         """Number of accepted submissions"""
-        return self._accepted_submissions().count()
+        return self.accepted_count
 
     @property
     def total_submissions(self):
         """Total number of submissions"""
-        return self._visible_submissions().count()
+        return self.submissions_count
 
     @property
     def unique_users_solved(self):
         """Return number of contestant whom solved this problem"""
-        return self._accepted_submissions().distinct("user_id").count()
+        return self.solved_count
 
     def total_solved_relevant_for_instance(self, instance):
         if instance and not instance.real and instance.is_running:
@@ -792,6 +905,16 @@ class UserProfile(models.Model):
     points = models.PositiveIntegerField(
         verbose_name=_("Points"), null=False, default=0
     )
+    # Denormalized from RatingChange, see `update_ratings`. The current
+    # rating is 0 for users without rated contests.
+    current_rating = models.IntegerField(default=0)
+    rated_contests = models.PositiveIntegerField(default=0)
+    # Denormalized from the visible submissions of the user, see
+    # `update_submission_stats`.
+    solved_count = models.PositiveIntegerField(default=0)
+    accepted_count = models.PositiveIntegerField(default=0)
+    submissions_count = models.PositiveIntegerField(default=0)
+    last_submission_date = models.DateTimeField(null=True, blank=True)
     email_notifications = models.BooleanField(
         verbose_name=_("Send email notifications"), default=True
     )
@@ -833,21 +956,69 @@ class UserProfile(models.Model):
     def is_browser(self):
         return self.role == "browser"
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["-current_rating", "-points", "user"],
+                name="api_userprofile_rating_idx",
+            )
+        ]
+
     @property
     def rating(self):
-        if self.has_rating:
-            return (
-                RatingChange.objects.filter(profile=self)
-                .aggregate(rating=Sum("rating"))
-                .get("rating")
-                + settings.BASE_RATING
-            )
-        else:
-            return 0
+        return self.current_rating
 
     @property
     def has_rating(self):
-        return self.rating_changes.count() > 0
+        return self.rated_contests > 0
+
+    @staticmethod
+    def update_ratings(profiles):
+        """
+        Recompute `current_rating` and `rated_contests` of `profiles` (a
+        UserProfile queryset) from their rating changes. Should be called
+        in the same transaction that creates/removes rating changes.
+        """
+        changes = (
+            RatingChange.objects.filter(profile=OuterRef("pk"))
+            .order_by()
+            .values("profile")
+        )
+        total = changes.annotate(total=Sum("rating")).values("total")
+        count = changes.annotate(count=Count("id")).values("count")
+        return profiles.update(
+            current_rating=Coalesce(
+                Subquery(total, output_field=models.IntegerField())
+                + settings.BASE_RATING,
+                0,
+            ),
+            rated_contests=Coalesce(
+                Subquery(count, output_field=models.IntegerField()), 0
+            ),
+        )
+
+    @staticmethod
+    def update_submission_stats(profiles):
+        """
+        Recompute the submission statistics of `profiles` (a UserProfile
+        queryset) from their visible submissions. Kept up to date by
+        `apply_pending_points_updates` (see api/lib/points.py).
+        """
+        submissions = (
+            Submission.objects.filter(user=OuterRef("user"), hidden=False)
+            .order_by()
+            .values("user")
+        )
+        accepted = submissions.filter(result__name__iexact="accepted", status="normal")
+
+        return profiles.update(
+            solved_count=count_subquery(accepted, "problem", distinct=True),
+            accepted_count=count_subquery(accepted, "id"),
+            submissions_count=count_subquery(submissions, "id"),
+            last_submission_date=Subquery(
+                submissions.annotate(last=Max("date")).values("last")
+            ),
+        )
 
     def get_ratings(self):
         data = []
@@ -872,35 +1043,21 @@ class UserProfile(models.Model):
 
     @property
     def solved_problems(self):
-        return (
-            self.user.submissions.filter(
-                result__name__iexact="accepted", hidden=False, status="normal"
-            )
-            .distinct("problem_id")
-            .count()
-        )
+        return self.solved_count
 
     @property
     def accepted_submissions(self):
-        return self.user.submissions.filter(
-            result__name__iexact="accepted", hidden=False, status="normal"
-        ).count()
+        return self.accepted_count
 
     @property
     def total_submissions(self):
-        return self.user.submissions.filter(hidden=False).count()
+        return self.submissions_count
 
     @staticmethod
     def sorted_by_ratings():
-        return (
-            UserProfile.objects.annotate(
-                rating_value=Coalesce(
-                    Sum("ratings__rating"), Value(-settings.BASE_RATING)
-                )
-            )
-            .order_by("-rating_value", "-points", "pk")
-            .select_related("user")
-        )
+        return UserProfile.objects.order_by(
+            "-current_rating", "-points", "pk"
+        ).select_related("user")
 
     def __str__(self):
         return self.user.username
@@ -1054,6 +1211,74 @@ class Submission(models.Model):
         return self.status == "death"
 
 
+class SubmissionTestResult(models.Model):
+    """
+    Outcome of a submission on a single test case. The grader replaces
+    all the results of a submission (in a single query) when grading it.
+    See `api.lib.test_results` for aggregations.
+    """
+
+    submission = models.ForeignKey(
+        Submission, related_name="test_results", on_delete=models.CASCADE
+    )
+    test_number = models.PositiveSmallIntegerField()
+    result = models.ForeignKey(Result, on_delete=models.CASCADE)
+    execution_time = models.IntegerField()  # milliseconds
+    memory_used = models.BigIntegerField()  # bytes
+
+    class Meta:
+        unique_together = ("submission", "test_number")
+
+
+class SolvedProblem(models.Model):
+    """
+    Points ledger: one row per (user, problem) with at least one accepted,
+    normal and visible submission. Kept up to date by `api.lib.points`.
+    """
+
+    user = models.ForeignKey(
+        User, related_name="solved_problems", on_delete=models.CASCADE
+    )
+    problem = models.ForeignKey(
+        Problem, related_name="solvers", on_delete=models.CASCADE
+    )
+
+    class Meta:
+        unique_together = ("user", "problem")
+
+
+class PendingPointsUpdate(models.Model):
+    """
+    (user, problem) pairs whose submissions changed and should be applied
+    to the points ledger. Rows are inserted by a database trigger on the
+    submissions table, so bulk updates are also recorded.
+    """
+
+    user_id = models.IntegerField()
+    problem_id = models.IntegerField()
+
+
+class SubmissionChange(models.Model):
+    """
+    Log of the contest submissions created, changed (in any field shown
+    by standings) or removed, with the contest of their instance. Rows
+    are inserted by a database trigger, so standings kept in memory (see
+    mog/standing_store.py) only reload the submissions that changed.
+    Old rows are removed by `prune`.
+    """
+
+    submission_id = models.IntegerField()
+    contest_id = models.IntegerField()
+    date = models.DateTimeField(db_index=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["contest_id", "date"])]
+
+    @staticmethod
+    def prune(before):
+        return SubmissionChange.objects.filter(date__lt=before).delete()[0]
+
+
 class Comment(models.Model):
     user = models.ForeignKey(User, related_name="comments", on_delete=models.CASCADE)
     post = models.ForeignKey(Post, related_name="comments", on_delete=models.CASCADE)
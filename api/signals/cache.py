@@ -1,15 +1,16 @@
-from django.core.cache import cache
 from django.db.models import signals
 from django.dispatch import receiver
 
 from api.lib import constants
-from api.models import Contest, Post, Submission
+from api.lib.queries import invalidate_cache
+from api.lib.results import clear_results
+from api.models import Contest, ContestPermission, Post, Result, Submission
 
 
 @receiver(signals.post_delete, sender=Post)
 @receiver(signals.post_save, sender=Post)
 def clean_ten_most_recent_posts(*args, **kwargs):
-    cache.delete(constants.CACHE_KEY_TEN_MOST_RECENT_POSTS)
+    invalidate_cache(constants.CACHE_KEY_TEN_MOST_RECENT_POSTS)
 
 
 @receiver(signals.post_delete, sender=Contest)
@@ -17,4 +18,16 @@ def clean_ten_most_recent_posts(*args, **kwargs):
 @receiver(signals.post_save, sender=Contest)
 @receiver(signals.post_save, sender=Submission)
 def clean_five_top_rated_profiles(*args, **kwargs):
-    cache.delete(constants.CACHE_KEY_FIVE_TOP_RATED_PROFILES)
+    invalidate_cache(constants.CACHE_KEY_FIVE_TOP_RATED_PROFILES)
+
+
+@receiver(signals.post_delete, sender=ContestPermission)
+@receiver(signals.post_save, sender=ContestPermission)
+def clean_user_contests(*args, **kwargs):
+    invalidate_cache(constants.CACHE_KEY_USER_CONTESTS)
+
+
+@receiver(signals.post_delete, sender=Result)
+@receiver(signals.post_save, sender=Result)
+def clean_results(*args, **kwargs):
+    clear_results()
@@ -1,10 +1,25 @@
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
-from api.models import UserProfile
+from api.models import Contest, UserProfile
 
 
 @receiver(post_save, sender=User)
 def create_profile_for_user(sender, instance, created, **kwargs):
     if created:
         UserProfile(user=instance).save()
+
+
+@receiver(pre_delete, sender=Contest)
+def collect_rated_profiles(sender, instance, **kwargs):
+    instance.rated_profile_ids = list(
+        instance.rating_changes.values_list("profile_id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Contest)
+def update_rated_profiles(sender, instance, **kwargs):
+    """Rating changes of deleted contests are removed in cascade"""
+    profile_ids = getattr(instance, "rated_profile_ids", None)
+    if profile_ids:
+        UserProfile.update_ratings(UserProfile.objects.filter(pk__in=profile_ids))
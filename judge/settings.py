@@ -91,6 +91,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "mog.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.locale.LocaleMiddleware",
@@ -104,9 +105,24 @@ MIDDLEWARE = [
 ]
 
 
+# Bearer token required to read the Prometheus metrics (at `/metrics/`),
+# which are disabled when empty.
+METRICS_TOKEN = config.get("metrics", "METRICS_TOKEN", fallback="")
+
 if config.getboolean("palantir", "LOG_REQUESTS"):
     MIDDLEWARE.append("palantir.middlewares.AccessLogMiddleware")
 
+# Local MaxMind GeoIP2/GeoLite2 City database used to resolve the address
+# of logged requests (requires the `geoip2` package). Addresses are not
+# resolved when empty.
+GEOIP_DATABASE = config.get("palantir", "GEOIP_DATABASE", fallback="")
+
+# Months of raw access logs kept by `maintain_accesslogs`, older monthly
+# partitions are dropped (their hourly rollups are kept).
+ACCESS_LOG_RETENTION_MONTHS = config.getint(
+    "palantir", "ACCESS_LOG_RETENTION_MONTHS", fallback=6
+)
+
 
 AUTHENTICATION_BACKENDS = (
     "social_core.backends.github.GithubOAuth2",
@@ -119,7 +135,7 @@ ROOT_URLCONF = "judge.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "mog.template_backends.InstrumentedDjangoTemplates",
         "DIRS": [],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -235,6 +251,21 @@ SANDBOX_FOLDER = config.get("grader", "SANDBOX_FOLDER")
 # - testlib4j.jar
 RESOURCES_FOLDER = config.get("grader", "RESOURCES_FOLDER")
 
+# Place to cache compiled checkers across submissions and its maximum
+# size (in MiB). Least recently used checkers are evicted first.
+CHECKERS_CACHE_FOLDER = config.get(
+    "grader", "CHECKERS_CACHE_FOLDER", fallback="/var/cache/mog/checkers"
+)
+CHECKERS_CACHE_SIZE = config.getint("grader", "CHECKERS_CACHE_SIZE", fallback=256)
+
+# Place (ideally a tmpfs) to stage the test data of recently graded
+# problems and its maximum size (in MiB), 0 disables it. Least recently
+# used problems are evicted first.
+TESTS_CACHE_FOLDER = config.get(
+    "grader", "TESTS_CACHE_FOLDER", fallback="/dev/shm/mog/tests"
+)
+TESTS_CACHE_SIZE = config.getint("grader", "TESTS_CACHE_SIZE", fallback=0)
+
 # Email configuration
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 EMAIL_USE_TLS = config.getboolean("email", "EMAIL_USE_TLS")
@@ -325,11 +356,20 @@ SOCIAL_AUTH_PIPELINE = (
     "mog.pipeline.associate_avatar",
 )
 
-# Cache settings
+# Cache settings. The default in-memory cache is private to every
+# process, use a shared backend when running several gunicorn workers
+# (or graders) so cached queries and their invalidation are coherent:
+# `file` or `database` (its table is created by `createcachetable`).
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "database": "django.core.cache.backends.db.DatabaseCache",
+}
+CACHE_BACKEND = config.get("cache", "CACHE_BACKEND", fallback="locmem")
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "mog-cache",
+        "BACKEND": CACHE_BACKENDS[CACHE_BACKEND],
+        "LOCATION": config.get("cache", "CACHE_LOCATION", fallback="mog-cache"),
     }
 }
 
@@ -96,6 +96,89 @@ def public_actions_blocked():
     return settings.BLOCK_PUBLIC_ACTIONS
 
 
+# Capabilities of a user over a submission (see get_submissions_permissions)
+CAN_SEE_SOURCE = 1
+CAN_SEE_DETAILS = 2
+CAN_REJUDGE = 4
+
+
+def get_submissions_permissions(user, submissions):
+    """
+    Same as `Submission.can_show_source_to`, `can_show_details_to` and
+    `can_be_rejudged_by` for every submission in `submissions` at once:
+    return {submission id: bitmap of CAN_* flags}. The roles of the user
+    are looked up once, and contests of problems and instances that are
+    not loaded already are fetched with one query each.
+    """
+    # Imported here, api.models imports this module
+    from api.models import ContestInstance, Problem, Submission
+
+    submissions = list(submissions)
+    is_admin = user_is_admin(user)
+    judge_ids = set(get_all_contest_for_judge(user)) if user.is_authenticated else set()
+    observer_ids = (
+        set(get_all_contest_for_observer(user)) if user.is_authenticated else set()
+    )
+
+    problem_field = Submission._meta.get_field("problem")
+    instance_field = Submission._meta.get_field("instance")
+    problem_contest_ids = dict(
+        Problem.objects.filter(
+            id__in={
+                submission.problem_id
+                for submission in submissions
+                if not problem_field.is_cached(submission)
+            }
+        ).values_list("id", "contest_id")
+    )
+    instances = ContestInstance.objects.select_related("contest").in_bulk(
+        {
+            submission.instance_id
+            for submission in submissions
+            if submission.instance_id and not instance_field.is_cached(submission)
+        }
+    )
+
+    permissions = {}
+    for submission in submissions:
+        if problem_field.is_cached(submission):
+            contest_id = submission.problem.contest_id
+        else:
+            contest_id = problem_contest_ids[submission.problem_id]
+        instance = None
+        if submission.instance_id:
+            if instance_field.is_cached(submission):
+                instance = submission.instance
+            else:
+                instance = instances[submission.instance_id]
+        visible = not submission.hidden and (
+            instance is None or instance.contest.visible
+        )
+        is_owner = user.is_authenticated and submission.user_id == user.id
+        is_judge = is_admin or contest_id in judge_ids
+        is_observer = visible and contest_id in observer_ids
+
+        flags = 0
+        if (
+            is_owner
+            or is_judge
+            or is_observer
+            or (visible and submission.public and (not instance or instance.is_past))
+        ):
+            flags |= CAN_SEE_SOURCE
+        if (
+            is_judge
+            or is_observer
+            or (submission.status == "normal" and visible)
+            or (is_owner and submission.status != "death")
+        ):
+            flags |= CAN_SEE_DETAILS
+        if is_judge:
+            flags |= CAN_REJUDGE
+        permissions[submission.id] = flags
+    return permissions
+
+
 # -----------------------------------------------------------------------
 # Bellow there are "private" functions only that shouldn't be used
 # directly outside this file. Use those functions defined above that
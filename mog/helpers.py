@@ -1,6 +1,11 @@
+import json
+import zipfile
+
 from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
+from django.db import connection
 from django.db.models import Q
 
+from api.lib.results import get_result_by_id
 from api.models import Submission, Contest, Result
 from mog.gating import (
     user_is_admin,
@@ -20,6 +25,100 @@ def get_paginator(query_set, rows_per_page, current_page=1):
     return items
 
 
+class KeysetPage(object):
+    """
+    Page of a queryset ordered by descending primary key, located by the
+    keys around it (`?before=<pk>` for older rows, `?after=<pk>` for
+    newer ones) instead of an offset, so deep pages are as cheap as the
+    first one. `count` is an estimation, see `estimate_count`.
+    """
+
+    def __init__(self, object_list, has_previous, has_next, count):
+        self.object_list = object_list
+        self._has_previous = has_previous
+        self._has_next = has_next
+        self.count = count
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_next(self):
+        return self._has_next
+
+    @property
+    def previous_cursor(self):
+        return self.object_list[0].pk
+
+    @property
+    def next_cursor(self):
+        return self.object_list[-1].pk
+
+
+def parse_cursor(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def estimate_count(queryset, exact_below=1000):
+    """
+    Number of rows of `queryset` estimated by the query planner, which
+    is exact only if it's below `exact_below` (then it's counted), to
+    avoid running COUNT(*) over big tables.
+    """
+    sql, params = queryset.order_by().values("pk").query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    estimation = int(plan[0]["Plan"]["Plan Rows"])
+    if estimation < exact_below:
+        return queryset.count()
+    return estimation
+
+
+def get_keyset_page(queryset, rows_per_page, before=None, after=None):
+    """Return the KeysetPage of `queryset` before (or after) the given keys"""
+    before, after = parse_cursor(before), parse_cursor(after)
+    rows = []
+    if after is not None:
+        rows = list(queryset.filter(pk__gt=after).order_by("pk")[: rows_per_page + 1])
+        has_previous = len(rows) > rows_per_page
+        rows = rows[:rows_per_page][::-1]
+        has_next = bool(rows) and queryset.filter(pk__lt=rows[-1].pk).exists()
+    if not rows:
+        if before is not None:
+            rows = list(
+                queryset.filter(pk__lt=before).order_by("-pk")[: rows_per_page + 1]
+            )
+        else:
+            rows = list(queryset.order_by("-pk")[: rows_per_page + 1])
+        has_next = len(rows) > rows_per_page
+        rows = rows[:rows_per_page]
+        has_previous = bool(rows) and queryset.filter(pk__gt=rows[0].pk).exists()
+    return KeysetPage(rows, has_previous, has_next, estimate_count(queryset))
+
+
+def get_submissions_page(queryset, params, rows_per_page=30):
+    """
+    Page of submissions requested by the GET `params`: a KeysetPage, or
+    a classic page when the (old style) `page` parameter is given.
+    """
+    if params.get("page"):
+        return get_paginator(queryset, rows_per_page, params.get("page"))
+    return get_keyset_page(
+        queryset, rows_per_page, params.get("before"), params.get("after")
+    )
+
+
 def filter_submissions(
     user_who_request,
     problem=None,
@@ -78,7 +177,7 @@ def filter_submissions(
         query["username"] = username  # no encode needed
 
     try:
-        result = Result.objects.get(pk=result)
+        result = get_result_by_id(result)
         if user_who_request.is_authenticated:
             if is_admin_or_judge_or_observer_for_contest(user_who_request, contest):
                 queryset = queryset.filter(result=result)
@@ -100,6 +199,16 @@ def filter_submissions(
         queryset = queryset.filter(compiler__language=language)
         query["language"] = language  # encode back
 
+    # Everything shown in the submissions list
+    queryset = queryset.select_related(
+        "problem__contest",
+        "user__profile",
+        "result",
+        "compiler",
+        "instance__team",
+        "instance__contest",
+    )
+
     return queryset.order_by("-pk"), query
 
 
@@ -144,3 +253,35 @@ def get_contest_json(contest, group=None):
     runs.sort(key=lambda r: r["timeMinutesFromStart"])
     result["runs"] = runs
     return result
+
+
+class ZipStream(object):
+    """Unseekable file collecting what `zipfile` writes, to stream it"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_zip(files):
+    """
+    Yield the content of a ZIP file with the (name, content) pairs of
+    `files` as it's written, entry by entry.
+    """
+    stream = ZipStream()
+    with zipfile.ZipFile(stream, "w") as archive:
+        for name, content in files:
+            archive.writestr(name, content)
+            yield stream.pop()
+    yield stream.pop()
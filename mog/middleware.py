@@ -1,3 +1,10 @@
+import time
+
+from django.db import connection
+
+from api.lib import metrics
+
+
 class AddNeverCacheHeadersMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
@@ -7,3 +14,27 @@ class AddNeverCacheHeadersMiddleware:
         response["Expires"] = "Thu, 01 Jan 1970 00:00:00 GMT"
         response["Cache-Control"] = "no-cache, no-store, must-revalidate,max-age=0"
         return response
+
+
+class MetricsMiddleware:
+    """
+    Record the time spent by every request, and the number of database
+    queries it executed and the time spent on them (see api/lib/metrics.py).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        query_timer = metrics.QueryTimer()
+        start = time.monotonic()
+        status = None
+        try:
+            with connection.execute_wrapper(query_timer):
+                response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            metrics.observe_request(
+                request, status, time.monotonic() - start, query_timer
+            )
@@ -5,10 +5,17 @@ The formulas are taken from https://codeforces.com/blog/entry/20762
 
 from math import sqrt
 
+from django.db import transaction
+
 from judge import settings
-from api.models import RatingChange
+from api.models import RatingChange, UserProfile
 from api.lib.queries import calculate_standing
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 
 def win_probability(rating1, rating2):
     """
@@ -73,6 +80,16 @@ def reassign_ranks(ranks):
 
 
 def check_rating_deltas(ranks, ratings, deltas):
+    """
+    Checks if the rating deltas are consistent, see check_rating_deltas_reference.
+    Uses the NumPy implementation when NumPy is installed.
+    """
+    if np is not None:
+        return check_rating_deltas_numpy(ranks, ratings, deltas)
+    return check_rating_deltas_reference(ranks, ratings, deltas)
+
+
+def check_rating_deltas_reference(ranks, ratings, deltas):
     """
     Checks (independently of the rating method used) if the rating deltas are consistent, which means that the
     following conditions must me satisfied:
@@ -117,6 +134,17 @@ def check_rating_deltas(ranks, ratings, deltas):
 
 
 def get_rating_deltas(ranks, ratings):
+    """
+    Gets the deltas for updating the ratings of the users after a contests, see
+    get_rating_deltas_reference. Uses the NumPy implementation when NumPy is
+    installed, both implementations return exactly the same deltas and seeds.
+    """
+    if np is not None:
+        return get_rating_deltas_numpy(ranks, ratings)
+    return get_rating_deltas_reference(ranks, ratings)
+
+
+def get_rating_deltas_reference(ranks, ratings):
     """
     Gets the deltas for updating the ratings of the users after a contests
     :param ranks: Ranks of the users in the contest (must be non-decreasing)
@@ -151,6 +179,118 @@ def get_rating_deltas(ranks, ratings):
     return deltas, seeds
 
 
+def get_win_probability_table(low, high):
+    """
+    Returns (table, offset) such that table[d + offset] == win_probability(0, d)
+    for every integer rating difference low <= d <= high. Probabilities are
+    computed with win_probability itself so results match the reference
+    implementation bit by bit (vectorized powers may differ in the last bit).
+    """
+    table = np.array([win_probability(0, d) for d in range(low, high + 1)])
+    return table, -low
+
+
+def get_seeds_numpy(ratings, actual_ratings, table, offset):
+    """
+    Computes, for every user i, get_seed(other_ratings, actual_ratings[i]) where
+    other_ratings are the ratings of all users but i. Probabilities are added up
+    in the same order as get_seed (adding 0.0 for i itself is exact), so seeds
+    are bit-identical to the reference implementation.
+    """
+    result = np.ones(len(ratings))
+    for j, rating in enumerate(ratings):
+        probabilities = table[actual_ratings - rating + offset]
+        probabilities[j] = 0.0
+        result += probabilities
+    return result
+
+
+def get_rating_deltas_numpy(ranks, ratings):
+    """
+    Same as get_rating_deltas_reference, but computing the seeds of all users at
+    once and running the binary searches of get_rating_for_rank for all users in
+    lockstep.
+    """
+    num_coders = len(ranks)
+    if num_coders == 0:
+        return [], []
+
+    ranks = np.array(reassign_ranks(ranks), dtype=np.float64)
+    ratings = np.array(ratings, dtype=np.int64)
+
+    # Differences between a rating in [1, MAX_RATING] and the rating of a user
+    low = min(1, int(ratings.min())) - int(ratings.max())
+    high = max(settings.MAX_RATING, int(ratings.max())) - int(ratings.min())
+    table, offset = get_win_probability_table(low, high)
+
+    seeds = get_seeds_numpy(ratings, ratings, table, offset)
+    mean_ranks = np.sqrt(seeds * ranks)
+
+    left = np.ones(num_coders, dtype=np.int64)
+    right = np.full(num_coders, settings.MAX_RATING, dtype=np.int64)
+    active = right - left > 1
+    while active.any():
+        mid = (left + right) // 2
+        lower = get_seeds_numpy(ratings, mid, table, offset) < mean_ranks
+        right = np.where(active & lower, mid, right)
+        left = np.where(active & ~lower, mid, left)
+        active = right - left > 1
+
+    deltas = (left - ratings) // 2
+    return deltas.tolist(), seeds.tolist()
+
+
+def check_rating_deltas_numpy(ranks, ratings, deltas, block_size=1024):
+    """
+    Same as check_rating_deltas_reference, comparing blocks of users against
+    all the users after them at once.
+    """
+    num_coders = len(ranks)
+    ranks = np.array(ranks)
+    ratings = np.array(ratings, dtype=np.int64)
+    deltas = np.array(deltas, dtype=np.int64)
+    new_ratings = ratings + deltas
+
+    # Check conditions c) and d)
+    if ((ranks == num_coders) & (deltas > 0)).any():
+        return False
+    if ((new_ratings < 1) | (new_ratings >= settings.MAX_RATING)).any():
+        return False
+
+    # Check conditions a) and b) for every pair i < j
+    indexes = np.arange(num_coders)
+    for start in range(0, num_coders, block_size):
+        i = indexes[start : start + block_size, None]
+        after = indexes[None, :] > i
+        rating_i, rating_j = ratings[i], ratings[None, :]
+        if (after & (rating_i >= rating_j) & (new_ratings[i] < new_ratings)).any():
+            return False
+        if (after & (rating_i <= rating_j) & (deltas[i] < deltas)).any():
+            return False
+
+    return True
+
+
+def remove_rating_changes(contest):
+    """
+    Removes the RatingChanges of a contest and updates the ratings of the affected users
+    """
+    profile_ids = list(contest.rating_changes.values_list("profile_id", flat=True))
+    contest.rating_changes.all().delete()
+    UserProfile.update_ratings(UserProfile.objects.filter(pk__in=profile_ids))
+
+
+@transaction.atomic
+def unset_ratings(contest):
+    """
+    Removes the RatingChanges of a contest and marks it as not rated
+    """
+    remove_rating_changes(contest)
+    contest.rated = False
+    contest.save()
+
+
+@transaction.atomic
 def set_ratings(contest):
     """
     Rates a contest. If everything goes well, adds to the database the RatingChanges that correspond to the
@@ -159,7 +299,7 @@ def set_ratings(contest):
     :return: True if the rating was applied. False if after computing the new rating some of the checks failed
     """
     # remove previous rating changes
-    contest.rating_changes.all().delete()
+    remove_rating_changes(contest)
 
     _, instance_results = calculate_standing(contest)
 
@@ -168,13 +308,17 @@ def set_ratings(contest):
         result for result in instance_results if result.submissions_count > 0
     ]
 
+    # profiles in the standing might be cached, read their current rating
+    current_ratings = dict(
+        UserProfile.objects.filter(
+            pk__in=[ir.instance.user_id for ir in instance_results],
+            rated_contests__gt=0,
+        ).values_list("pk", "current_rating")
+    )
+
     ratings, ranks = [], []
     for ir in instance_results:
-        profile = ir.instance.user.profile
-        if profile.has_rating:
-            ratings.append(profile.rating)
-        else:
-            ratings.append(settings.BASE_RATING)
+        ratings.append(current_ratings.get(ir.instance.user_id, settings.BASE_RATING))
         ranks.append(ir.rank)
 
     deltas, seeds = get_rating_deltas(ranks, ratings)
@@ -194,6 +338,12 @@ def set_ratings(contest):
             seed=seeds[i],
         )
 
+    UserProfile.update_ratings(
+        UserProfile.objects.filter(
+            pk__in=[ir.instance.user_id for ir in instance_results]
+        )
+    )
+
     contest.rated = True
     contest.save()
 
@@ -1,8 +1,11 @@
 import os
 import json
+import tempfile
 
 from django.conf import settings
 
+from api.lib.test_manifest import invalidate_manifest
+
 
 def get_extension(folder):
     if folder == "inputs" or folder == "sample inputs":
@@ -33,7 +36,8 @@ def get_tests(problem, folder):
         path = os.path.join(settings.PROBLEMS_FOLDER, str(problem.id), folder)
         if not os.path.exists(path) or not os.path.isdir(path):
             return []
-        return sorted(os.listdir(path))
+        # Dot files are temporary files of uploads in progress
+        return sorted(name for name in os.listdir(path) if not name.startswith("."))
 
     if folder in ["sample inputs", "sample outputs"]:
         samples = parse_samples_json(problem.samples)
@@ -54,10 +58,17 @@ def handle_tests(problem, files, folder):
             return
         for incoming_file in files:
             name = incoming_file.name.replace(" ", "_")  # grader issues
-            with open(os.path.join(path, name), "wb+") as f:
+            # Written aside and renamed, so graders never read partial
+            # files and the folder modification time changes.
+            fd, tmp = tempfile.mkstemp(prefix=".upload-", dir=path)
+            with os.fdopen(fd, "wb") as f:
                 for chunk in incoming_file.chunks():
                     f.write(chunk)
+            os.chmod(tmp, 0o644)
+            os.rename(tmp, os.path.join(path, name))
             incoming_file.close()
+        if files:
+            invalidate_manifest(problem.id)
 
     if folder in ["sample inputs", "sample outputs"]:
         samples_json = parse_samples_json(problem.samples)
@@ -79,6 +90,7 @@ def handle_remove_test(problem, folder, test):
         path = os.path.join(settings.PROBLEMS_FOLDER, str(problem.id), folder, test)
         try:
             os.remove(path)
+            invalidate_manifest(problem.id)
             return True
         except OSError:
             pass
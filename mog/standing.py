@@ -1,4 +1,5 @@
 from api.models import Submission
+from mog.submission_events import load_submission_events
 
 
 COMPETITION_FASTEST = "competition-fastest"
@@ -109,6 +110,8 @@ class ParticipantResult(object):
 
         # Participant instance.
         self.participant = participant
+        # Start date of the participant (differs for virtual participants).
+        self.start_date = contest_start_date
         self.problem_results = [
             ProblemResult(self, contest_start_date) for _ in problem_mapping
         ]
@@ -138,7 +141,7 @@ def get_relevant_standing_data(contest, virtual=False, group=None, bypass_frozen
     """
     # Submissions
 
-    submissions = Submission.objects.select_related("result").filter(
+    submissions = Submission.objects.filter(
         instance__contest__id=contest.id, hidden=False
     )
 
@@ -148,7 +151,7 @@ def get_relevant_standing_data(contest, virtual=False, group=None, bypass_frozen
     if group:
         submissions = submissions.filter(instance__group=group)
 
-    submissions = list(submissions.order_by("date"))
+    submissions = load_submission_events(submissions.order_by("date", "id"))
 
     # Participants
     participants = contest.instances.select_related(
@@ -201,7 +204,7 @@ def calculate_standing_new(
             return +1
 
         if viewer_instance and not viewer_instance.real:
-            delta = submission.date - submission.instance.instance_start_date
+            delta = submission.date - standing[submission.instance_id].start_date
             if delta > viewer_instance_relative_time:
                 # For virtual participants don't show submissions that haven't
                 # passed according to its relative time in the contest.
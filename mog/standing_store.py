@@ -0,0 +1,267 @@
+"""
+Incremental standings for the normal (non virtual, not bypassing the
+frozen time) standing of a contest.
+
+`calculate_standing_new` reloads every submission of the contest and
+replays all of them on each call. A `StandingStore` is built once and
+then kept up to date by applying submission changes as deltas:
+
++ New, rejudged or re-graded submissions only rebuild the row of the
+  participant who sent them (and the rows of the participants that lose
+  or gain a "first solve" flag because of the change).
++ Participants are kept in sorted lists of keys (`SortedList`), so
+  re-ranking a row after an update takes logarithmic time instead of
+  sorting everything.
+
+`refresh` only reloads the submissions logged in `SubmissionChange` (by
+a database trigger) since the last refresh, with a compact query (no
+source code or judgement details), and applies the rows that differ
+from the ones already in the store. The output of `standing` is the
+same as `calculate_standing_new(contest, False, None, group, False)`.
+"""
+
+import datetime
+import threading
+
+from django.utils import timezone
+from sortedcontainers import SortedList
+
+from api.lib import constants
+from api.models import Submission, SubmissionChange
+from mog.standing import (
+    COMPETITION_FASTEST,
+    PENDING_SUBMISSION,
+    PROBLEM_FASTEST,
+    ParticipantResult,
+)
+from mog.submission_events import load_submission_events
+
+
+def participant_key(participant_result):
+    """Same sorting criteria used in `calculate_standing_new`"""
+    return (
+        -participant_result.solved,
+        participant_result.penalty,
+        participant_result.last_accepted_delta,
+    )
+
+
+class StandingStore(object):
+    def __init__(self, contest, group=None):
+        self.contest = contest
+        self.group = group
+        self._lock = threading.Lock()
+
+        problems = list(contest.problems.order_by("position"))
+        participants = contest.instances.select_related(
+            "team__institution__country", "user__profile__institution__country"
+        ).filter(real=True)
+        if group:
+            participants = participants.filter(group=group)
+
+        self.problems = problems
+        self._problem_mapping = {problem.id: ix for ix, problem in enumerate(problems)}
+        self._participants = {
+            participant.id: participant for participant in participants
+        }
+
+        # submission id -> SubmissionEvent
+        self._events = {}
+        # instance id -> {submission id -> SubmissionEvent}
+        self._events_by_participant = {pid: {} for pid in self._participants}
+        # problem id -> {submission id -> SubmissionEvent} (normal & accepted only)
+        self._accepted_by_problem = {problem.id: {} for problem in problems}
+        # problem id -> first normal accepted submission id
+        self._problem_first = {}
+        self._competition_first = None
+
+        self._rows = {}
+        # Sorted keys (with and without the instance id as tie-breaker)
+        self._keys = SortedList()
+        self._ordered_keys = SortedList()
+
+        self.stale = False
+
+        # Changes logged since then are applied by `refresh`
+        self._since = timezone.now()
+        for event in self.load_events():
+            self._add_event(event)
+        self._update_firsts(set(self._accepted_by_problem))
+        for participant_id in self._participants:
+            self._rebuild_row(participant_id)
+
+    def get_submissions(self):
+        submissions = Submission.objects.filter(
+            instance__contest__id=self.contest.id, hidden=False, instance__real=True
+        )
+        if self.group:
+            submissions = submissions.filter(instance__group=self.group)
+        return submissions
+
+    def load_events(self):
+        return load_submission_events(self.get_submissions())
+
+    def get_changed_submission_ids(self):
+        """
+        Ids of the submissions of the contest changed since the last
+        call. Changes are dated by the database when their transaction
+        started, so the last STANDING_CHANGES_OVERLAP seconds are read
+        again to catch transactions committed late.
+        """
+        since, self._since = self._since, timezone.now()
+        overlap = datetime.timedelta(seconds=constants.STANDING_CHANGES_OVERLAP)
+        return set(
+            SubmissionChange.objects.filter(
+                contest_id=self.contest.id, date__gte=since - overlap
+            ).values_list("submission_id", flat=True)
+        )
+
+    def _add_event(self, event):
+        if (
+            event.instance_id not in self._participants
+            or event.problem_id not in self._problem_mapping
+        ):
+            # Participant registered (or problem added) after this store
+            # was built, it should be rebuilt from scratch.
+            self.stale = True
+            return
+        self._events[event.id] = event
+        self._events_by_participant[event.instance_id][event.id] = event
+        if event.is_visible_accepted:
+            self._accepted_by_problem[event.problem_id][event.id] = event
+
+    def _remove_event(self, submission_id):
+        event = self._events.pop(submission_id)
+        del self._events_by_participant[event.instance_id][submission_id]
+        self._accepted_by_problem[event.problem_id].pop(submission_id, None)
+        return event
+
+    def _first_solvers(self):
+        """(flag, submission id, instance id) of every first solve"""
+        firsts = {
+            ("problem", pk, self._events[pk].instance_id)
+            for pk in self._problem_first.values()
+        }
+        if self._competition_first is not None:
+            pk = self._competition_first
+            firsts.add(("competition", pk, self._events[pk].instance_id))
+        return firsts
+
+    def _update_firsts(self, problem_ids):
+        for problem_id in problem_ids:
+            accepted = self._accepted_by_problem[problem_id]
+            if accepted:
+                first = min(accepted.values(), key=lambda event: event.order)
+                self._problem_first[problem_id] = first.id
+            else:
+                self._problem_first.pop(problem_id, None)
+        firsts = [self._events[pk] for pk in self._problem_first.values()]
+        self._competition_first = (
+            min(firsts, key=lambda event: event.order).id if firsts else None
+        )
+
+    def _relevance(self, event):
+        """See `submission_relevance` in `calculate_standing_new`"""
+        if event.is_pending:
+            return -1
+        return +1 if event.is_normal else 0
+
+    def _rebuild_row(self, participant_id):
+        old = self._rows.get(participant_id)
+        if old is not None:
+            self._discard_key(old)
+
+        participant = self._participants[participant_id]
+        row = ParticipantResult(
+            participant, self._problem_mapping, participant.instance_start_date
+        )
+        events = sorted(
+            self._events_by_participant[participant_id].values(),
+            key=lambda event: event.order,
+        )
+        for event in events:
+            relevance = self._relevance(event)
+            if relevance == -1:
+                continue
+            info = {}
+            if relevance == 0:
+                info[PENDING_SUBMISSION] = True
+            elif event.is_accepted:
+                if event.id == self._competition_first:
+                    info[COMPETITION_FASTEST] = True
+                if event.id == self._problem_first.get(event.problem_id):
+                    info[PROBLEM_FASTEST] = True
+            row.add_submission(event, info)
+
+        self._rows[participant_id] = row
+        key = participant_key(row)
+        self._keys.add(key)
+        self._ordered_keys.add(key + (participant_id,))
+
+    def _discard_key(self, row):
+        key = participant_key(row)
+        self._keys.remove(key)
+        self._ordered_keys.remove(key + (row.participant.id,))
+
+    def apply(self, events=(), removed=()):
+        """
+        Apply a batch of new/changed submissions (`events`) and removed
+        submission ids (hidden or deleted submissions).
+        """
+        with self._lock:
+            before = self._first_solvers()
+            touched_participants = set()
+            touched_problems = set()
+            for submission_id in removed:
+                if submission_id in self._events:
+                    event = self._remove_event(submission_id)
+                    touched_participants.add(event.instance_id)
+                    touched_problems.add(event.problem_id)
+            for event in events:
+                if event.id in self._events:
+                    old = self._remove_event(event.id)
+                    touched_participants.add(old.instance_id)
+                    touched_problems.add(old.problem_id)
+                self._add_event(event)
+                if event.id in self._events:
+                    touched_participants.add(event.instance_id)
+                    touched_problems.add(event.problem_id)
+            if touched_problems:
+                self._update_firsts(touched_problems)
+                for _, _, participant_id in before ^ self._first_solvers():
+                    touched_participants.add(participant_id)
+            for participant_id in touched_participants:
+                self._rebuild_row(participant_id)
+
+    def refresh(self):
+        """Pull the changed submissions from the database and apply them"""
+        changed_ids = self.get_changed_submission_ids()
+        if not changed_ids:
+            return
+        current = {
+            event.id: event
+            for event in load_submission_events(
+                self.get_submissions().filter(id__in=changed_ids)
+            )
+        }
+        changed = [
+            event
+            for pk, event in current.items()
+            if pk not in self._events or self._events[pk].row != event.row
+        ]
+        # Hidden, deleted or moved out of the contest (or group)
+        removed = [pk for pk in changed_ids if pk in self._events and pk not in current]
+        if changed or removed:
+            self.apply(changed, removed)
+
+    def rank_of(self, participant_id):
+        """Rank of a participant: one plus the number of strictly better rows"""
+        return self._keys.bisect_left(participant_key(self._rows[participant_id])) + 1
+
+    def standing(self):
+        """Return (problems, participant results) as `calculate_standing_new`"""
+        with self._lock:
+            participants_result = [self._rows[key[-1]] for key in self._ordered_keys]
+            for row in participants_result:
+                row.rank = self._keys.bisect_left(participant_key(row)) + 1
+            return list(self.problems), participants_result
@@ -16,12 +16,14 @@ For more details see: http://www.csc.kth.se/~austrin/icpc/finals2019solutions.pd
 from api.models import Submission, Problem
 from json import dumps
 
+from mog.submission_events import load_submission_events
+
 
 def get_contest_stats(contest):
-    problems = Problem.objects.filter(contest_id=contest.id)
+    problems = list(Problem.objects.filter(contest_id=contest.id))
 
-    submissions = Submission.objects.select_related("result").filter(
-        problem__contest__id=contest.id
+    submissions = load_submission_events(
+        Submission.objects.filter(problem__contest__id=contest.id), details=True
     )
 
     contest_start = contest.start_date
@@ -43,15 +45,17 @@ def get_contest_stats(contest):
 
     info.sort(key=lambda x: x["position"])
 
+    positions = {prob.id: prob.position for prob in problems}
+
     interesting = {"Accepted", "Wrong Answer", "Time Limit Exceeded", "Runtime Error"}
 
     for sub in submissions:
-        position = sub.problem.position - 1
+        position = positions[sub.problem_id] - 1
 
         if sub.hidden:
             if str(sub.result) == "Accepted":
                 info[position]["shortest_code_judge"] = min(
-                    info[position]["shortest_code_judge"], len(sub.source)
+                    info[position]["shortest_code_judge"], sub.source_length
                 )
 
             # Ignore hidden solutions
@@ -64,16 +68,16 @@ def get_contest_stats(contest):
         minutes = int((sub.date - contest_start).total_seconds() / 60)
 
         if str(sub.result) == "Accepted":
-            info[position]["accepted"].add(sub.user.id)
+            info[position]["accepted"].add(sub.user_id)
             info[position]["shortest_code_participant"] = min(
-                info[position]["shortest_code_participant"], len(sub.source)
+                info[position]["shortest_code_participant"], sub.source_length
             )
             info[position]["first_solve"] = min(info[position]["first_solve"], minutes)
 
         if str(sub.result) in interesting:
-            info[position]["tried"].add(sub.user.id)
+            info[position]["tried"].add(sub.user_id)
             info[position]["submissions"].append(
-                (minutes, str(sub.result), sub.compiler.language)
+                (minutes, str(sub.result), sub.language)
             )
 
     for prob in info:
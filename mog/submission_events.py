@@ -0,0 +1,106 @@
+"""
+Compact loading of submissions for standings and statistics.
+
+Building a standing (or the statistics of a contest) only needs a few
+columns of every submission, but loading `Submission` objects brings
+the `source` and `judgement_details` text fields along, and accessing
+`problem`, `user` or `compiler` hits the database once per row.
+
+`load_submission_events` fetches only the needed columns with a single
+`values_list` query and wraps every row in a `SubmissionEvent`, which
+behaves like a `Submission` for the standing state machines. Results
+are taken from the in-process registry (see api/lib/results.py).
+"""
+
+from django.db.models.functions import Length
+
+from api.lib.results import get_result_by_id
+
+
+EVENT_FIELDS = ("id", "date", "problem_id", "instance_id", "result_id", "status")
+
+# Extra columns used by contest statistics.
+DETAILS_FIELDS = ("user_id", "hidden", "compiler__language", "source_length")
+
+
+class SubmissionEvent(object):
+    """
+    Minimal stand-in of a `Submission` with everything the standing
+    state machines (and contest statistics) need to know about it.
+    """
+
+    __slots__ = [
+        "id",
+        "date",
+        "problem_id",
+        "instance_id",
+        "result",
+        "status",
+        "user_id",
+        "hidden",
+        "language",
+        "source_length",
+    ]
+
+    def __init__(
+        self,
+        id,
+        date,
+        problem_id,
+        instance_id,
+        result_id,
+        status,
+        user_id=None,
+        hidden=False,
+        language=None,
+        source_length=None,
+    ):
+        self.id = id
+        self.date = date
+        self.problem_id = problem_id
+        self.instance_id = instance_id
+        self.result = get_result_by_id(result_id)
+        self.status = status
+        self.user_id = user_id
+        self.hidden = hidden
+        self.language = language
+        self.source_length = source_length
+
+    @property
+    def order(self):
+        return self.date, self.id
+
+    @property
+    def row(self):
+        return self.date, self.problem_id, self.instance_id, self.result.id, self.status
+
+    @property
+    def is_accepted(self):
+        return self.result.name == "Accepted"
+
+    @property
+    def is_pending(self):
+        return self.result.name == "Pending"
+
+    @property
+    def is_normal(self):
+        return self.status == "normal"
+
+    @property
+    def is_visible_accepted(self):
+        """Accepted submissions that count to find first solvers"""
+        return self.is_accepted and self.is_normal
+
+
+def load_submission_events(submissions, details=False):
+    """
+    Load `submissions` (a Submission queryset) as a list of
+    SubmissionEvent. With `details` the user, hidden flag, compiler
+    language and source length (computed by the database) are loaded as
+    well.
+    """
+    fields = EVENT_FIELDS
+    if details:
+        submissions = submissions.annotate(source_length=Length("source"))
+        fields += DETAILS_FIELDS
+    return [SubmissionEvent(*row) for row in submissions.values_list(*fields)]
@@ -0,0 +1,27 @@
+import time
+
+from django.template.backends.django import DjangoTemplates, Template
+
+from api.lib import metrics
+
+
+class InstrumentedTemplate(Template):
+    def render(self, context=None, request=None):
+        start = time.monotonic()
+        try:
+            return super(InstrumentedTemplate, self).render(context, request)
+        finally:
+            metrics.observe_template_render(
+                self.origin.template_name, time.monotonic() - start
+            )
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """Django templates backend recording the render time of each template"""
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super(InstrumentedDjangoTemplates, self).get_template(template_name)
+        return InstrumentedTemplate(template.template, self)
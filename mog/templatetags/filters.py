@@ -8,6 +8,7 @@ from django.utils.safestring import mark_safe
 import humanize
 import pytz
 
+from api.lib.results import get_result
 from api.models import Division, Result
 import api.utils as api_utils
 
@@ -46,11 +47,7 @@ def date_url(date):
 
 @register.filter()
 def rating(user):
-    result = cache.get(user.id)
-    if result is None:
-        result = user.profile.rating if hasattr(user, "profile") else 0
-        cache.set(user.id, result, 5 * 60)  # 5 minutes
-    return result
+    return user.profile.rating if hasattr(user, "profile") else 0
 
 
 @register.filter()
@@ -82,6 +79,7 @@ def user_stats(user):
         "solved": 0,
         "accepted": 0,
         "submissions": 0,
+        "last_submission": None,
     }
     if hasattr(user, "profile"):
         profile = user.profile
@@ -90,6 +88,7 @@ def user_stats(user):
         data["solved"] = profile.solved_problems
         data["accepted"] = profile.accepted_submissions
         data["submissions"] = profile.total_submissions
+        data["last_submission"] = profile.last_submission_date
     return data
 
 
@@ -225,13 +224,10 @@ def format_minutes(delta):
 
 @register.filter()
 def result_by_name(name):
-    results = cache.get("results")
-    if results is None:
-        results = {}
-        for result in Result.objects.all():
-            results[result.name.lower()] = result.id
-        cache.set("results", results)
-    return results.get(name)
+    try:
+        return get_result(name).id
+    except Result.DoesNotExist:
+        return None
 
 
 @register.filter()
@@ -1,18 +1,53 @@
 import urllib.parse
 
 from django import template
-from django.utils.html import mark_safe
+from django.utils.html import escape, mark_safe
+from django.utils.translation import ugettext as _
+
+from mog.helpers import KeysetPage
 
 register = template.Library()
 
 
 def encode_parameters(page_number, query):
+    return encode_query(query, page=page_number)
+
+
+def encode_query(query, **parameters):
     query = dict((k, v.encode("utf8")) for k, v in query.items())
-    return "?" + urllib.parse.urlencode(dict(query, page=page_number))
+    return "?" + urllib.parse.urlencode(dict(query, **parameters))
+
+
+def keyset_paginate(page, query):
+    html = '<ul class="pagination">'
+    html += '<li class="{0}"><a href="{1}">&#171</a></li>'.format(
+        "" if page.has_previous() else "disabled",
+        (
+            encode_query(query, after=page.previous_cursor)
+            if page.has_previous()
+            else "#"
+        ),
+    )
+    html += '<li class="{0}"><a href="{1}">{2}</a></li>'.format(
+        "" if page.has_previous() else "active",
+        encode_query(query),
+        escape(_("Newest")),
+    )
+    html += '<li class="disabled"><a>{0}</a></li>'.format(
+        escape(_("~%d in total") % page.count)
+    )
+    html += '<li class="{0}"><a href="{1}">&#187</a></li>'.format(
+        "" if page.has_next() else "disabled",
+        encode_query(query, before=page.next_cursor) if page.has_next() else "#",
+    )
+    html += "</ul>"
+    return mark_safe(html)
 
 
 @register.filter(needs_autoscape=True)
 def paginate(page, query=None):
+    if isinstance(page, KeysetPage):
+        return keyset_paginate(page, query or {})
     paginator = page.paginator
     footer = min(10, paginator.num_pages)
     first = footer * ((page.number - 1) // footer) + 1
@@ -1,5 +1,9 @@
 from django import template
 from mog.gating import (
+    CAN_REJUDGE,
+    CAN_SEE_DETAILS,
+    CAN_SEE_SOURCE,
+    get_submissions_permissions,
     is_admin_or_judge_for_problem,
     user_is_admin,
     user_is_judge_in_contest,
@@ -34,6 +38,23 @@ def can_rejudge(user, submission):
     return submission.can_be_rejudged_by(user)
 
 
+@register.filter()
+def submissions_permissions(user, submissions):
+    """Permissions of @user over a list of submissions, read them with
+    `capabilities_of`"""
+    return get_submissions_permissions(user, submissions)
+
+
+@register.filter()
+def capabilities_of(permissions, submission):
+    flags = permissions.get(submission.id, 0)
+    return {
+        "source": bool(flags & CAN_SEE_SOURCE),
+        "details": bool(flags & CAN_SEE_DETAILS),
+        "rejudge": bool(flags & CAN_REJUDGE),
+    }
+
+
 @register.filter()
 def can_see_judgment_details_of(user, submission):
     return submission.can_show_judgment_details_to(user)
@@ -6,6 +6,7 @@ app_name = "mog"
 urlpatterns = [
     url(r"^robots.txt", views.robotstxt),
     url(r"^health/$", views.health, name="health"),
+    url(r"^metrics/$", views.metrics, name="metrics"),
     url(r"^faq/$", views.faq, name="faq"),
     url(r"^privacy/$", views.privacy, name="privacy"),
     url(r"^feedback$", views.feedback_list, name="feedback_list"),
@@ -37,7 +37,7 @@ class CheckerView(View):
         if file_source is not None:
             source = file_source.read().decode("utf8")
 
-        if not source:
+        if not source and not Checker(backend=backend or "").is_builtin:
             msg = _("Empty source code")
             messages.info(request, msg, extra_tags="info")
             return redirect("mog:checker", problem_id=problem.id)
@@ -51,7 +51,7 @@ class CheckerView(View):
             checker = Checker(
                 name=name,
                 description=description,
-                source=source,
+                source=source or "",
                 backend=backend,
             )
             checker.save()
@@ -96,7 +96,7 @@ class CreateCheckerView(View):
         if file_source is not None:
             source = file_source.read().decode("utf8")
 
-        if not source:
+        if not source and not Checker(backend=backend or "").is_builtin:
             msg = _("Empty source code")
             messages.info(request, msg, extra_tags="info")
             return redirect("mog:create_checker")
@@ -110,7 +110,7 @@ class CreateCheckerView(View):
             checker = Checker(
                 name=name,
                 description=description,
-                source=source,
+                source=source or "",
                 backend=backend,
             )
             checker.save()
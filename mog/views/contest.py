@@ -1,5 +1,4 @@
 import csv
-import io
 import json
 import zipfile
 
@@ -9,7 +8,13 @@ from django.urls import reverse
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.db.models import Q
-from django.http import Http404, HttpResponseForbidden, HttpResponse, JsonResponse
+from django.http import (
+    Http404,
+    HttpResponseForbidden,
+    HttpResponse,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import render, get_object_or_404, redirect
 from django.utils import timezone
 from django.utils.decorators import method_decorator
@@ -49,8 +54,13 @@ from mog.gating import (
     user_can_bypass_frozen_in_contest,
     user_is_admin,
 )
-from mog.helpers import filter_submissions, get_paginator, get_contest_json
-from mog.ratings import set_ratings
+from mog.helpers import (
+    filter_submissions,
+    get_contest_json,
+    get_submissions_page,
+    stream_zip,
+)
+from mog.ratings import set_ratings, unset_ratings
 from mog.statistics import get_contest_stats
 from mog.templatetags.filters import format_minutes, rating_color, user_color
 from mog.templatetags.security import can_manage_contest
@@ -63,7 +73,10 @@ from mog.baylor.team_password import ZipTeamPassword
 from mog.baylor.utils import ICPCID_GUEST_PREFIX, CSV_PERMISSION_HEADER
 
 from .permissions import set_granted_to_permission
-from .submission import get_submission
+from .submission import get_submission_filename
+
+# Submissions fetched at once when exporting a contest
+EXPORT_CHUNK_SIZE = 500
 
 
 def contests(request):
@@ -139,12 +152,18 @@ def contest_problems(request, contest_id):
         )
         messages.warning(request, msg, extra_tags="warning secure")
 
+    # The status of every problem for the viewer is computed at once
+    problems = list(contest.problems.order_by("position"))
+    status = contest.get_problems_status(contest.registration(user))
+    for problem in problems:
+        problem.status = status[problem.id]
+
     return render(
         request,
         "mog/contest/problems.html",
         {
             "contest": contest,
-            "problems": contest.problems.order_by("position"),
+            "problems": problems,
             "can_create_problem": can_create_problem_in_contest(user, contest),
         },
     )
@@ -393,7 +412,7 @@ def contest_submissions(request, contest_id):
         result=request.GET.get("result"),
         language=request.GET.get("language"),
     )
-    submissions = get_paginator(submission_list, 30, request.GET.get("page"))
+    submissions = get_submissions_page(submission_list, request.GET)
     return render(
         request,
         "mog/contest/submissions.html",
@@ -943,6 +962,7 @@ class ContestEditView(View):
                 },
             )
         data = form.cleaned_data
+        visibility_changed = contest.visible != data["visible"]
         contest.name = data["name"]
         contest.code = data["code"]
         contest.description = data["description"]
@@ -954,6 +974,9 @@ class ContestEditView(View):
         contest.closed = data["closed"]
         contest.allow_teams = data["allow_teams"]
         contest.save()
+        if visibility_changed:
+            # Submissions made in hidden contests are not counted
+            Problem.update_submission_stats(contest.problems.all())
         return redirect("mog:contest_problems", contest_id=contest.id)
 
 
@@ -1057,9 +1080,7 @@ def unrate_contest(request, contest_id):
         msg = _("This contest cannot be unrated because it's before a rated contest")
         messages.warning(request, msg, extra_tags="warning")
         return redirect(next)
-    contest.rating_changes.all().delete()
-    contest.rated = False
-    contest.save()
+    unset_ratings(contest)
     msg = _("This contest have been unrated successfully")
     messages.success(request, msg, extra_tags="success")
     return redirect(next)
@@ -1535,28 +1556,36 @@ def contest_submissions_export(request, contest_id):
     if not user_is_admin(request.user):
         return HttpResponseForbidden()
     contest = get_object_or_404(Contest, pk=contest_id)
-    instances_id = contest.instances.values_list("id")
-    problems = contest.get_problems
 
-    try:
-        content = io.BytesIO()
-        with zipfile.ZipFile(content, "w") as zipObj:
-            for problem in problems:
-                header = "submissions_%s/%s" % (contest.name, problem.letter)
-                submissions = Submission.objects.filter(
-                    problem_id=problem.id, instance_id__in=instances_id
-                )
-                for submission in submissions:
-                    filename, source = get_submission(submission)
-                    zipObj.writestr("%s/%s" % (header, filename), source)
-        zip_submissions = content.getvalue()
-        response = HttpResponse(zip_submissions, content_type="application/zip")
-        response["Content-Disposition"] = (
-            'attachment; filename="submissions_{0}.zip"'.format(contest.name)
+    # A single query fetched in chunks (only the needed columns), and the
+    # ZIP is streamed as it's written, so memory doesn't grow with the
+    # size of the contest.
+    submissions = (
+        Submission.objects.filter(problem__contest=contest, instance__contest=contest)
+        .order_by("problem__position", "id")
+        .values_list(
+            "id",
+            "problem__position",
+            "result__name",
+            "user__username",
+            "compiler__file_extension",
+            "source",
         )
-        return response
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
 
-    except Exception as e:
-        msg = _("Error exporting submissions: " + str(e))
-        messages.error(request, msg, extra_tags="danger")
-        return HttpResponseForbidden()
+    def get_files():
+        for submission_id, position, result, username, compiler, source in submissions:
+            letter = Problem.get_letter(position)
+            filename = get_submission_filename(
+                submission_id, letter, result, username, compiler
+            )
+            yield "submissions_%s/%s/%s" % (contest.name, letter, filename), source
+
+    response = StreamingHttpResponse(
+        stream_zip(get_files()), content_type="application/zip"
+    )
+    response["Content-Disposition"] = (
+        'attachment; filename="submissions_{0}.zip"'.format(contest.name)
+    )
+    return response
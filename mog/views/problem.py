@@ -1,4 +1,5 @@
-from django.db.models import Count
+from django.db.models import Case, Count, F, FloatField, Value, When
+from django.db.models.functions import Cast
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.http import Http404, HttpResponseForbidden
@@ -188,6 +189,14 @@ class ProblemEditView(View):
         return redirect("mog:problem", problem_id=problem.id, slug=problem.slug)
 
 
+# Sort key of the problem list -> field (or annotation) sorted by
+PROBLEM_SORT_FIELDS = {
+    "points": "points",
+    "solved": "solved_count",
+    "acceptance": "acceptance",
+}
+
+
 class ProblemListView(generic.ListView):
     paginate_by = 30
     template_name = "mog/problem/index.html"
@@ -207,20 +216,30 @@ class ProblemListView(generic.ListView):
         else:
             problems = Problem.get_visible_problems(user_is_admin(self.request.user))
 
-        problems = problems.select_related("contest")
+        problems = problems.select_related("contest").prefetch_related("tags")
 
         if q:
             problems = problems.filter(title__icontains=q)
 
-        sort_name = sort_name if sort_name in ["points"] else None
+        sort_field = PROBLEM_SORT_FIELDS.get(sort_name)
+
+        if sort_field == "acceptance":
+            problems = problems.annotate(
+                acceptance=Case(
+                    When(submissions_count=0, then=Value(0.0)),
+                    default=Cast("accepted_count", FloatField())
+                    / F("submissions_count"),
+                    output_field=FloatField(),
+                )
+            )
 
         order_by = []
 
-        if sort_name:
+        if sort_field:
             if sort_mode == "asc":
-                order_by.append(sort_name)
+                order_by.append(sort_field)
             elif sort_mode == "desc":
-                order_by.append("-" + sort_name)
+                order_by.append("-" + sort_field)
 
         order_by.append("-contest__start_date")
         order_by.append("position")
@@ -243,7 +262,7 @@ class ProblemListView(generic.ListView):
         sort = self.request.GET["sort"] if "sort" in self.request.GET else None
         mode = self.request.GET["mode"] if "mode" in self.request.GET else None
 
-        if sort in ["points"] and mode in ["asc", "desc"]:
+        if sort in PROBLEM_SORT_FIELDS and mode in ["asc", "desc"]:
             query["sort"] = sort
             query["mode"] = mode
 
@@ -12,8 +12,10 @@ from django.utils.decorators import method_decorator
 from django.views import View
 from django.utils.translation import ugettext_lazy as _
 
+from api.lib.dispatch import notify_pending_submission
+from api.lib.results import get_result
 from api.models import Submission, Compiler, Problem, Result
-from mog.helpers import filter_submissions, get_paginator
+from mog.helpers import filter_submissions, get_submissions_page
 
 from mog.gating import (
     contest_actions_are_blocked_for_user,
@@ -31,7 +33,7 @@ def submissions(request):
         result=request.GET.get("result"),
         language=request.GET.get("language"),
     )
-    submissions = get_paginator(submission_list, 30, request.GET.get("page"))
+    submissions = get_submissions_page(submission_list, request.GET)
     return render(
         request,
         "mog/submission/index.html",
@@ -208,7 +210,7 @@ class Submit(View):
             source=source,
             user=request.user,
             compiler=compiler,
-            result=Result.objects.get(name__iexact="pending"),
+            result=get_result("pending"),
             instance=instance,
             date=date,
             status=status,
@@ -218,6 +220,7 @@ class Submit(View):
         ):
             submission.hidden = True
         submission.save()
+        notify_pending_submission(submission.id)
 
         # Set default compiler after a submission
         if hasattr(request.user, "profile"):
@@ -250,36 +253,32 @@ def rejudge(request, submission_id):
             msg = _("Cannot rejudge submission: It is currently in grading process.")
             messages.info(request, msg, extra_tags="warning")
         else:
-            submission.result = Result.objects.get(name__iexact="pending")
+            submission.result = get_result("pending")
             submission.save()
+            notify_pending_submission(submission.id)
 
     # TODO: Find a better way to redirect to previous page.
     return redirect(request.META.get("HTTP_REFERER", "/"))
 
 
-def get_submission(submission):
-    RESULT_VERDICT = {
-        "Accepted": "AC",
-        "Wrong Answer": "WA",
-        "Time Limit Exceeded": "TLE",
-        "Internal Error": "IE",
-        "Memory Limit Exceeded": "MLE",
-        "Runtime Error": "RTE",
-        "Compilation Error": "CTE",
-        "Idleness Limit Exceeded": "ILE",
-    }
-    submission_id = submission.pk
-    problem_letter = submission.problem.letter
-    result = submission.result.name
+RESULT_VERDICT = {
+    "Accepted": "AC",
+    "Wrong Answer": "WA",
+    "Time Limit Exceeded": "TLE",
+    "Internal Error": "IE",
+    "Memory Limit Exceeded": "MLE",
+    "Runtime Error": "RTE",
+    "Compilation Error": "CTE",
+    "Idleness Limit Exceeded": "ILE",
+}
+
+
+def get_submission_filename(submission_id, problem_letter, result, username, compiler):
     verdict = RESULT_VERDICT[result] if result in RESULT_VERDICT else "?"
-    username = submission.user.username
-    compiler = submission.compiler.file_extension
-    source = submission.source
-    filename = "%s_%s_%s_%s.%s" % (
+    return "%s_%s_%s_%s.%s" % (
         submission_id,
         verdict,
         problem_letter,
         username,
         compiler,
     )
-    return filename, source
@@ -1,13 +1,17 @@
+import hmac
+
+from django.conf import settings
 from django.core.paginator import (
     EmptyPage,
     PageNotAnInteger,
     Paginator,
 )
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
 from django.template.loader import render_to_string
 from django.views.decorators.cache import cache_page
 
+from api.lib.metrics import render_metrics
 from api.models import Post
 
 
@@ -40,6 +44,15 @@ def health(request):
     return HttpResponse("OK")
 
 
+def metrics(request):
+    """Prometheus metrics, for requests with the `METRICS_TOKEN` bearer token"""
+    expected = "Bearer %s" % settings.METRICS_TOKEN
+    received = request.META.get("HTTP_AUTHORIZATION", "")
+    if not settings.METRICS_TOKEN or not hmac.compare_digest(received, expected):
+        raise Http404()
+    return HttpResponse(render_metrics(), content_type="text/plain; version=0.0.4")
+
+
 @cache_page(24 * 60 * 60)
 def robotstxt(request):
     content = render_to_string("mog/robots.txt")
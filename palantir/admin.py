@@ -1,7 +1,22 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
 from django.db.models import Q
+from django.utils.functional import cached_property
 
 import palantir.models as palantir_models
+from palantir.maintenance import get_estimated_access_log_count
+
+
+class EstimatedCountPaginator(Paginator):
+    """Take the number of unfiltered logs from the table statistics"""
+
+    @cached_property
+    def count(self):
+        if not self.object_list.query.where:
+            estimated = get_estimated_access_log_count()
+            if estimated:
+                return estimated
+        return super(EstimatedCountPaginator, self).count
 
 
 class AccessLogAdmin(admin.ModelAdmin):
@@ -28,13 +43,38 @@ class AccessLogAdmin(admin.ModelAdmin):
         "pk",
         "user",
         "slug",
+        "method",
+        "status",
+        "latency",
         "date",
     )
+    # Prefix and exact searches can use the indexes on slug and user
     search_fields = (
+        "^slug",
+        "=user__username",
+    )
+    # Date ranges prune partitions, a date hierarchy would scan them all
+    list_filter = (DefinedUserFilter, "date")
+    ordering = ("-date",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class AccessLogRollupAdmin(admin.ModelAdmin):
+    list_display = (
+        "hour",
         "slug",
-        "user__username",
+        "requests",
+        "errors",
+        "latency_avg",
+        "latency_p50",
+        "latency_p95",
+        "latency_p99",
     )
-    list_filter = (DefinedUserFilter,)
+    search_fields = ("^slug",)
+    date_hierarchy = "hour"
+    ordering = ("-hour", "-requests")
 
 
 admin.site.register(palantir_models.AccessLog, AccessLogAdmin)
+admin.site.register(palantir_models.AccessLogRollup, AccessLogRollupAdmin)
@@ -1,5 +1,14 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class PalantirConfig(AppConfig):
     name = "palantir"
+
+    def ready(self):
+        if settings.GEOIP_DATABASE:
+            # Open the database on start, so a wrong setup is logged
+            # right away instead of leaving every address empty.
+            from .utils import get_geoip_reader
+
+            get_geoip_reader()
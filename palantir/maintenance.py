@@ -0,0 +1,190 @@
+"""
+Access logs maintenance.
+
+`palantir_accesslog` is partitioned by month (UTC) on `date`, with one
+table per month named `palantir_accesslog_YYYY_MM` and a default
+partition for logs outside every month created so far. The
+`maintain_accesslogs` command (run at least daily) does the following:
+
++ Creates the partitions of the current and next months.
++ Summarizes complete hours into `AccessLogRollup` (requests, errors and
+  latency percentiles per slug), which the admin can query without
+  scanning raw logs.
++ Drops the partitions older than the retention period, which is much
+  cheaper than deleting their rows.
+"""
+
+import re
+from datetime import datetime
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from palantir.models import AccessLog, AccessLogRollup
+
+ACCESS_LOG_TABLE = "palantir_accesslog"
+DEFAULT_PARTITION = ACCESS_LOG_TABLE + "_default"
+PARTITION_RE = re.compile(r"^palantir_accesslog_(\d{4})_(\d{2})$")
+
+
+def get_month(date: datetime) -> datetime:
+    """First instant (UTC) of the month of `date`"""
+    date = date.astimezone(timezone.utc)
+    return datetime(date.year, date.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def get_partition_name(month: datetime) -> str:
+    return "%s_%04d_%02d" % (ACCESS_LOG_TABLE, month.year, month.month)
+
+
+def get_partitions():
+    """Return the sorted list of (month, name) of the monthly partitions"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT inhrelid::regclass::text FROM pg_inherits "
+            "WHERE inhparent = %s::regclass",
+            [ACCESS_LOG_TABLE],
+        )
+        names = [name for name, in cursor.fetchall()]
+    partitions = []
+    for name in names:
+        match = PARTITION_RE.match(name)
+        if match:
+            month = datetime(
+                int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc
+            )
+            partitions.append((month, name))
+    return sorted(partitions)
+
+
+@transaction.atomic
+def create_partition(month: datetime) -> bool:
+    """
+    Create the partition of `month` if it doesn't exist, moving its logs
+    out of the default partition. Return whether it was created.
+    """
+    if month in dict(get_partitions()):
+        return False
+    name, end = get_partition_name(month), add_months(month, 1)
+    with connection.cursor() as cursor:
+        # The partition can't be attached while the default one has rows
+        # in its range, so these are moved to the new partition.
+        cursor.execute(
+            "CREATE TEMPORARY TABLE palantir_moved_accesslog AS "
+            "SELECT * FROM %s WHERE date >= %%s AND date < %%s" % DEFAULT_PARTITION,
+            [month, end],
+        )
+        cursor.execute(
+            "DELETE FROM %s WHERE date >= %%s AND date < %%s" % DEFAULT_PARTITION,
+            [month, end],
+        )
+        cursor.execute(
+            "CREATE TABLE %s PARTITION OF %s FOR VALUES FROM (%%s) TO (%%s)"
+            % (name, ACCESS_LOG_TABLE),
+            [month, end],
+        )
+        cursor.execute(
+            "INSERT INTO %s SELECT * FROM palantir_moved_accesslog" % ACCESS_LOG_TABLE
+        )
+        cursor.execute("DROP TABLE palantir_moved_accesslog")
+    return True
+
+
+def drop_partitions(before: datetime):
+    """
+    Drop the partitions of the months before `before` (and the logs of
+    the default partition before that date). Return the dropped names.
+    """
+    dropped = []
+    with connection.cursor() as cursor:
+        for month, name in get_partitions():
+            if add_months(month, 1) <= before:
+                cursor.execute("DROP TABLE %s" % name)
+                dropped.append(name)
+        cursor.execute("DELETE FROM %s WHERE date < %%s" % DEFAULT_PARTITION, [before])
+    return dropped
+
+
+def rollup_access_logs(start: datetime, end: datetime) -> int:
+    """
+    Summarize the logs in [start, end) per hour and slug, replacing the
+    rollups of those hours. Return the number of rollups written.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO palantir_accesslogrollup "
+            "  (hour, slug, requests, errors,"
+            "   latency_avg, latency_p50, latency_p95, latency_p99) "
+            "SELECT"
+            "  date_trunc('hour', date), slug, COUNT(*),"
+            "  COUNT(*) FILTER (WHERE status IS NULL OR status >= 500),"
+            "  AVG(latency),"
+            "  percentile_cont(0.5) WITHIN GROUP (ORDER BY latency),"
+            "  percentile_cont(0.95) WITHIN GROUP (ORDER BY latency),"
+            "  percentile_cont(0.99) WITHIN GROUP (ORDER BY latency) "
+            "FROM palantir_accesslog WHERE date >= %s AND date < %s "
+            "GROUP BY 1, 2 "
+            "ON CONFLICT (hour, slug) DO UPDATE SET"
+            "  requests = EXCLUDED.requests,"
+            "  errors = EXCLUDED.errors,"
+            "  latency_avg = EXCLUDED.latency_avg,"
+            "  latency_p50 = EXCLUDED.latency_p50,"
+            "  latency_p95 = EXCLUDED.latency_p95,"
+            "  latency_p99 = EXCLUDED.latency_p99",
+            [start, end],
+        )
+        return cursor.rowcount
+
+
+def rollup_pending_access_logs(now: datetime = None) -> int:
+    """
+    Summarize every complete hour since the last one summarized (which is
+    summarized again, since its logs might have been written late).
+    """
+    now = now or timezone.now()
+    end = now.replace(minute=0, second=0, microsecond=0)
+    last = AccessLogRollup.objects.order_by("-hour").values_list("hour", flat=True)
+    if last.exists():
+        start = last[0]
+    else:
+        first = AccessLog.objects.order_by("date").values_list("date", flat=True)
+        if not first.exists():
+            return 0
+        start = first[0].replace(minute=0, second=0, microsecond=0)
+    if start >= end:
+        return 0
+    return rollup_access_logs(start, end)
+
+
+def get_estimated_access_log_count() -> int:
+    """Number of logs according to the statistics of the partitions"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT COALESCE(SUM(GREATEST(reltuples, 0)), 0) FROM pg_class "
+            "WHERE oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = %s::regclass)",
+            [ACCESS_LOG_TABLE],
+        )
+        return int(cursor.fetchone()[0])
+
+
+def maintain_access_logs(retention_months: int, now: datetime = None):
+    """
+    Create upcoming partitions, summarize complete hours and drop the
+    partitions older than `retention_months` months. Return the names of
+    the created and dropped partitions.
+    """
+    now = now or timezone.now()
+    current = get_month(now)
+    created = [
+        get_partition_name(month)
+        for month in [current, add_months(current, 1)]
+        if create_partition(month)
+    ]
+    rollup_pending_access_logs(now)
+    dropped = drop_partitions(add_months(current, -retention_months))
+    return created, dropped
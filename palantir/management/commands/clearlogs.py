@@ -1,7 +1,9 @@
 from django.core.management import BaseCommand
-from palantir.models import AccessLog
+from django.db import connection
 
 
 class Command(BaseCommand):
     def handle(self, *args, **options):
-        AccessLog.objects.all().delete()
+        # Empties every partition at once, without loading the logs
+        with connection.cursor() as cursor:
+            cursor.execute("TRUNCATE palantir_accesslog")
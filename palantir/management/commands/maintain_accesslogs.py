@@ -0,0 +1,30 @@
+"""
+Create upcoming access log partitions, summarize complete hours into
+rollups and drop the partitions older than the retention period (see
+palantir/maintenance.py). Run it daily, as the `accesslogs` service of
+docker/prod/docker-compose.yml does.
+"""
+
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from palantir.maintenance import maintain_access_logs
+
+
+class Command(BaseCommand):
+    help = "Create, summarize and drop access log partitions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retention-months",
+            type=int,
+            default=settings.ACCESS_LOG_RETENTION_MONTHS,
+            help="Months of raw access logs to keep (rollups are kept forever)",
+        )
+
+    def handle(self, *args, **options):
+        created, dropped = maintain_access_logs(options["retention_months"])
+        for name in created:
+            print("Created partition %s" % name)
+        for name in dropped:
+            print("Dropped partition %s" % name)
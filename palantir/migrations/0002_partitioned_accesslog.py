@@ -0,0 +1,186 @@
+# Generated by Django 2.0 on 2026-10-18 03:19
+
+from django.db import migrations, models
+
+
+# Replace the access log table by one partitioned by month on `date`, with
+# typed columns for the fields that used to live only in the JSON message.
+# Existing logs are copied (filling the new columns from their message) to
+# monthly partitions; new months are created by `maintain_accesslogs`, and
+# logs outside every partition go to the default one.
+PARTITION_ACCESS_LOGS = """
+ALTER TABLE palantir_accesslog RENAME TO palantir_accesslog_old;
+ALTER INDEX palantir_accesslog_pkey RENAME TO palantir_accesslog_old_pkey;
+ALTER SEQUENCE palantir_accesslog_id_seq OWNED BY NONE;
+
+CREATE TABLE palantir_accesslog (
+  id integer NOT NULL DEFAULT nextval('palantir_accesslog_id_seq'),
+  date timestamp with time zone NOT NULL,
+  message text NOT NULL,
+  slug varchar(1024) NOT NULL,
+  user_id integer NULL,
+  path varchar(1024) NOT NULL DEFAULT '',
+  method varchar(10) NOT NULL DEFAULT '',
+  status smallint NULL,
+  latency double precision NULL,
+  ip inet NULL,
+  CONSTRAINT palantir_accesslog_pkey PRIMARY KEY (id, date)
+) PARTITION BY RANGE (date);
+
+ALTER SEQUENCE palantir_accesslog_id_seq OWNED BY palantir_accesslog.id;
+
+CREATE TABLE palantir_accesslog_default PARTITION OF palantir_accesslog DEFAULT;
+
+DO $BODY$
+DECLARE
+  month timestamp;
+BEGIN
+  month := date_trunc('month', COALESCE(
+    (SELECT MIN(date) FROM palantir_accesslog_old), now()) AT TIME ZONE 'UTC');
+  WHILE month <= date_trunc('month', now() AT TIME ZONE 'UTC') + INTERVAL '1 month' LOOP
+    EXECUTE format(
+      'CREATE TABLE %I PARTITION OF palantir_accesslog FOR VALUES FROM (%L) TO (%L)',
+      'palantir_accesslog_' || to_char(month, 'YYYY_MM'),
+      month::text || '+00',
+      (month + INTERVAL '1 month')::text || '+00'
+    );
+    month := month + INTERVAL '1 month';
+  END LOOP;
+END;
+$BODY$;
+
+-- IPv4 or IPv6 address of a message, NULL if it is not a valid address
+-- (the cast error is caught, since pg_input_is_valid needs PostgreSQL 16)
+CREATE FUNCTION pg_temp.palantir_parse_ip(value text) RETURNS inet
+LANGUAGE plpgsql IMMUTABLE AS $BODY$
+BEGIN
+  IF value IS NULL OR POSITION('/' IN value) > 0 THEN
+    RETURN NULL;
+  END IF;
+  RETURN value::inet;
+EXCEPTION WHEN invalid_text_representation THEN
+  RETURN NULL;
+END;
+$BODY$;
+
+INSERT INTO palantir_accesslog
+  (id, date, message, slug, user_id, path, method, status, latency, ip)
+SELECT
+  id, date, message, slug, user_id,
+  LEFT(COALESCE(SUBSTRING(
+    message::json #>> '{request,url}' FROM '^[a-z]+://[^/?#]*([^?#]*)'
+  ), ''), 1024),
+  LEFT(COALESCE(message::json #>> '{request,method}', ''), 10),
+  (message::json #>> '{response,code}')::smallint,
+  (message::json #>> '{response,time}')::double precision * 1000,
+  pg_temp.palantir_parse_ip(BTRIM(message::json #>> '{request,ip}'))
+FROM palantir_accesslog_old;
+
+DROP TABLE palantir_accesslog_old;
+DROP FUNCTION pg_temp.palantir_parse_ip(text);
+
+CREATE INDEX palantir_accesslog_date_idx ON palantir_accesslog (date);
+CREATE INDEX palantir_accesslog_user_id_idx ON palantir_accesslog (user_id);
+-- Used by the admin search (`slug__istartswith`)
+CREATE INDEX palantir_accesslog_slug_upper_idx
+  ON palantir_accesslog (UPPER(slug::text) text_pattern_ops);
+
+ALTER TABLE palantir_accesslog ADD CONSTRAINT palantir_accesslog_user_id_fk_auth_user_id
+  FOREIGN KEY (user_id) REFERENCES auth_user (id) DEFERRABLE INITIALLY DEFERRED;
+"""
+
+UNPARTITION_ACCESS_LOGS = """
+ALTER TABLE palantir_accesslog RENAME TO palantir_accesslog_partitioned;
+ALTER INDEX palantir_accesslog_pkey RENAME TO palantir_accesslog_partitioned_pkey;
+ALTER SEQUENCE palantir_accesslog_id_seq OWNED BY NONE;
+
+CREATE TABLE palantir_accesslog (
+  id integer NOT NULL DEFAULT nextval('palantir_accesslog_id_seq') PRIMARY KEY,
+  date timestamp with time zone NOT NULL,
+  message text NOT NULL,
+  slug varchar(1024) NOT NULL,
+  user_id integer NULL
+);
+
+ALTER SEQUENCE palantir_accesslog_id_seq OWNED BY palantir_accesslog.id;
+
+INSERT INTO palantir_accesslog (id, date, message, slug, user_id)
+SELECT id, date, message, slug, user_id FROM palantir_accesslog_partitioned;
+
+DROP TABLE palantir_accesslog_partitioned;
+
+CREATE INDEX palantir_accesslog_user_id_idx ON palantir_accesslog (user_id);
+ALTER TABLE palantir_accesslog ADD CONSTRAINT palantir_accesslog_user_id_fk_auth_user_id
+  FOREIGN KEY (user_id) REFERENCES auth_user (id) DEFERRABLE INITIALLY DEFERRED;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("palantir", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(PARTITION_ACCESS_LOGS, UNPARTITION_ACCESS_LOGS),
+            ],
+            state_operations=[
+                migrations.AddField(
+                    model_name="accesslog",
+                    name="ip",
+                    field=models.GenericIPAddressField(null=True),
+                ),
+                migrations.AddField(
+                    model_name="accesslog",
+                    name="latency",
+                    field=models.FloatField(null=True),
+                ),
+                migrations.AddField(
+                    model_name="accesslog",
+                    name="method",
+                    field=models.CharField(default="", max_length=10),
+                ),
+                migrations.AddField(
+                    model_name="accesslog",
+                    name="path",
+                    field=models.CharField(default="", max_length=1024),
+                ),
+                migrations.AddField(
+                    model_name="accesslog",
+                    name="status",
+                    field=models.SmallIntegerField(null=True),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="AccessLogRollup",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("hour", models.DateTimeField()),
+                ("slug", models.CharField(max_length=1024)),
+                ("requests", models.IntegerField()),
+                ("errors", models.IntegerField()),
+                ("latency_avg", models.FloatField(null=True)),
+                ("latency_p50", models.FloatField(null=True)),
+                ("latency_p95", models.FloatField(null=True)),
+                ("latency_p99", models.FloatField(null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="accesslogrollup",
+            index=models.Index(fields=["hour"], name="palantir_rollup_hour_idx"),
+        ),
+        migrations.AlterUniqueTogether(
+            name="accesslogrollup",
+            unique_together={("hour", "slug")},
+        ),
+    ]
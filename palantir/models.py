@@ -3,10 +3,44 @@ from django.db import models
 
 
 class AccessLog(models.Model):
+    """
+    Logged requests. The table is partitioned by month on `date` (see
+    palantir/maintenance.py), old partitions are dropped after being
+    summarized in AccessLogRollup.
+    """
+
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     date = models.DateTimeField(auto_now_add=True)
     message = models.TextField(default="{}")
     slug = models.CharField(max_length=1024)
+    path = models.CharField(max_length=1024, default="")
+    method = models.CharField(max_length=10, default="")
+    # Response status code (null if the request raised an exception)
+    status = models.SmallIntegerField(null=True)
+    # Response time in milliseconds
+    latency = models.FloatField(null=True)
+    ip = models.GenericIPAddressField(null=True)
+
+    def __str__(self):
+        return self.slug
+
+
+class AccessLogRollup(models.Model):
+    """Requests and latency percentiles per slug and hour"""
+
+    hour = models.DateTimeField()
+    slug = models.CharField(max_length=1024)
+    requests = models.IntegerField()
+    # Requests with a 5xx status code or that raised an exception
+    errors = models.IntegerField()
+    latency_avg = models.FloatField(null=True)
+    latency_p50 = models.FloatField(null=True)
+    latency_p95 = models.FloatField(null=True)
+    latency_p99 = models.FloatField(null=True)
+
+    class Meta:
+        unique_together = ("hour", "slug")
+        indexes = [models.Index(fields=["hour"], name="palantir_rollup_hour_idx")]
 
     def __str__(self):
         return self.slug
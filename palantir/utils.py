@@ -1,40 +1,86 @@
+import ipaddress
 import json
+import logging as log
+import os
+import queue
 import re
-import requests
 import threading
+import time
 import urllib
+from functools import lru_cache
 
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.cache import cache
+from django.db import connection
 from django.utils.text import slugify
 
 from palantir.models import AccessLog
 
+try:
+    import geoip2.database
+except ImportError:
+    geoip2 = None
+
 
 BLACK_LISTED_PATHS_RE = [
     re.compile("^/admin"),
     re.compile("^/favicon[.]ico$"),
     re.compile("^/health"),
     re.compile("^/media"),
+    re.compile("^/metrics"),
     re.compile("^/static"),
 ]
 
 BLACK_LISTED_IPS = []
 
 
+# Access logs waiting to be written (per process). When the queue is full
+# new logs are dropped (and counted) instead of blocking requests.
+ACCESS_LOG_QUEUE_SIZE = 10000
+# Logs are written in batches of at most this size, waiting at most this
+# number of seconds for a batch to be completed.
+ACCESS_LOG_BATCH_SIZE = 500
+ACCESS_LOG_FLUSH_INTERVAL = 2
+
+
+@lru_cache(maxsize=None)
+def get_geoip_reader():
+    if not settings.GEOIP_DATABASE:
+        return None
+    if geoip2 is None:
+        log.warning("GEOIP_DATABASE is set but the geoip2 package is missing")
+        return None
+    try:
+        return geoip2.database.Reader(settings.GEOIP_DATABASE)
+    except Exception as e:
+        log.warning("Could not open GeoIP database: %s", str(e))
+        return None
+
+
+@lru_cache(maxsize=4096)
 def get_real_address_from_ip(ip: str) -> object:
-    if not ip:
+    """
+    Resolve the address of `ip` with the local GeoIP database. Keys match
+    the ones returned by ip-api.com (used before) so old and new logs can
+    be read the same way.
+    """
+    reader = get_geoip_reader()
+    if not ip or reader is None:
         return {}
-    info = cache.get(ip)
-    if info:
-        return info
     try:
-        url = "http://ip-api.com/json/{}".format(ip)
-        info = json.loads(requests.get(url).content.decode("utf8"))
-    except:
-        info = {}
-    cache.set(ip, info, 60)
-    return info
+        city = reader.city(ip.strip())
+    except Exception:
+        return {}
+    return {
+        "country": city.country.name,
+        "countryCode": city.country.iso_code,
+        "regionName": city.subdivisions.most_specific.name,
+        "city": city.city.name,
+        "lat": city.location.latitude,
+        "lon": city.location.longitude,
+        "timezone": city.location.time_zone,
+        "query": ip,
+    }
 
 
 def get_client_ip_from_request(request):
@@ -78,22 +124,125 @@ def should_log_access(message: object) -> bool:
     return True
 
 
-def _log_access_now(message: object):
-    if not should_log_access(message):
-        return
-    message["address"] = get_real_address_from_ip(message["request"]["ip"])
+def get_valid_ip(ip: str):
     try:
-        user = User.objects.get(pk=message["request"]["user"])
-    except:
-        user = None
-    path = get_path_from_url(message["request"].get("url", ""))
-    AccessLog.objects.create(
-        user=user,
+        return str(ipaddress.ip_address((ip or "").strip()))
+    except ValueError:
+        return None
+
+
+def build_access_log(message: object) -> AccessLog:
+    """
+    Build the log of a request. Fields with their own column are not kept
+    in the JSON message.
+    """
+    request, response = message["request"], message["response"]
+    ip = request.pop("ip", None)
+    message["address"] = get_real_address_from_ip(ip)
+    path = get_path_from_url(request.get("url", ""))
+    latency = response.pop("time", None)
+    return AccessLog(
+        user_id=request.pop("user", None),
         message=json.dumps(message),
         slug=slugify(path.replace("/", "-")).strip("-").strip()[:1024],
+        path=path[:1024],
+        method=(request.pop("method", None) or "")[:10],
+        status=response.pop("code", None),
+        latency=None if latency is None else latency * 1000,
+        ip=get_valid_ip(ip),
+    )
+
+
+def write_access_logs(messages):
+    """Write a batch of access logs with a single query"""
+    logs = [build_access_log(message) for message in messages]
+    # Users might have been removed in the meantime
+    user_ids = set(
+        User.objects.filter(
+            pk__in={access_log.user_id for access_log in logs}
+        ).values_list("pk", flat=True)
     )
+    for access_log in logs:
+        if access_log.user_id not in user_ids:
+            access_log.user_id = None
+    AccessLog.objects.bulk_create(logs)
+    return len(logs)
+
+
+class AccessLogWriter(object):
+    """
+    Bounded queue of access logs with a single background thread (per
+    process) writing them in batches.
+    """
+
+    def __init__(self, queue_size, batch_size, flush_interval):
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.written = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def put(self, message: object):
+        self.ensure_started()
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def ensure_started(self):
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                # Threads don't survive a fork, start from scratch
+                self.queue = queue.Queue(maxsize=self.queue_size)
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self.run, name="palantir-writer", daemon=True
+            )
+            self._thread.start()
+
+    def take_batch(self):
+        """Wait for a message, then for the batch to fill up or time out"""
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self):
+        while True:
+            batch = self.take_batch()
+            try:
+                written = write_access_logs(batch)
+                with self._lock:
+                    self.written += written
+            except Exception as e:
+                log.error("Could not write %d access logs: %s", len(batch), str(e))
+                with self._lock:
+                    self.dropped += len(batch)
+                connection.close()
+
+
+access_log_writer = AccessLogWriter(
+    ACCESS_LOG_QUEUE_SIZE, ACCESS_LOG_BATCH_SIZE, ACCESS_LOG_FLUSH_INTERVAL
+)
 
 
 def log_access_eventually(message: object):
-    """Log access in a different thread to unblock the current request"""
-    threading.Thread(target=_log_access_now, args=[message], kwargs={}).start()
+    """Queue the access log to be written without blocking the current request"""
+    if should_log_access(message):
+        access_log_writer.put(message)
@@ -0,0 +1,116 @@
+import shutil
+import tempfile
+import threading
+import time
+
+from django.core.cache import caches
+from django.test import override_settings
+
+from api.lib import constants
+from api.lib.queries import (
+    cache_result,
+    get_all_contest_for_role,
+    get_cache_stats,
+    get_cache_version,
+    invalidate_cache,
+)
+from api.models import ContestPermission
+from . import FixturedTestCase
+
+
+class VersionedCacheTestCase(FixturedTestCase):
+    def setUp(self):
+        super(VersionedCacheTestCase, self).setUp()
+        self.folder = tempfile.mkdtemp()
+        self.settings = override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                    "LOCATION": self.folder,
+                }
+            }
+        )
+        self.settings.enable()
+        self.user = self.newUser("judge")
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.folder, ignore_errors=True)
+        super(VersionedCacheTestCase, self).tearDown()
+
+    def test_invalidate_bumps_version(self):
+        version = get_cache_version(constants.CACHE_KEY_STANDING)
+        self.assertEqual(get_cache_version(constants.CACHE_KEY_STANDING), version)
+        invalidate_cache(constants.CACHE_KEY_STANDING)
+        self.assertGreater(get_cache_version(constants.CACHE_KEY_STANDING), version)
+
+    def test_evicted_version_is_not_reused(self):
+        version = get_cache_version(constants.CACHE_KEY_STANDING)
+        caches["default"].clear()
+        time.sleep(0.01)
+        self.assertNotEqual(get_cache_version(constants.CACHE_KEY_STANDING), version)
+
+    def test_permissions_invalidate_user_contests(self):
+        self.assertEqual(get_all_contest_for_role(self.user.id, "judge"), [-1])
+        ContestPermission.objects.create(
+            user=self.user, contest=self.past_contest, role="judge", granted=True
+        )
+        self.assertEqual(
+            get_all_contest_for_role(self.user.id, "judge"), [self.past_contest.id, -1]
+        )
+
+
+class SingleFlightTestCase(FixturedTestCase):
+    def setUp(self):
+        super(SingleFlightTestCase, self).setUp()
+        caches["default"].clear()
+        self.calls = []
+
+        @cache_result(key="tests/slow", timeout=1)
+        def slow(value):
+            self.calls.append(value)
+            time.sleep(0.2)
+            return len(self.calls)
+
+        self.slow = slow
+
+    def run_concurrently(self, n):
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.slow(1)))
+            for _ in range(n)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_single_flight_on_cold_miss(self):
+        self.assertEqual(self.run_concurrently(8), [1] * 8)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_stale_while_revalidate(self):
+        before = get_cache_stats().get("tests/slow", {})
+        self.assertEqual(self.slow(1), 1)
+        time.sleep(1.1)
+        # one caller recomputes, the others get the stale value
+        self.assertEqual(sorted(self.run_concurrently(4)), [1, 1, 1, 2])
+        self.assertEqual(self.slow(1), 2)
+        stats = get_cache_stats()["tests/slow"]
+        self.assertEqual(stats["recomputes"] - before.get("recomputes", 0), 2)
+        self.assertEqual(stats["stale_hits"] - before.get("stale_hits", 0), 3)
+
+    def test_expired_lock_is_not_released_by_its_old_owner(self):
+        lock_key = None
+
+        @cache_result(key="tests/expired_lock")
+        def steal_lock():
+            # The lock expired and another caller took it
+            caches["default"].set(lock_key, "other", None)
+            return 1
+
+        version = get_cache_version("tests/expired_lock")
+        lock_key = constants.CACHE_LOCK_PREFIX + "tests/expired_lock@%d-" % version
+        self.assertEqual(steal_lock(), 1)
+        self.assertEqual(caches["default"].get(lock_key), "other")
@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from api.management.commands import __checker_backends as checker_backends
+from api.management.commands import __disk_cache as disk_cache
+from api.models import Checker
+
+
+class DiskCacheTestCase(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.src = tempfile.mkdtemp()
+        self.dst = tempfile.mkdtemp()
+
+    def tearDown(self):
+        for folder in [self.root, self.src, self.dst]:
+            shutil.rmtree(folder, ignore_errors=True)
+
+    def write(self, name, size):
+        with open(os.path.join(self.src, name), "wb") as f:
+            f.write(b"x" * size)
+
+    def test_store_and_restore(self):
+        self.write("checker.exe", 10)
+        self.assertFalse(disk_cache.restore(self.root, "key", self.dst))
+        self.assertTrue(disk_cache.store(self.root, "key", self.src, ["checker.exe"]))
+        # a second store of the same key is a no-op
+        self.assertFalse(disk_cache.store(self.root, "key", self.src, ["checker.exe"]))
+        self.assertTrue(disk_cache.restore(self.root, "key", self.dst))
+        self.assertTrue(os.path.exists(os.path.join(self.dst, "checker.exe")))
+
+    def test_evict_least_recently_used(self):
+        self.write("checker.exe", 100)
+        for key in ["a", "b", "c"]:
+            disk_cache.store(self.root, key, self.src, ["checker.exe"])
+        past = time.time() - 60
+        os.utime(os.path.join(self.root, "a"), (past, past))
+        os.utime(os.path.join(self.root, "b"), (past + 1, past + 1))
+        # hitting "a" makes it the most recently used entry
+        disk_cache.restore(self.root, "a", self.dst)
+        disk_cache.evict(self.root, 250)
+        self.assertEqual(sorted(os.listdir(self.root)), ["a", "c"])
+
+
+class CheckerCacheTestCase(TestCase):
+    def setUp(self):
+        self.resources = tempfile.mkdtemp()
+        self.cache = tempfile.mkdtemp()
+        self.folders = []
+        self.write_testlib(b"testlib 1")
+        self.compiler_version = "g++ 1"
+        self.compilations = 0
+        self.checker = Checker(id=1, source="int main() {}", backend="testlib.h")
+        checker_backends.get_compiler_version.cache_clear()
+        patcher = mock.patch.object(
+            checker_backends, "get_exitcode_stdout_stderr", self.run_command
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(checker_backends.get_compiler_version.cache_clear)
+        settings = override_settings(
+            RESOURCES_FOLDER=self.resources, CHECKERS_CACHE_FOLDER=self.cache
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def tearDown(self):
+        for folder in [self.resources, self.cache] + self.folders:
+            shutil.rmtree(folder, ignore_errors=True)
+
+    def write_testlib(self, content):
+        with open(os.path.join(self.resources, "testlib.h"), "wb") as f:
+            f.write(content)
+
+    def run_command(self, cmd, cwd, **kwargs):
+        if cmd == checker_backends.TESTLIB_H_COMPILE_COMMAND:
+            self.compilations += 1
+            with open(os.path.join(cwd, "checker.exe"), "wb") as f:
+                f.write(b"binary")
+            return 0, "", ""
+        return 0, self.compiler_version, ""
+
+    def compile(self):
+        cwd = tempfile.mkdtemp()
+        self.folders.append(cwd)
+        self.assertTrue(checker_backends.compile_checker(self.checker, cwd))
+        self.assertTrue(os.path.exists(os.path.join(cwd, "checker.exe")))
+
+    def test_hit_and_miss(self):
+        self.compile()
+        self.assertEqual(self.compilations, 1)
+        self.compile()
+        self.assertEqual(self.compilations, 1)
+        self.checker.source = "int main() { return 0; }"
+        self.compile()
+        self.assertEqual(self.compilations, 2)
+
+    def test_resource_and_compiler_changes(self):
+        self.compile()
+        self.write_testlib(b"testlib 2.0")
+        self.compile()
+        self.assertEqual(self.compilations, 2)
+        self.compiler_version = "g++ 2"
+        checker_backends.get_compiler_version.cache_clear()
+        self.compile()
+        self.assertEqual(self.compilations, 3)
+        self.compile()
+        self.assertEqual(self.compilations, 3)
@@ -0,0 +1,110 @@
+import io
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.test import TestCase
+
+from api.management.commands import __comparators as comparators
+from api.management.commands import grader
+from api.models import Checker
+
+
+def compare(backend, output, answer):
+    return comparators.COMPARATORS[backend](
+        io.BytesIO(output.encode()), io.BytesIO(answer.encode())
+    )
+
+
+class ComparatorsTestCase(TestCase):
+    def assertAccepted(self, backend, output, answer):
+        self.assertTrue(compare(backend, output, answer)[0], (backend, output, answer))
+
+    def assertRejected(self, backend, output, answer):
+        self.assertFalse(compare(backend, output, answer)[0], (backend, output, answer))
+
+    def test_fcmp(self):
+        self.assertAccepted("builtin-fcmp", "1 2\n3\n", "1 2\r\n3")
+        self.assertRejected("builtin-fcmp", "1  2\n3\n", "1 2\n3\n")
+        self.assertRejected("builtin-fcmp", "1 2\n", "1 2\n3\n")
+        self.assertRejected("builtin-fcmp", "1 2\n3\n4", "1 2\n3\n")
+        self.assertEqual(
+            (False, "2nd lines differ"), compare("builtin-fcmp", "1\n2\n", "1\n3\n")
+        )
+
+    def test_lcmp(self):
+        self.assertAccepted("builtin-lcmp", "1  2 \n3\n\n", "1 2\n 3")
+        self.assertRejected("builtin-lcmp", "1\n2\n3\n", "1 2\n3")
+        self.assertRejected("builtin-lcmp", "1 2\n\n3\n", "1 2\n3")
+        self.assertEqual(
+            (False, "2nd lines differ - expected: '4', found: 'end of line'"),
+            compare("builtin-lcmp", "1 2\n3\n4", "1 2\n3 4"),
+        )
+
+    def test_wcmp(self):
+        self.assertAccepted("builtin-wcmp", "1\n2   3\n", "1 2 3")
+        self.assertRejected("builtin-wcmp", "1 2", "1 2 3")
+        self.assertRejected("builtin-wcmp", "1 2 3 4", "1 2 3")
+        self.assertEqual(
+            (False, "3rd words differ - expected: '3', found: '4'"),
+            compare("builtin-wcmp", "1 2 4", "1 2 3"),
+        )
+        self.assertEqual((True, "3 tokens"), compare("builtin-wcmp", "a b c", "a b c"))
+
+    def test_rcmp(self):
+        self.assertAccepted("builtin-rcmp6", "1.0000001 2e6", "1 2000000.5")
+        self.assertRejected("builtin-rcmp6", "1.00001", "1")
+        self.assertAccepted("builtin-rcmp4", "1.00001", "1")
+        self.assertRejected("builtin-rcmp9", "1.00001", "1")
+        self.assertRejected("builtin-rcmp6", "one", "1")
+        self.assertRejected("builtin-rcmp6", "1_0", "10")
+        self.assertAccepted("builtin-rcmp6", "nan inf", "nan inf")
+        self.assertRejected("builtin-rcmp6", "inf", "nan")
+
+    def test_chunks(self):
+        output = " ".join(str(k) for k in range(10000)) + "\n"
+        with mock.patch.object(comparators, "CHUNK_SIZE", 7):
+            for backend in ["builtin-fcmp", "builtin-lcmp", "builtin-wcmp"]:
+                self.assertAccepted(backend, output, output)
+                self.assertRejected(backend, output, output.replace("5000", "5001"))
+            self.assertEqual(
+                (False, "5001st words differ - expected: '5001', found: '5000'"),
+                compare("builtin-wcmp", output, output.replace("5000", "5001")),
+            )
+
+    def test_long_tokens(self):
+        with mock.patch.object(comparators, "CHUNK_SIZE", 7):
+            tokens = list(comparators.read_tokens(io.BytesIO(b"ab cdefghijklmnop\nq")))
+            self.assertEqual(tokens, [b"ab", b"cdefghijklmnop", b"q"])
+        # Tokens spanning many chunks are read in linear time
+        token = "x" * (16 << 20)
+        start = time.monotonic()
+        self.assertAccepted("builtin-wcmp", token + "\n", token)
+        self.assertAccepted("builtin-lcmp", token + "\n", token)
+        self.assertLess(time.monotonic() - start, 5)
+
+
+class BuiltinCheckerTestCase(TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        with open(os.path.join(self.folder, "answer.txt"), "w") as f:
+            f.write("1 2 3\n")
+
+    def test_grader_runs_builtin_checkers(self):
+        checker = Checker(name="wcmp", source="", backend="builtin-wcmp")
+        self.assertTrue(checker.is_builtin)
+        checker_command = grader.compile_checker(checker, self.folder)
+        answer_file = os.path.join(self.folder, "answer.txt")
+        self.assertEqual(
+            (1, "Output file not found", ""),
+            grader.run_checker(checker_command, "input", answer_file, self.folder),
+        )
+        with open(os.path.join(self.folder, "output.txt"), "w") as f:
+            f.write("1 2\n3")
+        self.assertEqual(
+            (0, "3 tokens", ""),
+            grader.run_checker(checker_command, "input", answer_file, self.folder),
+        )
@@ -1,3 +1,6 @@
+import io
+import zipfile
+
 from django.urls import reverse
 
 from . import FixturedTestCase
@@ -29,6 +32,52 @@ class ContestTestCase(FixturedTestCase):
         response = self.client.post(url, data=self._get_problem_form_data())
         self.assertEqual(404, response.status_code)
 
+    def test_export_submissions(self):
+        admin = self.newLoggedUser("admin")
+        user, other_user = self.newUser("user1"), self.newUser("user2")
+        problem = self.newProblem("B", self.running_contest, 2)
+        instance = self.newContestInstance(self.running_contest, user)
+        s1 = self.newSubmission(
+            instance, user, problem=self.problem2, result=self.accepted, source="a"
+        )
+        s2 = self.newSubmission(
+            instance, user, problem=problem, result=self.wrong_answer, source="b"
+        )
+        # Submissions to other contests are not exported
+        self.newSubmission(
+            self.newContestInstance(self.past_contest, other_user),
+            other_user,
+            problem=self.problem1,
+            result=self.accepted,
+        )
+        url = reverse("mog:contest_submissions_export", args=(self.running_contest.pk,))
+        self.assertEqual(403, self.client.get(url).status_code)
+        self.updateUserProfile(admin, role="admin")
+        response = self.client.get(url)
+        self.assertEqual("application/zip", response["Content-Type"])
+        content = io.BytesIO(b"".join(response.streaming_content))
+        with zipfile.ZipFile(content) as archive:
+            header = "submissions_%s" % self.running_contest.name
+            self.assertEqual(
+                {
+                    "%s/A/%d_AC_A_user1.py" % (header, s1.id): b"a",
+                    "%s/B/%d_WA_B_user1.py" % (header, s2.id): b"b",
+                },
+                {name: archive.read(name) for name in archive.namelist()},
+            )
+
+    def test_problems_status(self):
+        user = self.newLoggedUser("user1")
+        instance = self.newContestInstance(self.running_contest, user)
+        self.newSubmission(instance, user, problem=self.problem2, result=self.accepted)
+        url = reverse("mog:contest_problems", args=(self.running_contest.pk,))
+        response = self.client.get(url)
+        self.assertContains(response, '<tr class="success">', count=1)
+        self.assertEqual(
+            [{"solved": True, "failed": False, "solved_count": 1}],
+            [problem.status for problem in response.context["problems"]],
+        )
+
     def _get_problem_form_data(self):
         return {
             "title": "A+B",
@@ -1,3 +1,5 @@
+from django.utils import timezone
+
 from . import FixturedTestCase
 
 
@@ -78,3 +80,62 @@ class ContestInstanceTestCase(FixturedTestCase):
             instance, user, problem=self.problem2, result=self.accepted, status="death"
         )
         self.assertFalse(instance.has_solved_problem(self.problem2))
+
+    def test_problems_status(self):
+        contest = self.past_contest
+        problem_b = self.newProblem("B", contest, 2)
+        problem_c = self.newProblem("C", contest, 3)
+        users = [self.newUser(username="user%d" % k) for k in range(4)]
+        real = [self.newContestInstance(contest, user) for user in users[:3]]
+        virtual = self.newContestInstance(
+            contest,
+            users[3],
+            real=False,
+            start_date=timezone.now() - timezone.timedelta(hours=1),
+        )
+        for instance, problem, result, minutes in [
+            (real[0], self.problem1, self.accepted, 10),
+            (real[0], self.problem1, self.accepted, 20),
+            (real[1], self.problem1, self.wrong_answer, 30),
+            (real[1], self.problem1, self.accepted, 200),
+            (real[2], problem_b, self.compilation_error, 10),
+            (real[2], problem_b, self.accepted, 20),
+            (virtual, problem_b, self.wrong_answer, 5),
+            (virtual, self.problem1, self.accepted, 20),
+        ]:
+            self.newSubmission(
+                instance, instance.user, minutes, problem=problem, result=result
+            )
+        problems = [self.problem1, problem_b, problem_c]
+        for instance in real + [virtual, None]:
+            if instance:
+                instance.contest
+            with self.assertNumQueries(1):
+                status = contest.get_problems_status(instance)
+            self.assertEqual(
+                {
+                    problem.id: {
+                        "solved": bool(
+                            instance and instance.has_solved_problem(problem)
+                        ),
+                        "failed": bool(
+                            instance and instance.has_failed_problem(problem)
+                        ),
+                        "solved_count": problem.total_solved_relevant_for_instance(
+                            instance
+                        ),
+                    }
+                    for problem in problems
+                },
+                status,
+            )
+        # Only real instances that solved it in the first hour are counted
+        self.assertEqual(
+            {self.problem1.id: 2, problem_b.id: 1, problem_c.id: 0},
+            {
+                problem_id: problem_status["solved_count"]
+                for problem_id, problem_status in contest.get_problems_status(
+                    virtual
+                ).items()
+            },
+        )
@@ -0,0 +1,137 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import TestCase
+from prometheus_client import REGISTRY
+
+from api.management.commands import grader
+from api.management.commands.grader import run_tests_in_parallel, run_tests_serially
+from . import FixturedTestCase
+
+
+def fake_runner(verdicts):
+    def run_test(test_number, input_file, answer_file, isolated):
+        verdict = verdicts[test_number - 1]
+        if verdict is None:
+            raise RuntimeError("boom")
+        return verdict, verdict, test_number * 10, test_number * 100
+
+    return run_test
+
+
+class ParallelTestsTestCase(TestCase):
+    def get_tests(self, n):
+        return [(k, "in%d" % k, "out%d" % k) for k in range(1, n + 1)]
+
+    def test_parallel_matches_serial(self):
+        scenarios = [
+            ["accepted"] * 8,
+            ["accepted", "accepted", "wrong answer", "accepted", "runtime error"],
+            ["time limit exceeded"] + ["accepted"] * 5,
+            ["accepted"] * 5 + ["wrong answer"],
+            ["accepted", None, "wrong answer"],
+        ]
+        for verdicts in scenarios:
+            tests = self.get_tests(len(verdicts))
+            serial = run_tests_serially(tests, fake_runner(verdicts))
+            for workers in [2, 3, 8]:
+                parallel = run_tests_in_parallel(tests, fake_runner(verdicts), workers)
+                self.assertEqual(serial, parallel)
+
+
+def get_metric(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class GraderMetricsTestCase(FixturedTestCase):
+    def test_time_limit_retries(self):
+        submission = SimpleNamespace(id=1, compiler=SimpleNamespace(language="Retry"))
+        data = {
+            "invocation_verdict": "TIME_LIMIT_EXCEEDED",
+            "exit_code": 1,
+            "consumed_memory": 0,
+            "execution_time": 0,
+        }
+        with mock.patch.object(grader, "run_grader", return_value=(data, 1, "", "")):
+            outcome = grader.run_test_case(
+                submission, "cmd", "checker", "in", "out", "folder", 1, 3
+            )
+        self.assertEqual(outcome[0], "time limit exceeded")
+        self.assertEqual(get_metric("judge_grader_retries_total", language="retry"), 2)
+        self.assertEqual(
+            get_metric(
+                "judge_grader_phase_duration_seconds_count",
+                phase="run",
+                language="retry",
+            ),
+            3,
+        )
+
+    def test_verdicts(self):
+        user = self.newUser("user1")
+        instance = self.newContestInstance(self.running_contest, user)
+        submission = self.newSubmission(
+            instance, user, problem=self.problem2, result=self.pending
+        )
+        labels = {"result": "wrong answer", "language": "python2"}
+        verdicts = get_metric("judge_grader_verdicts_total", **labels)
+        grader.update_submission(submission, 10, 1024, "wrong answer", "")
+        self.assertEqual(
+            get_metric("judge_grader_verdicts_total", **labels), verdicts + 1
+        )
+
+    def test_queue_depth(self):
+        user = self.newUser("user1")
+        instance = self.newContestInstance(self.running_contest, user)
+        self.newSubmission(instance, user, problem=self.problem2, result=self.pending)
+        # closing the connection would break the test transaction
+        with mock.patch.object(grader, "connection"):
+            [family] = grader.QueueDepthCollector().collect()
+        depth = {sample.labels["result"]: sample.value for sample in family.samples}
+        self.assertEqual(
+            depth["pending"],
+            grader.Submission.objects.filter(result__name="Pending").count(),
+        )
+        self.assertEqual(set(depth), {"pending", "compiling", "running"})
+
+
+class SupervisorTestCase(TestCase):
+    def test_crashing_workers_back_off(self):
+        clock, spawns = [0], []
+
+        class CrashingProcess(object):
+            pid, exitcode = 1, 1
+
+            def __init__(self, target, args, name):
+                self.name = name
+
+            def start(self):
+                spawns.append(clock[0])
+
+            def is_alive(self):
+                return False
+
+            def join(self):
+                pass
+
+        def wait(timeout):
+            clock[0] += timeout
+            return clock[0] > 100
+
+        context = SimpleNamespace(Process=CrashingProcess)
+        with mock.patch.object(
+            grader.multiprocessing, "get_context", return_value=context
+        ), mock.patch.object(
+            grader, "SHUTDOWN", SimpleNamespace(wait=wait)
+        ), mock.patch.object(
+            grader.time, "monotonic", lambda: clock[0]
+        ), mock.patch.object(
+            grader.signal, "signal"
+        ), mock.patch.object(
+            grader.connections, "close_all"
+        ), mock.patch.object(
+            grader, "log"
+        ):
+            grader.run_supervisor(1, 0, 1, 1)
+        self.assertEqual(spawns, [0, 2, 4, 8, 16, 32, 64])
+        self.assertEqual(grader.get_restart_delay(100), grader.WORKER_MAX_RESTART_DELAY)
@@ -0,0 +1,59 @@
+from django.core.cache import caches
+from django.test import override_settings
+from django.urls import reverse
+
+from api.lib.queries import cache_result
+from . import FixturedTestCase
+
+
+@override_settings(METRICS_TOKEN="secret")
+class MetricsTestCase(FixturedTestCase):
+    def get_metrics(self):
+        response = self.client.get(
+            reverse("mog:metrics"), HTTP_AUTHORIZATION="Bearer secret"
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_token_is_required(self):
+        self.assertEqual(self.client.get(reverse("mog:metrics")).status_code, 404)
+        response = self.client.get(
+            reverse("mog:metrics"), HTTP_AUTHORIZATION="Bearer wrong"
+        )
+        self.assertEqual(response.status_code, 404)
+        with override_settings(METRICS_TOKEN=""):
+            response = self.client.get(
+                reverse("mog:metrics"), HTTP_AUTHORIZATION="Bearer "
+            )
+            self.assertEqual(response.status_code, 404)
+
+    def test_request_metrics(self):
+        self.client.get(reverse("mog:faq"))
+        content = self.get_metrics()
+        self.assertIn(
+            'judge_request_duration_seconds_count{method="GET",status="2xx",view="mog:faq"}',
+            content,
+        )
+        self.assertIn('judge_request_db_queries_count{view="mog:faq"}', content)
+        self.assertIn('judge_request_db_duration_seconds_sum{view="mog:faq"}', content)
+        self.assertIn(
+            'judge_template_render_duration_seconds_count{template="mog/faq.html"}',
+            content,
+        )
+
+    def test_cache_metrics(self):
+        caches["default"].clear()
+        cached = cache_result("test-metrics")(lambda: 42)
+        cached()
+        cached()
+        content = self.get_metrics()
+        self.assertIn(
+            'judge_cache_requests_total{key="test-metrics",result="hit"} 1.0', content
+        )
+        self.assertIn(
+            'judge_cache_requests_total{key="test-metrics",result="miss"} 1.0', content
+        )
+        self.assertIn(
+            'judge_cache_recompute_duration_seconds_count{key="test-metrics"} 1.0',
+            content,
+        )
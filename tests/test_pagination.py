@@ -0,0 +1,69 @@
+from django.urls import reverse
+
+from api.models import Submission
+from mog.helpers import estimate_count, get_keyset_page
+from . import FixturedTestCase
+
+
+class KeysetPaginationTestCase(FixturedTestCase):
+    def setUp(self):
+        super(KeysetPaginationTestCase, self).setUp()
+        self.user = self.newUser("user1")
+        instance = self.newContestInstance(self.running_contest, self.user)
+        self.submissions = [
+            self.newSubmission(
+                instance, self.user, problem=self.problem2, result=self.accepted
+            )
+            for _ in range(7)
+        ]
+        self.ids = [submission.id for submission in reversed(self.submissions)]
+        self.queryset = Submission.objects.filter(pk__in=self.ids)
+
+    def get_ids(self, page):
+        return [submission.id for submission in page]
+
+    def test_pages(self):
+        page = get_keyset_page(self.queryset, 3)
+        self.assertEqual(self.ids[:3], self.get_ids(page))
+        self.assertFalse(page.has_previous())
+        self.assertTrue(page.has_next())
+        self.assertEqual(7, page.count)
+
+        page = get_keyset_page(self.queryset, 3, before=page.next_cursor)
+        self.assertEqual(self.ids[3:6], self.get_ids(page))
+        self.assertTrue(page.has_previous())
+        self.assertTrue(page.has_next())
+
+        last = get_keyset_page(self.queryset, 3, before=page.next_cursor)
+        self.assertEqual(self.ids[6:], self.get_ids(last))
+        self.assertFalse(last.has_next())
+
+        page = get_keyset_page(self.queryset, 3, after=last.previous_cursor)
+        self.assertEqual(self.ids[3:6], self.get_ids(page))
+        page = get_keyset_page(self.queryset, 3, after=page.previous_cursor)
+        self.assertEqual(self.ids[:3], self.get_ids(page))
+        self.assertFalse(page.has_previous())
+        self.assertTrue(page.has_next())
+
+    def test_invalid_cursors(self):
+        page = get_keyset_page(self.queryset, 3, before="x", after="")
+        self.assertEqual(self.ids[:3], self.get_ids(page))
+        # Nothing newer, the first page is shown instead
+        page = get_keyset_page(self.queryset, 3, after=self.ids[0])
+        self.assertEqual(self.ids[:3], self.get_ids(page))
+
+    def test_estimate_count(self):
+        self.assertEqual(7, estimate_count(self.queryset))
+        # Planner estimates depend on the statistics of the table
+        estimate = estimate_count(self.queryset, exact_below=0)
+        self.assertIsInstance(estimate, int)
+        self.assertGreaterEqual(estimate, 0)
+
+    def test_submissions_view(self):
+        url = reverse("mog:submissions")
+        response = self.client.get(url, {"before": self.ids[0]})
+        self.assertEqual(self.ids[1:], self.get_ids(response.context["submissions"]))
+        self.assertContains(response, "?after=%d" % self.ids[1])
+        # Old style pages still work
+        response = self.client.get(url, {"page": 1})
+        self.assertEqual(self.ids, self.get_ids(response.context["submissions"]))
@@ -0,0 +1,131 @@
+import json
+from datetime import datetime, timedelta
+
+from django.db import connection
+from django.utils import timezone
+
+from palantir.maintenance import (
+    add_months,
+    create_partition,
+    drop_partitions,
+    get_partitions,
+    rollup_access_logs,
+)
+from palantir.models import AccessLog, AccessLogRollup
+from palantir.utils import AccessLogWriter, write_access_logs
+from . import FixturedTestCase
+
+
+def new_message(path, user=None):
+    return {
+        "request": {
+            "user": user,
+            "url": "http://localhost" + path,
+            "ip": "127.0.0.1",
+            "method": "GET",
+            "files": [],
+            "meta": {},
+        },
+        "response": {"code": 200},
+    }
+
+
+class AccessLogWriterTestCase(FixturedTestCase):
+    def setUp(self):
+        super(AccessLogWriterTestCase, self).setUp()
+        self.user = self.newUser("user1")
+
+    def test_write_access_logs(self):
+        messages = [new_message("/test/a/", self.user.pk), new_message("/test/b/")]
+        self.assertEqual(write_access_logs(messages), 2)
+        # the middleware might be logging requests from other tests
+        logs = list(AccessLog.objects.filter(slug__startswith="test-").order_by("pk"))
+        self.assertEqual([log.slug for log in logs], ["test-a", "test-b"])
+        self.assertEqual([log.user for log in logs], [self.user, None])
+        self.assertEqual(json.loads(logs[0].message)["address"], {})
+
+    def test_write_access_logs_of_removed_users(self):
+        write_access_logs([new_message("/test/c/", self.user.pk + 1000)])
+        self.assertIsNone(AccessLog.objects.get(slug="test-c").user)
+
+    def test_full_queue_drops_messages(self):
+        writer = AccessLogWriter(queue_size=2, batch_size=10, flush_interval=0.1)
+        writer.ensure_started = lambda: None
+        for path in ["/a", "/b", "/c"]:
+            writer.put(new_message(path))
+        self.assertEqual(writer.dropped, 1)
+        self.assertEqual(len(writer.take_batch()), 2)
+
+    def test_typed_columns(self):
+        message = new_message("/test/d/", self.user.pk)
+        message["request"]["ip"] = " 10.0.0.1"
+        message["response"] = {"code": 404, "time": 0.5}
+        write_access_logs([message])
+        access_log = AccessLog.objects.get(slug="test-d")
+        self.assertEqual(access_log.path, "/test/d/")
+        self.assertEqual(access_log.method, "GET")
+        self.assertEqual(access_log.status, 404)
+        self.assertEqual(access_log.latency, 500)
+        self.assertEqual(access_log.ip, "10.0.0.1")
+        self.assertNotIn("ip", json.loads(access_log.message)["request"])
+
+
+class AccessLogMaintenanceTestCase(FixturedTestCase):
+    month = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+    def new_logs(self, slug, date, latencies, statuses):
+        for latency, status in zip(latencies, statuses):
+            AccessLog.objects.create(slug=slug, latency=latency, status=status)
+        AccessLog.objects.filter(slug=slug).update(date=date)
+
+    def count_logs(self, table, slug):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM %s WHERE slug = %%s" % table, [slug])
+            return cursor.fetchone()[0]
+
+    def test_create_partition_moves_default_logs(self):
+        self.new_logs(
+            "test-old", datetime(2020, 1, 15, tzinfo=timezone.utc), [1], [200]
+        )
+        self.assertEqual(self.count_logs("palantir_accesslog_default", "test-old"), 1)
+        self.assertTrue(create_partition(self.month))
+        self.assertFalse(create_partition(self.month))
+        self.assertIn((self.month, "palantir_accesslog_2020_01"), get_partitions())
+        self.assertEqual(self.count_logs("palantir_accesslog_default", "test-old"), 0)
+        self.assertEqual(self.count_logs("palantir_accesslog_2020_01", "test-old"), 1)
+
+    def test_rollup(self):
+        hour = datetime(2020, 1, 15, 10, tzinfo=timezone.utc)
+        self.new_logs(
+            "test-rollup",
+            hour + timedelta(minutes=5),
+            [10, 20, 30, 40],
+            [200, 200, 404, 500],
+        )
+        rollup_access_logs(hour, hour + timedelta(hours=1))
+        rollup = AccessLogRollup.objects.get(slug="test-rollup")
+        self.assertEqual(rollup.hour, hour)
+        self.assertEqual((rollup.requests, rollup.errors), (4, 1))
+        self.assertEqual((rollup.latency_avg, rollup.latency_p50), (25, 25))
+        # Rolling up the same hour again replaces it
+        AccessLog.objects.filter(slug="test-rollup", status=500).delete()
+        rollup_access_logs(hour, hour + timedelta(hours=1))
+        rollup = AccessLogRollup.objects.get(slug="test-rollup")
+        self.assertEqual((rollup.requests, rollup.errors), (3, 0))
+
+    def test_drop_partitions(self):
+        create_partition(self.month)
+        create_partition(add_months(self.month, 1))
+        self.new_logs(
+            "test-drop", datetime(2020, 1, 15, tzinfo=timezone.utc), [1], [200]
+        )
+        self.new_logs(
+            "test-keep", datetime(2020, 2, 15, tzinfo=timezone.utc), [1], [200]
+        )
+        with connection.cursor() as cursor:
+            # Tables with pending (deferred) foreign key checks can't be dropped
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        dropped = drop_partitions(add_months(self.month, 1))
+        self.assertEqual(dropped, ["palantir_accesslog_2020_01"])
+        self.assertFalse(AccessLog.objects.filter(slug="test-drop").exists())
+        self.assertTrue(AccessLog.objects.filter(slug="test-keep").exists())
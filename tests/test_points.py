@@ -0,0 +1,92 @@
+from unittest import mock
+
+from api.lib import constants
+from api.lib.points import (
+    apply_pending_points_updates,
+    get_problem_points,
+    get_solved_submissions,
+)
+from api.models import PendingPointsUpdate, Problem, SolvedProblem, Submission
+from . import FixturedTestCase
+
+
+class PointsLedgerTestCase(FixturedTestCase):
+    def setUp(self):
+        super(PointsLedgerTestCase, self).setUp()
+        self.problem3 = self.newProblem("A+B", self.running_contest, 2)
+        self.problems = [self.problem2, self.problem3]
+        self.users = [self.newUser("user%d" % k) for k in range(4)]
+        self.instances = [
+            self.newContestInstance(self.running_contest, user) for user in self.users
+        ]
+        self.apply()
+
+    def submit(self, k, problem, result, **kwargs):
+        return self.newSubmission(
+            self.instances[k], self.users[k], problem=problem, result=result, **kwargs
+        )
+
+    def apply(self):
+        while apply_pending_points_updates(batch_size=3):
+            pass
+        self.assertFalse(PendingPointsUpdate.objects.exists())
+
+    def assertConsistentPoints(self):
+        self.apply()
+        solved = set(
+            get_solved_submissions().values_list("user_id", "problem_id").distinct()
+        )
+        self.assertEqual(
+            set(SolvedProblem.objects.values_list("user_id", "problem_id")), solved
+        )
+        points = {}
+        for problem in Problem.objects.filter(id__in=[p.id for p in self.problems]):
+            solvers = len([1 for _, problem_id in solved if problem_id == problem.id])
+            self.assertEqual(problem.points, get_problem_points(solvers))
+            points[problem.id] = problem.points
+        for user in self.users:
+            user.profile.refresh_from_db()
+            expected = sum(points[pid] for uid, pid in solved if uid == user.id)
+            self.assertEqual(user.profile.points, expected)
+
+    def test_accepted_submissions(self):
+        self.submit(0, self.problem2, self.accepted)
+        self.submit(0, self.problem2, self.accepted)
+        self.submit(1, self.problem2, self.wrong_answer)
+        self.submit(2, self.problem3, self.accepted)
+        self.assertConsistentPoints()
+        self.assertEqual(SolvedProblem.objects.count(), 2)
+
+    def test_rejudge_and_hide(self):
+        submission = self.submit(0, self.problem2, self.pending)
+        self.submit(1, self.problem2, self.accepted)
+        self.assertConsistentPoints()
+        submission.result = self.accepted
+        submission.save()
+        self.assertConsistentPoints()
+        submission.hidden = True
+        submission.save()
+        self.assertConsistentPoints()
+        submission.delete()
+        self.assertConsistentPoints()
+
+    def test_bulk_unfreeze(self):
+        for k in range(4):
+            self.submit(k, self.problems[k % 2], self.accepted, status="frozen")
+        self.assertConsistentPoints()
+        Submission.objects.filter(status="frozen").update(status="normal")
+        self.assertConsistentPoints()
+        self.assertEqual(SolvedProblem.objects.count(), 4)
+
+    def test_top_rated_invalidation(self):
+        with mock.patch(
+            "api.lib.points.transaction.on_commit", lambda callback: callback()
+        ), mock.patch("api.lib.points.invalidate_cache") as invalidate_cache:
+            self.submit(0, self.problem2, self.wrong_answer)
+            self.apply()
+            invalidate_cache.assert_not_called()
+            self.submit(0, self.problem2, self.accepted)
+            self.apply()
+            invalidate_cache.assert_called_once_with(
+                constants.CACHE_KEY_FIVE_TOP_RATED_PROFILES
+            )
@@ -1,5 +1,13 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
 from . import FixturedTestCase
-from api.models import Problem
+from api.lib.points import apply_pending_points_updates
+from api.models import Problem, Submission
 
 
 class ProblemTestCase(FixturedTestCase):
@@ -12,3 +20,95 @@ class ProblemTestCase(FixturedTestCase):
             contest=self.past_contest,
         )
         self.assertEqual(problem.points, 10)
+
+
+class ProblemSubmissionStatsTestCase(FixturedTestCase):
+    def setUp(self):
+        super(ProblemSubmissionStatsTestCase, self).setUp()
+        self.problem3 = self.newProblem("A+B", self.running_contest, 2)
+        self.users = [self.newUser("user%d" % k) for k in range(4)]
+        self.instances = [
+            self.newContestInstance(self.running_contest, user) for user in self.users
+        ]
+
+    def submit(self, k, problem, result, **kwargs):
+        return self.newSubmission(
+            self.instances[k], self.users[k], problem=problem, result=result, **kwargs
+        )
+
+    def apply(self):
+        # Statistics are refreshed with the points
+        while apply_pending_points_updates(batch_size=3):
+            pass
+
+    def assertStats(self, problem, solved, accepted, submissions, users):
+        problem.refresh_from_db()
+        self.assertEqual(
+            (
+                problem.solved_count,
+                problem.accepted_count,
+                problem.submissions_count,
+                problem.users_count,
+            ),
+            (solved, accepted, submissions, users),
+        )
+
+    def test_problem_stats_follow_submissions(self):
+        self.submit(0, self.problem2, self.accepted)
+        self.submit(0, self.problem2, self.accepted)
+        self.submit(1, self.problem2, self.wrong_answer)
+        frozen = self.submit(2, self.problem2, self.accepted, status="frozen")
+        self.apply()
+        self.assertStats(self.problem2, 1, 2, 4, 3)
+        self.assertStats(self.problem3, 0, 0, 0, 0)
+        Submission.objects.filter(status="frozen").update(status="normal")
+        self.apply()
+        self.assertStats(self.problem2, 2, 3, 4, 3)
+        frozen.hidden = True
+        frozen.save()
+        self.apply()
+        self.assertStats(self.problem2, 1, 2, 3, 2)
+
+    def test_problem_stats_of_hidden_contests(self):
+        self.submit(0, self.problem2, self.accepted)
+        self.apply()
+        self.running_contest.visible = False
+        self.running_contest.save()
+        Problem.update_submission_stats(self.running_contest.problems.all())
+        self.assertStats(self.problem2, 0, 0, 0, 0)
+
+    def test_rebuild_problem_stats(self):
+        self.submit(0, self.problem3, self.accepted)
+        self.submit(1, self.problem3, self.wrong_answer)
+        Problem.objects.update(solved_count=7, submissions_count=7)
+        call_command("rebuild_problem_stats", batch_size=2, stdout=StringIO())
+        self.assertStats(self.problem3, 1, 1, 2, 2)
+        self.assertStats(self.problem2, 0, 0, 0, 0)
+
+    def test_problem_list_sorting(self):
+        self.submit(0, self.problem2, self.accepted)
+        self.submit(1, self.problem2, self.accepted)
+        self.submit(2, self.problem2, self.wrong_answer)
+        self.submit(0, self.problem3, self.accepted)
+        self.apply()
+        url = reverse("mog:problems")
+        for sort, mode, first, second in [
+            ("solved", "desc", self.problem2, self.problem3),
+            ("solved", "asc", self.problem3, self.problem2),
+            ("acceptance", "desc", self.problem3, self.problem2),
+        ]:
+            response = self.client.get(url, {"sort": sort, "mode": mode})
+            problems = [
+                p for p in response.context["problem_list"] if p in (first, second)
+            ]
+            self.assertEqual(problems, [first, second])
+
+    def test_problem_list_queries(self):
+        for k in range(4):
+            self.submit(k, self.problem2, self.accepted)
+        self.apply()
+        # The counters of every row are read from the problem
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("mog:problems"))
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(len(queries), 10)
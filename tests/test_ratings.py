@@ -1,13 +1,27 @@
+import random
+from unittest import skipIf
+
+from django.conf import settings
+from django.db.models import Sum
 from django.test import TestCase
 
+from api.models import RatingChange, UserProfile
 from mog.ratings import (
+    np,
     reassign_ranks,
     win_probability,
     get_seed,
     get_rating_for_rank,
     get_rating_deltas,
     check_rating_deltas,
+    get_rating_deltas_numpy,
+    get_rating_deltas_reference,
+    check_rating_deltas_numpy,
+    check_rating_deltas_reference,
+    set_ratings,
+    unset_ratings,
 )
+from . import FixturedTestCase
 
 
 class RatingsTestCase(TestCase):
@@ -77,3 +91,88 @@ class RatingsTestCase(TestCase):
         deltas, _ = get_rating_deltas(ranks, ratings)
         self.assertTrue(deltas[-1] == 0)
         self.assertTrue(check_rating_deltas(ranks, ratings, deltas))
+
+
+@skipIf(np is None, "NumPy is not installed")
+class NumpyRatingsTestCase(TestCase):
+    def random_contest(self, num_coders):
+        ratings = [random.randint(1, 7999) for _ in range(num_coders)]
+        ranks = sorted(random.randint(1, num_coders) for _ in range(num_coders))
+        return ranks, ratings
+
+    def test_rating_deltas_are_identical(self):
+        random.seed(2018)
+        for num_coders in [1, 2, 3, 10, 57, 150]:
+            ranks, ratings = self.random_contest(num_coders)
+            deltas, seeds = get_rating_deltas_numpy(ranks, ratings)
+            expected_deltas, expected_seeds = get_rating_deltas_reference(
+                ranks, ratings
+            )
+            self.assertEqual(deltas, expected_deltas)
+            # compare the exact binary representation of the seeds
+            self.assertEqual(
+                [seed.hex() for seed in seeds],
+                [seed.hex() for seed in expected_seeds],
+            )
+
+    def test_check_rating_deltas_is_identical(self):
+        random.seed(2019)
+        for num_coders in [1, 2, 5, 40, 120]:
+            ranks, ratings = self.random_contest(num_coders)
+            deltas, _ = get_rating_deltas_reference(ranks, ratings)
+            for _ in range(5):
+                self.assertEqual(
+                    check_rating_deltas_numpy(ranks, ratings, deltas, block_size=7),
+                    check_rating_deltas_reference(ranks, ratings, deltas),
+                )
+                k = random.randrange(num_coders)
+                deltas[k] += random.randint(-300, 300)
+
+
+class ProfileRatingsTestCase(FixturedTestCase):
+    def setUp(self):
+        super(ProfileRatingsTestCase, self).setUp()
+        self.users = [self.newUser("user%d" % k) for k in range(3)]
+        for k, user in enumerate(self.users):
+            instance = self.newContestInstance(self.past_contest, user)
+            for minutes in range(k + 1):
+                self.newSubmission(
+                    instance,
+                    user,
+                    10 + minutes,
+                    problem=self.problem1,
+                    result=self.wrong_answer if minutes < k else self.accepted,
+                )
+
+    def assertProfileRatings(self):
+        for user in self.users:
+            profile = UserProfile.objects.get(pk=user.pk)
+            changes = RatingChange.objects.filter(profile=profile)
+            self.assertEqual(profile.rated_contests, changes.count())
+            self.assertEqual(profile.has_rating, changes.exists())
+            expected = changes.aggregate(total=Sum("rating"))["total"]
+            self.assertEqual(
+                profile.rating,
+                expected + settings.BASE_RATING if expected is not None else 0,
+            )
+
+    def test_set_and_unset_ratings(self):
+        self.assertTrue(set_ratings(self.past_contest))
+        self.assertTrue(UserProfile.objects.get(pk=self.users[0].pk).has_rating)
+        self.assertProfileRatings()
+        # rating again replaces the previous rating changes
+        self.assertTrue(set_ratings(self.past_contest))
+        self.assertProfileRatings()
+        self.assertEqual(
+            list(UserProfile.sorted_by_ratings().filter(rated_contests__gt=0)),
+            [user.profile for user in self.users],
+        )
+        unset_ratings(self.past_contest)
+        self.assertFalse(UserProfile.objects.get(pk=self.users[0].pk).has_rating)
+        self.assertProfileRatings()
+
+    def test_delete_rated_contest(self):
+        self.assertTrue(set_ratings(self.past_contest))
+        self.past_contest.delete()
+        self.assertProfileRatings()
+        self.assertFalse(UserProfile.objects.filter(rated_contests__gt=0).exists())
@@ -0,0 +1,30 @@
+from api.lib.results import get_result, get_result_by_id
+from api.models import Result
+from . import FixturedTestCase
+
+
+class ResultsRegistryTestCase(FixturedTestCase):
+    def test_get_result(self):
+        self.assertEqual(get_result("accepted"), self.accepted)
+        self.assertEqual(get_result("WRONG ANSWER"), self.wrong_answer)
+        self.assertEqual(get_result_by_id(self.pending.id), self.pending)
+        self.assertEqual(get_result_by_id(str(self.pending.id)), self.pending)
+
+    def test_missing_result(self):
+        with self.assertRaises(Result.DoesNotExist):
+            get_result("does not exist")
+        with self.assertRaises(Result.DoesNotExist):
+            get_result_by_id(None)
+        with self.assertRaises(ValueError):
+            get_result_by_id("abc")
+
+    def test_invalidation(self):
+        self.assertEqual(get_result("pending"), self.pending)
+        self.pending.name = "Queued"
+        self.pending.save()
+        self.assertEqual(get_result("queued").id, self.pending.id)
+        with self.assertRaises(Result.DoesNotExist):
+            get_result("pending")
+        self.pending.delete()
+        with self.assertRaises(Result.DoesNotExist):
+            get_result("queued")
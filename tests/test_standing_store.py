@@ -0,0 +1,139 @@
+from django.utils import timezone
+
+from api.lib.queries import get_standing_store
+from api.models import SubmissionChange
+from mog.standing import calculate_standing_new
+from mog.standing_store import StandingStore
+from . import FixturedTestCase
+
+
+def summarize(standing):
+    problems, rows = standing
+    return [problem.id for problem in problems], [
+        (
+            row.participant.id,
+            row.rank,
+            row.solved,
+            row.penalty,
+            row.attempts,
+            row.last_accepted_delta,
+            [
+                (
+                    cell.accepted,
+                    cell.attempts,
+                    cell.pending,
+                    cell.first,
+                    cell.first_all,
+                    cell.acc_delta,
+                )
+                for cell in row.problem_results
+            ],
+        )
+        for row in rows
+    ]
+
+
+class StandingStoreTestCase(FixturedTestCase):
+    def setUp(self):
+        super(StandingStoreTestCase, self).setUp()
+        self.contest = self.running_contest
+        self.problem3 = self.newProblem("A+B", self.contest, 2)
+        self.users = [self.newUser("user%d" % k) for k in range(4)]
+        self.instances = [
+            self.newContestInstance(self.contest, user) for user in self.users
+        ]
+        self.store = StandingStore(self.contest)
+
+    def submit(self, k, minutes, problem, result, **kwargs):
+        return self.newSubmission(
+            self.instances[k],
+            self.users[k],
+            minutes,
+            problem=problem,
+            result=result,
+            **kwargs
+        )
+
+    def assertSameStanding(self):
+        self.store.refresh()
+        self.assertFalse(self.store.stale)
+        expected = calculate_standing_new(self.contest, False, None, None, False)
+        self.assertEqual(summarize(self.store.standing()), summarize(expected))
+        # a store built from scratch must agree as well
+        fresh = StandingStore(self.contest)
+        self.assertEqual(summarize(fresh.standing()), summarize(expected))
+
+    def test_matches_full_recalculation(self):
+        self.submit(0, 10, self.problem2, self.wrong_answer)
+        self.submit(0, 20, self.problem2, self.accepted)
+        self.submit(1, 15, self.problem2, self.accepted)
+        self.submit(1, 30, self.problem3, self.time_limit_exceeded)
+        self.submit(2, 25, self.problem3, self.accepted)
+        self.submit(3, 40, self.problem3, self.pending)
+        self.assertSameStanding()
+
+    def test_incremental_updates(self):
+        first = self.submit(0, 10, self.problem2, self.accepted)
+        self.submit(1, 10, self.problem2, self.accepted)
+        self.assertSameStanding()
+
+        # rejudge the first solver: the flag moves to another participant
+        first.result = self.wrong_answer
+        first.save()
+        self.assertSameStanding()
+
+        # new submissions, including frozen and pending ones
+        self.submit(2, 5, self.problem3, self.accepted)
+        self.submit(3, 50, self.problem3, self.accepted, status="frozen")
+        self.submit(0, 60, self.problem3, self.pending)
+        self.assertSameStanding()
+
+        # hiding a submission removes it from the standing
+        first.hidden = True
+        first.save()
+        self.assertSameStanding()
+
+    def test_ties_share_rank(self):
+        self.submit(0, 10, self.problem2, self.accepted)
+        self.submit(1, 10, self.problem2, self.accepted)
+        self.store.refresh()
+        self.assertEqual(
+            self.store.rank_of(self.instances[0].id),
+            self.store.rank_of(self.instances[1].id),
+        )
+        self.assertEqual(self.store.rank_of(self.instances[2].id), 3)
+
+    def test_new_participant_marks_store_as_stale(self):
+        user = self.newUser("late")
+        instance = self.newContestInstance(self.contest, user)
+        self.newSubmission(instance, user, problem=self.problem2, result=self.accepted)
+        self.store.refresh()
+        self.assertTrue(self.store.stale)
+
+    def test_refresh_loads_changed_submissions_only(self):
+        self.submit(0, 10, self.problem2, self.accepted)
+        deleted = self.submit(1, 10, self.problem2, self.accepted)
+        self.assertSameStanding()
+        SubmissionChange.objects.all().delete()
+        with self.assertNumQueries(1):
+            self.store.refresh()
+        # Deleted submissions are logged as well
+        deleted_id = deleted.id
+        deleted.delete()
+        self.assertEqual(
+            [deleted_id],
+            list(SubmissionChange.objects.values_list("submission_id", flat=True)),
+        )
+        self.assertSameStanding()
+
+    def test_prune_submission_changes(self):
+        self.submit(0, 10, self.problem2, self.accepted)
+        self.assertTrue(SubmissionChange.objects.exists())
+        SubmissionChange.prune(timezone.now() + timezone.timedelta(seconds=1))
+        self.assertFalse(SubmissionChange.objects.exists())
+
+    def test_stores_are_reused(self):
+        store = get_standing_store(self.contest, None)
+        self.submit(0, 10, self.problem2, self.accepted)
+        self.assertIs(get_standing_store(self.contest, None), store)
+        self.assertEqual(store.rank_of(self.instances[0].id), 1)
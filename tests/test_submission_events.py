@@ -0,0 +1,86 @@
+import json
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Submission
+from mog.standing import calculate_standing_new
+from mog.statistics import get_contest_stats
+from mog.submission_events import load_submission_events
+from . import FixturedTestCase
+
+
+class SubmissionEventsTestCase(FixturedTestCase):
+    def setUp(self):
+        super(SubmissionEventsTestCase, self).setUp()
+        self.contest = self.running_contest
+        self.users = [self.newUser("user%d" % k) for k in range(3)]
+        self.instances = [
+            self.newContestInstance(self.contest, user) for user in self.users
+        ]
+
+    def submit(self, k, minutes, result, **kwargs):
+        return self.newSubmission(
+            self.instances[k],
+            self.users[k],
+            minutes,
+            problem=self.problem2,
+            result=result,
+            **kwargs
+        )
+
+    def test_events_match_submissions(self):
+        self.submit(0, 10, self.wrong_answer, source="print(1)")
+        self.submit(1, 20, self.accepted, source="print(42)", hidden=True)
+        queryset = Submission.objects.filter(problem=self.problem2).order_by("id")
+        for event, submission in zip(
+            load_submission_events(queryset, details=True), queryset
+        ):
+            self.assertEqual(
+                event.row[:4],
+                (
+                    submission.date,
+                    submission.problem_id,
+                    submission.instance_id,
+                    submission.result_id,
+                ),
+            )
+            self.assertEqual(event.is_accepted, submission.is_accepted)
+            self.assertEqual(event.user_id, submission.user_id)
+            self.assertEqual(event.hidden, submission.hidden)
+            self.assertEqual(event.language, submission.compiler.language)
+            self.assertEqual(event.source_length, len(submission.source))
+
+    def test_standing_queries_do_not_grow_with_submissions(self):
+        self.submit(0, 10, self.accepted)
+        # load the results registry
+        calculate_standing_new(self.contest)
+        with CaptureQueriesContext(connection) as few:
+            calculate_standing_new(self.contest)
+        for k in range(3):
+            self.submit(k, 20 + k, self.wrong_answer)
+            self.submit(k, 30 + k, self.accepted)
+        with CaptureQueriesContext(connection) as many:
+            calculate_standing_new(self.contest)
+        self.assertEqual(len(few), len(many))
+
+    def test_contest_stats(self):
+        self.submit(0, 10, self.wrong_answer, source="x" * 30)
+        self.submit(0, 15, self.accepted, source="x" * 20)
+        self.submit(1, 5, self.accepted, source="x" * 25)
+        self.submit(2, 1, self.accepted, source="x" * 5, hidden=True)
+        stats = json.loads(get_contest_stats(self.contest))
+        self.assertEqual(len(stats), 1)
+        self.assertEqual(stats[0]["tried"], 2)
+        self.assertEqual(stats[0]["accepted"], 2)
+        self.assertEqual(stats[0]["first_solve"], 5)
+        self.assertEqual(stats[0]["shortest_code_participant"], 20)
+        self.assertEqual(stats[0]["shortest_code_judge"], 5)
+        self.assertEqual(
+            stats[0]["submissions"],
+            [
+                [5, "Accepted", "Python2"],
+                [10, "Wrong Answer", "Python2"],
+                [15, "Accepted", "Python2"],
+            ],
+        )
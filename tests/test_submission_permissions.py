@@ -0,0 +1,115 @@
+import itertools
+
+from django.contrib.auth.models import AnonymousUser
+from django.utils import timezone
+
+from api.models import Submission
+from mog.gating import (
+    CAN_REJUDGE,
+    CAN_SEE_DETAILS,
+    CAN_SEE_SOURCE,
+    get_submissions_permissions,
+    grant_role_to_user_in_contest,
+)
+from . import FixturedTestCase
+
+
+class SubmissionPermissionsTestCase(FixturedTestCase):
+    def setUp(self):
+        super(SubmissionPermissionsTestCase, self).setUp()
+        self.owner = self.newUser("owner")
+        self.hidden_contest = self.newContest(
+            code="HC",
+            visible=False,
+            start_date=timezone.now() - timezone.timedelta(hours=1),
+        )
+        hidden_problem = self.newProblem("C", self.hidden_contest, 1)
+        instances = [
+            None,
+            (self.newContestInstance(self.running_contest, self.owner), self.problem2),
+            (self.newContestInstance(self.past_contest, self.owner), self.problem1),
+            (
+                self.newContestInstance(
+                    self.past_contest,
+                    self.owner,
+                    real=False,
+                    start_date=timezone.now() - timezone.timedelta(hours=1),
+                ),
+                self.problem1,
+            ),
+            (
+                self.newContestInstance(self.hidden_contest, self.owner),
+                hidden_problem,
+            ),
+        ]
+        self.submissions = []
+        for instance, hidden, public, status in itertools.product(
+            instances, [False, True], [False, True], ["normal", "frozen", "death"]
+        ):
+            instance, problem = instance or (None, self.problem1)
+            self.submissions.append(
+                Submission.objects.create(
+                    problem=problem,
+                    instance=instance,
+                    date=timezone.now(),
+                    source="",
+                    user=self.owner,
+                    result=self.accepted,
+                    compiler=self.py2,
+                    hidden=hidden,
+                    public=public,
+                    status=status,
+                )
+            )
+
+    def get_users(self):
+        judge, observer = self.newUser("judge"), self.newUser("observer")
+        for contest in [self.past_contest, self.hidden_contest]:
+            grant_role_to_user_in_contest(judge, contest, "judge")
+            grant_role_to_user_in_contest(observer, contest, "observer")
+        return [
+            AnonymousUser(),
+            self.owner,
+            self.newUser("other"),
+            self.newAdmin("admin"),
+            judge,
+            observer,
+        ]
+
+    def get_expected(self, user, submission):
+        flags = 0
+        if submission.can_show_source_to(user):
+            flags |= CAN_SEE_SOURCE
+        if submission.can_show_details_to(user):
+            flags |= CAN_SEE_DETAILS
+        if submission.can_be_rejudged_by(user):
+            flags |= CAN_REJUDGE
+        return flags
+
+    def test_same_as_submission_methods(self):
+        users = self.get_users()
+        for user, submissions in itertools.product(
+            users,
+            [
+                Submission.objects.filter(id__in=[s.id for s in self.submissions]),
+                Submission.objects.filter(
+                    id__in=[s.id for s in self.submissions]
+                ).select_related("problem", "instance__contest"),
+            ],
+        ):
+            permissions = get_submissions_permissions(user, submissions)
+            for submission in self.submissions:
+                self.assertEqual(
+                    self.get_expected(user, submission),
+                    permissions[submission.id],
+                    (user, submission.instance, submission.hidden, submission.public),
+                )
+
+    def test_number_of_queries(self):
+        submissions = list(Submission.objects.filter(user=self.owner))
+        user = self.newUser("other")
+        self.updateUserProfile(user)
+        # roles are cached, problems and instances are fetched at once
+        get_submissions_permissions(user, submissions[:1])
+        with self.assertNumQueries(2):
+            get_submissions_permissions(user, submissions)
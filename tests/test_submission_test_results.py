@@ -0,0 +1,95 @@
+from api.lib.test_results import (
+    backfill_test_results,
+    get_failing_tests,
+    get_test_stats,
+    parse_judgement_details,
+)
+from api.management.commands.grader import update_submission
+from api.models import SubmissionTestResult
+from . import FixturedTestCase
+
+
+class SubmissionTestResultsTestCase(FixturedTestCase):
+    def setUp(self):
+        super(SubmissionTestResultsTestCase, self).setUp()
+        self.user = self.newUser("user1")
+        self.instance = self.newContestInstance(self.running_contest, self.user)
+
+    def submit(self, result, tests):
+        """`tests` is a list of (result, time, memory) per test"""
+        submission = self.newSubmission(
+            self.instance, self.user, problem=self.problem2, result=self.pending
+        )
+        update_submission(
+            submission,
+            max(time for _, time, _ in tests),
+            max(memory for _, _, memory in tests),
+            result.name,
+            "",
+            [
+                SubmissionTestResult(
+                    submission=submission,
+                    test_number=k,
+                    result=test_result,
+                    execution_time=time,
+                    memory_used=memory,
+                )
+                for k, (test_result, time, memory) in enumerate(tests, start=1)
+            ],
+        )
+        return submission
+
+    def test_stats(self):
+        accepted, wrong_answer = self.accepted, self.wrong_answer
+        self.submit(accepted, [(accepted, 10, 1024), (accepted, 300, 2048)])
+        self.submit(accepted, [(accepted, 30, 1024), (accepted, 100, 4096)])
+        self.submit(wrong_answer, [(accepted, 20, 1024), (wrong_answer, 900, 1024)])
+        self.submit(wrong_answer, [(wrong_answer, 50, 1024)])
+        stats = get_test_stats(self.problem2)
+        self.assertEqual([s["test_number"] for s in stats], [1, 2])
+        self.assertEqual([s["runs"] for s in stats], [4, 3])
+        self.assertEqual([s["failures"] for s in stats], [1, 1])
+        self.assertEqual([s["max_time"] for s in stats], [50, 900])
+        self.assertEqual([s["max_accepted_time"] for s in stats], [30, 300])
+        self.assertEqual(stats[1]["max_memory"], 4096)
+        self.assertEqual(
+            get_failing_tests(self.problem2),
+            {1: {"Wrong Answer": 1}, 2: {"Wrong Answer": 1}},
+        )
+        self.assertEqual(get_test_stats(self.problem2, language="java"), [])
+
+    def test_regrading_replaces_results(self):
+        accepted = self.accepted
+        submission = self.submit(accepted, [(accepted, 10, 1024), (accepted, 10, 1024)])
+        update_submission(submission, 0, 0, "compilation error", "error")
+        self.assertFalse(submission.test_results.exists())
+
+    def test_backfill(self):
+        details = (
+            "Case#1 [1024 bytes][15 ms]: ok\n"
+            "Case#2 [2048 bytes][40 ms]: wrong answer\n"
+            "expected 1, found 2\n"
+        )
+        self.assertEqual(
+            parse_judgement_details(details), [(1, 1024, 15), (2, 2048, 40)]
+        )
+        submission = self.newSubmission(
+            self.instance,
+            self.user,
+            problem=self.problem2,
+            result=self.wrong_answer,
+            judgement_details=details,
+        )
+        last_id, created = backfill_test_results(submission.id - 1, 10)
+        self.assertEqual((last_id, created), (submission.id, 2))
+        self.assertEqual(
+            list(
+                submission.test_results.order_by("test_number").values_list(
+                    "test_number", "result", "execution_time", "memory_used"
+                )
+            ),
+            [(1, self.accepted.id, 15, 1024), (2, self.wrong_answer.id, 40, 2048)],
+        )
+        # Submissions with test results are skipped
+        self.assertEqual(backfill_test_results(submission.id - 1, 10)[1], 0)
+        self.assertEqual(backfill_test_results(submission.id, 10), (None, 0))
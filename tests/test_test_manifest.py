@@ -0,0 +1,117 @@
+import os
+import shutil
+import tempfile
+
+from django.test import override_settings
+
+from api.lib import test_manifest
+from api.management.commands.grader import get_problem_tests
+from mog.samples import get_tests
+from . import FixturedTestCase
+
+
+class TestManifestTestCase(FixturedTestCase):
+    def setUp(self):
+        super(TestManifestTestCase, self).setUp()
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        override = override_settings(
+            PROBLEMS_FOLDER=os.path.join(self.folder, "problems"),
+            TESTS_CACHE_FOLDER=os.path.join(self.folder, "cache"),
+            TESTS_CACHE_SIZE=0,
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        test_manifest._manifests.clear()
+        self.problem_folder = test_manifest.get_problem_folder(self.problem1.id)
+        for folder in test_manifest.TEST_FOLDERS:
+            os.makedirs(os.path.join(self.problem_folder, folder))
+
+    def write_test(self, folder, name, content):
+        path = os.path.join(self.problem_folder, folder, name)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".upload-")
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+        os.rename(tmp, path)
+
+    def test_manifest(self):
+        self.write_test("inputs", "2.in", "2 2")
+        self.write_test("inputs", "1.in", "1 1")
+        self.write_test("outputs", "1.out", "2")
+        self.write_test("outputs", ".upload-partial", "")
+        manifest = test_manifest.get_manifest(self.problem1.id)
+        self.assertEqual(["1.in", "2.in"], [f["name"] for f in manifest["inputs"]])
+        self.assertEqual(["1.out"], [f["name"] for f in manifest["outputs"]])
+        self.assertEqual(3, manifest["inputs"][0]["size"])
+        self.assertTrue(
+            os.path.exists(test_manifest.get_manifest_path(self.problem1.id))
+        )
+        self.assertEqual(manifest, test_manifest.get_manifest(self.problem1.id))
+        # Uploads in progress are not shown as tests either
+        self.assertEqual(["1.out"], get_tests(self.problem1, "outputs"))
+
+    def test_missing_folders(self):
+        shutil.rmtree(os.path.join(self.problem_folder, "outputs"))
+        self.assertIsNone(test_manifest.get_manifest(self.problem1.id))
+        self.assertIsNone(get_problem_tests(self.problem1))
+
+    def test_changes_rebuild_manifest(self):
+        self.write_test("inputs", "1.in", "1 1")
+        digest = test_manifest.get_manifest(self.problem1.id)["digest"]
+        # Replacing a file without invalidating the manifest
+        self.write_test("inputs", "1.in", "1 2")
+        folder = os.path.join(self.problem_folder, "inputs")
+        stat = os.stat(folder)
+        os.utime(folder, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertNotEqual(
+            digest, test_manifest.get_manifest(self.problem1.id)["digest"]
+        )
+
+    def test_invalidate_manifest(self):
+        self.write_test("inputs", "1.in", "1 1")
+        test_manifest.get_manifest(self.problem1.id)
+        test_manifest.invalidate_manifest(self.problem1.id)
+        self.assertFalse(
+            os.path.exists(test_manifest.get_manifest_path(self.problem1.id))
+        )
+        test_manifest.invalidate_manifest(self.problem1.id)
+
+    def test_problem_tests(self):
+        self.write_test("inputs", "1.in", "1 1")
+        self.write_test("inputs", "2.in", "2 2")
+        self.write_test("outputs", "1.out", "2")
+        self.assertIsNone(get_problem_tests(self.problem1))
+        self.write_test("outputs", "2.out", "4")
+        self.assertEqual(
+            [
+                (
+                    1,
+                    os.path.join(self.problem_folder, "inputs", "1.in"),
+                    os.path.join(self.problem_folder, "outputs", "1.out"),
+                ),
+                (
+                    2,
+                    os.path.join(self.problem_folder, "inputs", "2.in"),
+                    os.path.join(self.problem_folder, "outputs", "2.out"),
+                ),
+            ],
+            get_problem_tests(self.problem1),
+        )
+
+    def test_staged_tests(self):
+        self.write_test("inputs", "1.in", "1 1")
+        self.write_test("outputs", "1.out", "2")
+        with override_settings(TESTS_CACHE_SIZE=1):
+            [(_, input_file, answer_file)] = get_problem_tests(self.problem1)
+            self.assertTrue(input_file.startswith(os.path.join(self.folder, "cache")))
+            with open(answer_file) as f:
+                self.assertEqual("2", f.read())
+            mode = os.stat(os.path.join(self.folder, "cache")).st_mode
+            self.assertEqual(0o700, mode & 0o777)
+            # Changed tests are staged again
+            self.write_test("outputs", "1.out", "3")
+            test_manifest.invalidate_manifest(self.problem1.id)
+            [(_, _, new_answer_file)] = get_problem_tests(self.problem1)
+            self.assertNotEqual(answer_file, new_answer_file)
+            with open(new_answer_file) as f:
+                self.assertEqual("3", f.read())
@@ -0,0 +1,74 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from api.lib.points import apply_pending_points_updates
+from api.models import UserProfile, Submission
+from . import FixturedTestCase
+
+
+class UserSubmissionStatsTestCase(FixturedTestCase):
+    def setUp(self):
+        super(UserSubmissionStatsTestCase, self).setUp()
+        self.problem3 = self.newProblem("A+B", self.running_contest, 2)
+        self.users = [self.newUser("user%d" % k) for k in range(4)]
+        self.instances = [
+            self.newContestInstance(self.running_contest, user) for user in self.users
+        ]
+
+    def submit(self, k, problem, result, **kwargs):
+        return self.newSubmission(
+            self.instances[k], self.users[k], problem=problem, result=result, **kwargs
+        )
+
+    def apply(self):
+        # Statistics are refreshed with the points
+        while apply_pending_points_updates(batch_size=3):
+            pass
+
+    def assertStats(self, k, solved, accepted, submissions, last=None):
+        profile = UserProfile.objects.get(user=self.users[k])
+        self.assertEqual(
+            (profile.solved_count, profile.accepted_count, profile.submissions_count),
+            (solved, accepted, submissions),
+        )
+        self.assertEqual(profile.last_submission_date, last and last.date)
+
+    def test_stats_follow_submissions(self):
+        self.submit(0, self.problem2, self.accepted, minutes=1)
+        self.submit(0, self.problem2, self.accepted, minutes=2)
+        self.submit(0, self.problem3, self.wrong_answer, minutes=3)
+        last = self.submit(0, self.problem3, self.accepted, status="frozen")
+        self.apply()
+        self.assertStats(0, 1, 2, 4, last)
+        self.assertStats(1, 0, 0, 0)
+        Submission.objects.filter(status="frozen").update(status="normal")
+        self.apply()
+        self.assertStats(0, 2, 3, 4, last)
+        last.hidden = True
+        last.save()
+        self.apply()
+        profile = UserProfile.objects.get(user=self.users[0])
+        self.assertEqual(profile.submissions_count, 3)
+        self.assertLess(profile.last_submission_date, last.date)
+
+    def test_rebuild_user_stats(self):
+        self.submit(1, self.problem2, self.accepted, minutes=1)
+        last = self.submit(1, self.problem3, self.wrong_answer)
+        UserProfile.objects.update(solved_count=7, submissions_count=7)
+        call_command("rebuild_user_stats", batch_size=2, stdout=StringIO())
+        self.assertStats(1, 1, 1, 2, last)
+        self.assertStats(2, 0, 0, 0)
+
+    def test_user_list_queries(self):
+        for k in range(4):
+            self.submit(k, self.problem2, self.accepted)
+        self.apply()
+        # The stats of every row are read from the profile
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("mog:users"))
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(len(queries), 10)